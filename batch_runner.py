@@ -0,0 +1,200 @@
+import io
+import json
+import shlex
+import sys
+import time
+from contextlib import redirect_stdout
+
+from identity_index import valid_imdb_id
+from movie_app import fetch_movie_details, parse_movie_details
+
+OPERATIONS = ("add", "delete", "note", "search", "stats")
+
+
+def parse_operation(line):
+    """
+    Parses one line of a batch script.
+    A line is either a JSON object such as {"op": "note", "title": "Heat", "note": "Classic"}
+    or shell-quoted words such as: note "Heat" "Classic".
+    Args:
+        line (str): The script line.
+    Returns:
+        dict or None: The operation, or None for blank lines and # comments.
+    Raises:
+        ValueError: If the line can't be parsed.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        operation = json.loads(line)
+        if not isinstance(operation, dict):
+            raise ValueError("expected a JSON object")
+        return operation
+
+    words = shlex.split(line)
+    op, arguments = words[0].lower(), words[1:]
+    if op in ("add", "delete"):
+        return {"op": op, "title": " ".join(arguments)}
+    if op == "note":
+        if len(arguments) != 2:
+            raise ValueError('expected: note "<title>" "<note>"')
+        return {"op": op, "title": arguments[0], "note": arguments[1]}
+    if op == "search":
+        return {"op": op, "term": " ".join(arguments)}
+    if op == "stats":
+        return {"op": op, "year": int(arguments[0]) if arguments else None}
+    return {"op": op}
+
+
+def _text(operation, field, default=None):
+    """
+    Returns a text field of an operation, or default if it is missing and a default is given.
+    Raises:
+        KeyError: If a required field is missing.
+        ValueError: If the field isn't a string, e.g. {"title": 5}.
+    """
+    if default is not None and field not in operation:
+        return default
+    value = operation[field]
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value
+
+
+class BatchRunner:
+    def __init__(self, storage, cache=None, fetch=fetch_movie_details, views=None):
+        """
+        Initializes a runner that applies scripted operations to a storage.
+        Args:
+            storage (IStorage): Storage to apply the operations to.
+            cache (OmdbCache): Optional OMDb response cache for adds.
+            fetch (callable): Looks a title up in OMDb, like fetch_movie_details.
+            views (RefreshState): Optional view counter for the movies searches return.
+        """
+        self._storage = storage
+        self._cache = cache
+        self._fetch = fetch
+        self._views = views
+
+    def run(self, lines, commit_every=None, out=None):
+        """
+        Runs every operation and writes one JSON result line per operation.
+        Changes are persisted once at the end, or after every commit_every
+        operations, instead of once per change.
+        Args:
+            lines (iterable): Script lines.
+            commit_every (int): Operations per commit; None commits once at the end.
+            out: Text stream the results are written to, stdout by default.
+        Returns:
+            dict: Summary with the operation, success, failure and commit counts and the elapsed time.
+        """
+        out = out or sys.stdout
+        summary = {"operations": 0, "ok": 0, "failed": 0, "commits": 0}
+        started = time.perf_counter()
+        pending = 0
+        batch = self._storage.batch()
+        batch.__enter__()
+        try:
+            for number, line in enumerate(lines, 1):
+                try:
+                    operation = parse_operation(line)
+                except ValueError as e:
+                    result = {"line": number, "status": "error", "error": f"Invalid operation: {e}"}
+                else:
+                    if operation is None:
+                        continue
+                    result = {"line": number, **self.apply(operation)}
+
+                summary["operations"] += 1
+                summary["ok" if result["status"] == "ok" else "failed"] += 1
+                out.write(json.dumps(result) + "\n")
+
+                pending += 1
+                if commit_every and pending >= commit_every:
+                    batch.__exit__(None, None, None)
+                    summary["commits"] += 1
+                    pending = 0
+                    batch = self._storage.batch()
+                    batch.__enter__()
+        finally:
+            batch.__exit__(None, None, None)
+        if pending:
+            summary["commits"] += 1
+        summary["elapsed"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def apply(self, operation):
+        """
+        Applies one parsed operation.
+        Returns:
+            dict: The result, with "status" "ok", "exists", "not_found" or "error",
+            and any messages the storage printed under "messages".
+        """
+        op = operation.get("op")
+        if op not in OPERATIONS:
+            return {"op": op, "status": "error", "error": f"Unknown operation, expected one of {', '.join(OPERATIONS)}"}
+        output = io.StringIO()
+        with redirect_stdout(output):
+            try:
+                result = getattr(self, f"_op_{op}")(operation)
+            except (KeyError, TypeError, ValueError) as e:
+                result = {"status": "error", "error": f"Invalid {op} operation: {e}"}
+        messages = output.getvalue().splitlines()
+        if messages:
+            result["messages"] = messages
+        return {"op": op, **result}
+
+    def _op_add(self, operation):
+        title = _text(operation, "title").strip()
+        if not title:
+            raise ValueError("missing title")
+        existing = self._storage.find_duplicate(title, _text(operation, "imdb_id", "N/A"))
+        if existing is not None:
+            return {"title": title, "status": "exists", "existing": existing}
+        if "rating" in operation:
+            # Details given in the script are stored as they are, without asking OMDb
+            year, rating = int(operation.get("year", 0)), float(operation["rating"])
+            poster, imdb_id = _text(operation, "poster", "N/A"), _text(operation, "imdb_id", "N/A")
+        else:
+            movie_details = self._fetch(title, cache=self._cache)
+            if not movie_details:
+                return {"title": title, "status": "not_found"}
+            year, rating, poster, imdb_id = parse_movie_details(movie_details)
+            # OMDb may resolve the title to a movie stored under another spelling
+            existing = self._storage.find_duplicate(title, imdb_id)
+            if existing is not None:
+                return {"title": title, "status": "exists", "existing": existing}
+        self._storage.add_movie(title, year, rating, poster, imdb_id)
+        return {"title": title, "status": "ok", "year": year, "rating": rating}
+
+    def _op_delete(self, operation):
+        title = _text(operation, "title").strip()
+        if valid_imdb_id(title):
+            found = self._storage.get_movie_by_imdb_id(title)
+            title = found[0] if found is not None else title
+        if self._storage.get_movie(title) is None:
+            return {"title": title, "status": "not_found"}
+        self._storage.delete_movie(title)
+        return {"title": title, "status": "ok"}
+
+    def _op_note(self, operation):
+        title, note = _text(operation, "title").strip(), _text(operation, "note")
+        if self._storage.get_movie(title) is None:
+            return {"title": title, "status": "not_found"}
+        self._storage.update_movie(title, note)
+        return {"title": title, "status": "ok"}
+
+    def _op_search(self, operation):
+        term = _text(operation, "term").lower()
+        found = [{"title": title, "year": info["year"], "rating": info["rating"]}
+                 for title, info in self._storage.search_movies(term)]
+        if self._views is not None:
+            for movie in found:
+                self._views.record_view(movie["title"])
+        return {"term": term, "status": "ok", "results": found}
+
+    def _op_stats(self, operation):
+        year = operation.get("year")
+        stats = self._storage.movie_stats(int(year) if year is not None else None)
+        return {"status": "ok", "stats": stats}
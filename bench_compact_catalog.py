@@ -0,0 +1,65 @@
+import argparse
+import gc
+import random
+import tracemalloc
+
+from compact_catalog import CompactCatalog
+
+POSTER_PREFIX = "https://m.media-amazon.com/images/M/"
+
+
+def synthetic_movies(count, seed=0):
+    """
+    Yields (title, details) pairs shaped like the stored OMDb data.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        poster_id = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789")
+                            for _ in range(40))
+        yield f"Synthetic Movie {i}", {
+            "year": rng.randint(1920, 2024),
+            "rating": round(rng.uniform(1, 10), 1),
+            "poster": f"{POSTER_PREFIX}{poster_id}._V1_SX300.jpg",
+            "imdb_id": f"tt{i:07d}",
+        }
+
+
+def measure(factory, count):
+    """
+    Builds a catalog and returns the memory it holds, in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    catalog = factory(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del catalog
+    return size
+
+
+def build_dict(count):
+    return dict(synthetic_movies(count))
+
+
+def build_compact(count):
+    catalog = CompactCatalog()
+    for title, details in synthetic_movies(count):
+        catalog[title] = details
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of dict and compact catalogs.")
+    parser.add_argument("--movies", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    dict_size = measure(build_dict, args.movies)
+    compact_size = measure(build_compact, args.movies)
+    print(f"{args.movies} movies")
+    print(f"dict of dicts:   {dict_size / 2 ** 20:8.1f} MiB ({dict_size / args.movies:.0f} bytes/movie)")
+    print(f"CompactCatalog:  {compact_size / 2 ** 20:8.1f} MiB ({compact_size / args.movies:.0f} bytes/movie)")
+    print(f"reduction:       {1 - compact_size / dict_size:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from functools import partial
+from unittest import mock
+
+import movie_app
+from bench_compact_catalog import synthetic_movies
+from fake_omdb_server import FakeOmdbServer
+from main import STORAGE_BACKENDS, create_storage
+from movie_app import MovieApp
+
+# Menu command and the answers it asks for, driven without a terminal
+COMMANDS = {
+    "list": (1, []),
+    "add": (2, ["Benchmark Movie"]),
+    "delete": (3, ["Benchmark Movie"]),
+    "update": (4, ["Synthetic Movie 1", "Benchmark note"]),
+    "stats": (5, []),
+    "random": (6, []),
+    "search": (7, ["movie 12"]),
+    "search_typo": (7, ["synthetc movi 123"]),
+    "sort": (8, ["1-50"]),
+    "generate_website": (9, []),
+    "filter": (10, ["1990-1999", "8.5-10", "n"]),
+    "similar": (11, ["Synthetic Movie 1"]),
+}
+
+
+def write_synthetic_catalog(backend, file_path, count):
+    """
+    Writes a synthetic catalog in the given storage format.
+    """
+    with redirect_stdout(io.StringIO()):
+        storage = create_storage(backend, file_path)
+        with storage.batch():
+            for title, details in synthetic_movies(count):
+                storage.add_movie(title, details["year"], details["rating"], details["poster"], details["imdb_id"])
+
+
+def timed(function, *args):
+    """
+    Calls a function with its output captured.
+    Returns:
+        tuple: (seconds taken, return value).
+    """
+    with redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        value = function(*args)
+        return time.perf_counter() - started, value
+
+
+def run_command(app, choice, answers):
+    """
+    Runs one menu command of a MovieApp with scripted answers to its prompts.
+    """
+    replies = iter([str(choice), *answers, "0"])
+    with mock.patch("builtins.input", lambda *_: next(replies)):
+        app.run()
+
+
+def benchmark_backend(backend, count, directory, operations):
+    """
+    Times opening a catalog, storage mutations and every MovieApp command.
+    Returns:
+        list: One result dict per timed operation.
+    """
+    file_path = os.path.join(directory, f"catalog-{count}-{os.path.basename(STORAGE_BACKENDS[backend][1])}")
+    write_synthetic_catalog(backend, file_path, count)
+    results = []
+
+    def record(operation, seconds, ops=1):
+        results.append({"backend": backend, "movies": count, "operation": operation,
+                        "seconds": seconds, "ops": ops, "seconds_per_op": seconds / ops})
+
+    seconds, storage = timed(create_storage, backend, file_path)
+    record("open", seconds)
+
+    def mutate(kind):
+        for i in range(operations):
+            title = f"Benchmark Mutation {i}"
+            if kind == "add":
+                storage.add_movie(title, 2000, 7.0, "N/A", f"tt9{i:07d}")
+            elif kind == "update":
+                storage.update_movie(title, "note")
+            else:
+                storage.delete_movie(title)
+
+    for kind in ("add", "update", "delete"):
+        record(f"storage_{kind}", timed(mutate, kind)[0], operations)
+
+    app = MovieApp(storage)
+    for name, (choice, answers) in COMMANDS.items():
+        record(f"command_{name}", timed(run_command, app, choice, answers)[0])
+        # Indexes are built on first use; time the warm call separately
+        if name in ("stats", "search", "sort", "filter"):
+            record(f"command_{name}_warm", timed(run_command, app, choice, answers)[0])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the storages and MovieApp commands.")
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="Comma separated catalog sizes, e.g. 1000,100000,10000000")
+    parser.add_argument("--backends", default="json,csv", help="Comma separated storage backends")
+    parser.add_argument("--operations", type=int, default=20, help="Adds, updates and deletes to time")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    template_path = os.path.abspath("index_template.html")
+    results = []
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer({
+        "Benchmark Movie": {"Year": "2024", "imdbRating": "7.0", "Poster": "N/A", "imdbID": "tt9999999"}
+    }) as server:
+        # Commands write index.html and friends into the working directory
+        shutil.copy(template_path, directory)
+        os.chdir(directory)
+        try:
+            with mock.patch("movie_app.fetch_movie_details",
+                            partial(movie_app.fetch_movie_details, api_url=server.url)):
+                for count in (int(size) for size in args.sizes.split(",")):
+                    for backend in args.backends.split(","):
+                        results.extend(benchmark_backend(backend, count, directory, args.operations))
+        finally:
+            os.chdir(working_directory)
+
+    report = json.dumps({"python": platform.python_version(), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from identity_index import IMDB_ID_PATTERN
+from main import STORAGE_BACKENDS, create_storage
+from movie_app import API_URL, request_movie_details, parse_movie_details
+from omdb_cache import OmdbCache
+
+
+def read_entries(file_path):
+    """
+    Reads titles or IMDb IDs to import, one per line.
+    Blank lines and lines starting with '#' are ignored.
+    Args:
+        file_path (str): Path to the list of titles.
+    Returns:
+        list: The entries in file order, without duplicates.
+    """
+    entries = {}
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            entry = line.strip()
+            if entry and not entry.startswith("#"):
+                entries[entry] = None
+    return list(entries)
+
+
+class BulkImporter:
+    def __init__(self, storage, max_workers=8, api_url=API_URL, session=None, cache=None):
+        """
+        Initializes the importer.
+        Args:
+            storage (IStorage): Storage the imported movies are added to.
+            max_workers (int): Maximum number of concurrent OMDb requests.
+            api_url (str): Base URL of the OMDb API.
+            session (requests.Session): Optional session; by default one is created
+                with a connection pool sized to max_workers.
+            cache (OmdbCache): Optional response cache, so retried imports skip the API.
+        """
+        self._storage = storage
+        self.max_workers = max_workers
+        self.api_url = api_url
+        self._cache = cache
+        if session is None:
+            import requests  # Deferred so importing this module (e.g. for IMDB_ID_PATTERN) stays cheap
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self._session = session
+
+    def _lookup(self, entry):
+        """
+        Fetches one entry from OMDb.
+        Returns:
+            tuple: (entry, details, error); details is None when the lookup failed.
+        """
+        import requests
+
+        imdb_id = entry if IMDB_ID_PATTERN.match(entry) else None
+        try:
+            data = request_movie_details(entry, imdb_id, self._session, self.api_url, self._cache)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return entry, None, str(e)
+        if data.get("Response") == "False":
+            return entry, None, data.get("Error", "Movie not found!")
+        return entry, data, None
+
+    def run(self, entries):
+        """
+        Fetches all entries concurrently and adds the found movies in one batched write.
+        Entries already in the storage are skipped without an OMDb request.
+        Args:
+            entries (list): Titles or IMDb IDs to import.
+        Returns:
+            dict: Report with counts, per-entry failures, elapsed time and throughput.
+        """
+        started = time.perf_counter()
+        skipped = []
+        to_fetch = []
+        for entry in entries:
+            # IMDb IDs are checked against the stored IDs, titles against stored spellings
+            imdb_id = entry if IMDB_ID_PATTERN.match(entry) else None
+            (skipped if self._storage.find_duplicate(entry, imdb_id) is not None else to_fetch).append(entry)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._lookup, to_fetch))
+
+        imported = []
+        failed = {}
+        with self._storage.batch():
+            for entry, details, error in results:
+                if details is None:
+                    failed[entry] = error
+                    continue
+                # IMDb IDs are stored under the title OMDb reports for them
+                title = details.get("Title", entry) if IMDB_ID_PATTERN.match(entry) else entry
+                if self._storage.find_duplicate(title, details.get("imdbID")) is not None:
+                    skipped.append(entry)
+                    continue
+                self._storage.add_movie(title, *parse_movie_details(details))
+                imported.append(title)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            "requested": len(entries),
+            "imported": len(imported),
+            "skipped": len(skipped),
+            "failed": failed,
+            "elapsed": elapsed,
+            "per_second": len(to_fetch) / elapsed if elapsed else 0.0,
+        }
+        if self._cache is not None:
+            report["cache"] = self._cache.stats()
+        return report
+
+
+def print_report(report):
+    """
+    Prints a bulk import report.
+    """
+    print(f"Imported {report['imported']} of {report['requested']} movies "
+          f"({report['skipped']} already stored, {len(report['failed'])} failed) "
+          f"in {report['elapsed']:.2f}s, {report['per_second']:.1f} lookups/s.")
+    if "cache" in report:
+        print(f"OMDb cache: {report['cache']['hits']} hits, {report['cache']['misses']} misses.")
+    for entry, error in report["failed"].items():
+        print(f"  {entry}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import many movies from OMDb at once.")
+    parser.add_argument("file", help="File with one title or IMDb ID per line")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), default="json")
+    parser.add_argument("--path", help="Storage file, defaults to the backend's usual file")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent OMDb requests")
+    parser.add_argument("--cache", default="omdb_cache.db", help="OMDb response cache file")
+    args = parser.parse_args()
+
+    importer = BulkImporter(create_storage(args.storage, args.path), max_workers=args.workers,
+                            cache=OmdbCache(args.cache))
+    print_report(importer.run(read_entries(args.file)))
+
+
+if __name__ == "__main__":
+    main()
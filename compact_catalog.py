@@ -0,0 +1,206 @@
+import re
+from array import array
+from collections.abc import MutableMapping
+
+IMDB_ID_PATTERN = re.compile(r"tt(\d{1,9})")
+YEAR_RANGE = (-2 ** 31, 2 ** 31 - 1)  # What the 'i' year column holds
+MAX_TENTHS = 2 ** 16 - 1  # What the 'H' rating column holds, in tenths
+
+
+def _year(value):
+    """
+    Converts a year for the year column.
+    Raises:
+        ValueError: If it isn't a number or doesn't fit the column.
+    """
+    year = int(value)
+    if not YEAR_RANGE[0] <= year <= YEAR_RANGE[1]:
+        raise ValueError(f"year out of range: {value}")
+    return year
+
+
+def _tenths(value):
+    """
+    Converts a rating to the tenths kept in the rating column.
+    Raises:
+        ValueError: If it isn't a number or doesn't fit the column.
+    """
+    tenths = int(round(float(value) * 10))
+    if not 0 <= tenths <= MAX_TENTHS:
+        raise ValueError(f"rating out of range: {value}")
+    return tenths
+
+
+class MovieRecord(MutableMapping):
+    __slots__ = ("_catalog", "_slot")
+
+    def __init__(self, catalog, slot):
+        """
+        A dict-like view of one movie stored in a CompactCatalog.
+        Only valid while the movie stays in the catalog.
+        """
+        self._catalog = catalog
+        self._slot = slot
+
+    def __getitem__(self, key):
+        return self._catalog._get_field(self._slot, key)
+
+    def __setitem__(self, key, value):
+        self._catalog._set_field(self._slot, key, value)
+
+    def __delitem__(self, key):
+        if key != 'notes' or self._slot not in self._catalog._notes:
+            raise KeyError(key)
+        del self._catalog._notes[self._slot]
+
+    def __iter__(self):
+        yield from ('year', 'rating', 'poster', 'imdb_id')
+        if self._slot in self._catalog._notes:
+            yield 'notes'
+
+    def __len__(self):
+        return 5 if self._slot in self._catalog._notes else 4
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CompactCatalog(MutableMapping):
+    def __init__(self, movies=None):
+        """
+        Initializes a memory-compact movie catalog that behaves like the usual
+        {title: {'year': ..., 'rating': ..., ...}} dictionary.
+        Instead of one dict per movie, the fields live in typed column arrays indexed
+        by a slot number: years as 32-bit ints, ratings in tenths, IMDb IDs as their
+        numeric part and posters split into a pooled URL prefix plus the rest.
+        Reading a movie returns a MovieRecord view over its slot.
+        Args:
+            movies (dict): Optional catalog to copy in.
+        """
+        self._slots = {}  # Title -> slot
+        self._titles = []  # Slot -> title, None for a free slot
+        self._free = []
+        self._years = array('i')
+        self._ratings = array('H')  # Rating in tenths
+        self._prefix_ids = array('I')
+        self._prefixes = []
+        self._prefix_lookup = {}
+        self._poster_rests = []
+        self._imdb_numbers = array('L')
+        self._imdb_widths = array('B')  # Digits of a tt-ID, 0 if the ID is kept in _imdb_other
+        self._imdb_other = {}
+        self._notes = {}  # Slot -> list of notes, only for movies that have any
+        if movies:
+            for title, info in movies.items():
+                self[title] = info
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __contains__(self, title):
+        return title in self._slots
+
+    def __getitem__(self, title):
+        return MovieRecord(self, self._slots[title])
+
+    def __setitem__(self, title, info):
+        if isinstance(info, MovieRecord):
+            info = dict(info)
+        # Checked before a slot is taken, so a bad movie leaves the catalog as it was
+        year, tenths = _year(info.get('year', 0)), _tenths(info.get('rating', 0))
+        slot = self._slots.get(title)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._titles[slot] = title
+            else:
+                slot = len(self._titles)
+                self._titles.append(title)
+                self._years.append(0)
+                self._ratings.append(0)
+                self._prefix_ids.append(0)
+                self._poster_rests.append("")
+                self._imdb_numbers.append(0)
+                self._imdb_widths.append(0)
+            self._slots[title] = slot
+        # Every column is set, so a reused slot keeps nothing of its previous movie
+        self._years[slot] = year
+        self._ratings[slot] = tenths
+        self._notes.pop(slot, None)
+        self._imdb_other.pop(slot, None)
+        for key in ('poster', 'imdb_id', 'notes'):
+            if key in info:
+                self._set_field(slot, key, info[key])
+            elif key == 'poster' or key == 'imdb_id':
+                self._set_field(slot, key, 'N/A')
+
+    def __delitem__(self, title):
+        slot = self._slots.pop(title)
+        self._titles[slot] = None
+        self._notes.pop(slot, None)
+        self._imdb_other.pop(slot, None)
+        self._poster_rests[slot] = ""
+        self._free.append(slot)
+
+    def pop(self, title, *default):
+        """
+        Removes a movie and returns its details as a plain dict, since a
+        MovieRecord view does not outlive its slot.
+        """
+        if title not in self._slots:
+            if default:
+                return default[0]
+            raise KeyError(title)
+        info = dict(self[title])
+        del self[title]
+        return info
+
+    def __repr__(self):
+        return f"CompactCatalog({len(self)} movies)"
+
+    def _get_field(self, slot, key):
+        if key == 'year':
+            return self._years[slot]
+        if key == 'rating':
+            return self._ratings[slot] / 10
+        if key == 'poster':
+            return self._prefixes[self._prefix_ids[slot]] + self._poster_rests[slot]
+        if key == 'imdb_id':
+            width = self._imdb_widths[slot]
+            if width:
+                return f"tt{self._imdb_numbers[slot]:0{width}d}"
+            return self._imdb_other[slot]
+        if key == 'notes' and slot in self._notes:
+            return self._notes[slot]
+        raise KeyError(key)
+
+    def _set_field(self, slot, key, value):
+        if key == 'year':
+            self._years[slot] = _year(value)
+        elif key == 'rating':
+            self._ratings[slot] = _tenths(value)
+        elif key == 'poster':
+            prefix, _, rest = value.rpartition("/")
+            prefix = f"{prefix}/" if _ else ""
+            prefix_id = self._prefix_lookup.get(prefix)
+            if prefix_id is None:
+                prefix_id = self._prefix_lookup[prefix] = len(self._prefixes)
+                self._prefixes.append(prefix)
+            self._prefix_ids[slot] = prefix_id
+            self._poster_rests[slot] = rest
+        elif key == 'imdb_id':
+            match = IMDB_ID_PATTERN.fullmatch(value)
+            if match:
+                self._imdb_numbers[slot] = int(match.group(1))
+                self._imdb_widths[slot] = len(match.group(1))
+                self._imdb_other.pop(slot, None)
+            else:
+                self._imdb_widths[slot] = 0
+                self._imdb_other[slot] = value
+        elif key == 'notes':
+            self._notes[slot] = value
+        else:
+            raise KeyError(key)
@@ -0,0 +1,386 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+
+from file_lock import atomic_write
+from storage_binary import BinaryCatalog, write_catalog
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_sharded import MANIFEST_NAME, DIRECTORY_NAME, StorageSharded, _read_shard
+from storage_sqlite import SCHEMA
+
+FORMATS = ("json", "csv", "sqlite", "binary", "sharded")
+EXTENSIONS = {".json": "json", ".csv": "csv", ".db": "sqlite", ".sqlite": "sqlite", ".bin": "binary"}
+CHUNK_SIZE = 1 << 20
+MAX_RECORD_SIZE = 1 << 20  # A JSON value still undecodable with this much text after it is malformed
+# Where the next movie starts in a JSON catalog: a key whose value is an object (a movie's
+# fields are never objects themselves)
+RECORD_START = re.compile(r',\s*"(?:[^"\\]|\\.)*"\s*:\s*\{')
+RESYNC_OVERLAP = 4096
+
+
+def guess_format(path):
+    """
+    Guesses a catalog's format from its path: a directory, or a path without
+    an extension, is a sharded catalog; otherwise the file extension decides.
+    Returns:
+        str or None: One of FORMATS, or None if it can't be told.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if os.path.isdir(path) or not extension:
+        return "sharded"
+    return EXTENSIONS.get(extension)
+
+
+def normalize(details):
+    """
+    Brings a record from any format into the stored shape.
+    Raises:
+        ValueError: If the record can't be used.
+    """
+    if not isinstance(details, dict):
+        raise ValueError("record is not an object")
+    movie = {
+        "year": int(details.get("year") or 0),
+        "rating": float(details.get("rating") or 0),
+        "poster": details.get("poster") or "N/A",
+        "imdb_id": details.get("imdb_id") or "N/A",
+    }
+    notes = details.get("notes")
+    if notes:
+        if not isinstance(notes, list):
+            raise ValueError("notes are not a list")
+        movie["notes"] = [str(note) for note in notes]
+    return movie
+
+
+def read_json(path, errors):
+    """
+    Streams (title, details) pairs out of a JSON catalog without loading it,
+    decoding one movie at a time from a sliding buffer with raw_decode.
+    A malformed movie is reported and skipped: reading resumes at the next
+    top-level `, "title": {`, or stops if there is none.
+    Args:
+        path (str): The JSON file.
+        errors (list): Problems found are appended here.
+    Raises:
+        ValueError: If the file doesn't hold a JSON object.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as file:
+        buffer = ""
+        position = 0
+        end_of_file = False
+
+        def fill():
+            nonlocal buffer, position, end_of_file
+            chunk = file.read(CHUNK_SIZE)
+            end_of_file = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer) or end_of_file:
+                    return
+                fill()
+
+        def expect(characters):
+            skip_whitespace()
+            if position >= len(buffer) or buffer[position] not in characters:
+                found = buffer[position] if position < len(buffer) else "end of file"
+                raise ValueError(f"expected {' or '.join(map(repr, characters))} but found {found!r}")
+            return buffer[position]
+
+        def decode():
+            nonlocal position
+            skip_whitespace()
+            while True:
+                try:
+                    value, position = decoder.raw_decode(buffer, position)
+                    return value
+                except json.JSONDecodeError:
+                    # Only a value cut off by the end of the buffer is worth reading more for
+                    if end_of_file or len(buffer) - position > MAX_RECORD_SIZE:
+                        raise
+                    fill()
+
+        def resync():
+            nonlocal position
+            while True:
+                match = RECORD_START.search(buffer, position)
+                if match is not None:
+                    position = match.start() + 1
+                    return True
+                if end_of_file:
+                    return False
+                position = max(position, len(buffer) - RESYNC_OVERLAP)
+                fill()
+
+        fill()
+        expect("{")
+        position += 1
+        if expect('}"') == "}":
+            return
+        count = 0
+        while True:
+            try:
+                title = decode()
+                expect(":")
+                position += 1
+                details = decode()
+            except ValueError as e:
+                errors.append(f"record {count + 1}: unreadable JSON ({e})")
+                if not resync():
+                    return
+                continue
+            count += 1
+            yield title, details
+            try:
+                separator = expect(",}")
+            except ValueError as e:
+                errors.append(f"after {title}: unreadable JSON ({e})")
+                if not resync():
+                    return
+                continue
+            if separator == "}":
+                return
+            position += 1
+
+
+def read_csv(path, errors):
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        for number, row in enumerate(csv.DictReader(file), 2):
+            if not row.get("title"):
+                errors.append(f"line {number}: no title")
+                continue
+            try:
+                yield row["title"], StorageCsv._decode_row(row)
+            except ValueError as e:
+                errors.append(f"line {number} ({row['title']}): {e}")
+
+
+def read_sqlite(path, errors):
+    connection = sqlite3.connect(path)
+    try:
+        # Notes come along in the same ordered scan, so nothing is collected per movie up front
+        rows = connection.execute(
+            "SELECT movies.id, title, year, rating, poster, imdb_id, note FROM movies "
+            "LEFT JOIN notes ON notes.movie_id = movies.id ORDER BY movies.id, notes.id")
+        current_id, title, details = None, None, None
+        for movie_id, row_title, year, rating, poster, imdb_id, note in rows:
+            if movie_id != current_id:
+                if current_id is not None:
+                    yield title, details
+                current_id, title = movie_id, row_title
+                details = {"year": year, "rating": rating, "poster": poster, "imdb_id": imdb_id}
+            if note is not None:
+                details.setdefault("notes", []).append(note)
+        if current_id is not None:
+            yield title, details
+    finally:
+        connection.close()
+
+
+def read_binary(path, errors):
+    catalog = BinaryCatalog(path)
+    try:
+        yield from catalog.items()
+    finally:
+        catalog.close()
+
+
+def read_sharded(path, errors):
+    storage = StorageSharded(path)
+    for name in storage.shard_names():
+        # One shard in memory at a time
+        yield from _read_shard(storage._shard_path(name)).items()
+
+
+READERS = {"json": read_json, "csv": read_csv, "sqlite": read_sqlite, "binary": read_binary,
+           "sharded": read_sharded}
+
+
+class _Records:
+    """
+    Presents a one-pass stream of (title, details) pairs as the items() of a
+    mapping, for the storages' streaming writers.
+    """
+    def __init__(self, records):
+        self._records = records
+
+    def items(self):
+        return self._records
+
+
+def write_json(path, records, options):
+    atomic_write(path, lambda file: StorageJson._dump(_Records(records), file))
+
+
+def write_csv(path, records, options):
+    atomic_write(path, lambda file: StorageCsv._write_rows(file, _Records(records)), newline="", encoding="utf-8")
+
+
+def write_binary(path, records, options):
+    write_catalog(path, _Records(records))
+
+
+def write_sqlite(path, records, options):
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(SCHEMA)
+        for title, details in records:
+            cursor = connection.execute(
+                "INSERT INTO movies (title, year, rating, poster, imdb_id) VALUES (?, ?, ?, ?, ?)",
+                (title, details["year"], details["rating"], details["poster"], details["imdb_id"]))
+            connection.executemany("INSERT INTO notes (movie_id, note) VALUES (?, ?)",
+                                   [(cursor.lastrowid, note) for note in details.get("notes", [])])
+        connection.commit()
+    except BaseException:
+        connection.close()
+        os.remove(temp_path)
+        raise
+    connection.close()
+    os.replace(temp_path, path)
+
+
+def write_sharded(path, records, options):
+    """
+    Streams records into shard files, keeping one open file per shard. The shard
+    files replace the old ones only once every record was written; on failure
+    the partial files are deleted.
+    """
+    os.makedirs(path, exist_ok=True)
+    layout = StorageSharded(path)
+    # A fresh layout, even if the directory held a sharded catalog before
+    layout.manifest.update(shards=options.get("shards", 16), partition=options.get("partition", "hash"), counts={})
+    files = {}
+    titles = {}
+    try:
+        for title, details in records:
+            shard = layout._shard_for(title, details["year"])
+            file = files.get(shard)
+            if file is None:
+                file = files[shard] = open(f"{layout._shard_path(shard)}.tmp", "w", encoding="utf-8")
+                file.write("{")
+            count = layout.manifest["counts"].get(shard, 0)
+            file.write(("\n    " if not count else ",\n    ") + json.dumps(title) + ": "
+                       + json.dumps(details, indent=4).replace("\n", "\n    "))
+            layout.manifest["counts"][shard] = count + 1
+            if layout.manifest["partition"] == "year":
+                titles[title] = shard
+    except BaseException:
+        for shard, file in files.items():
+            file.close()
+            os.remove(f"{layout._shard_path(shard)}.tmp")
+        raise
+    for file in files.values():
+        file.write("\n}")
+        file.close()
+    for shard in files:
+        os.replace(f"{layout._shard_path(shard)}.tmp", layout._shard_path(shard))
+    if layout.manifest["partition"] == "year":
+        atomic_write(os.path.join(path, DIRECTORY_NAME), lambda file: json.dump(titles, file), encoding="utf-8")
+    atomic_write(os.path.join(path, MANIFEST_NAME), lambda file: json.dump(layout.manifest, file, indent=4),
+                 encoding="utf-8")
+
+
+WRITERS = {"json": write_json, "csv": write_csv, "sqlite": write_sqlite, "binary": write_binary,
+           "sharded": write_sharded}
+
+
+def convert(source, target, source_format=None, target_format=None, **options):
+    """
+    Converts a catalog between storage formats one record at a time, so memory
+    stays bounded by a record (plus a set of titles to catch duplicates, and the
+    binary format's fixed-size columns) rather than by the catalog.
+    Records that can't be read, and repeated titles, are skipped and reported.
+    Args:
+        source (str): Catalog to read.
+        target (str): Catalog to write; replaced atomically.
+        source_format (str): One of FORMATS, guessed from the path if omitted.
+        target_format (str): One of FORMATS, guessed from the path if omitted.
+        options: shards and partition for a sharded target.
+    Returns:
+        dict: Report with rows read, written and skipped, the skip reasons,
+        elapsed time and throughput.
+    """
+    source_format = source_format or guess_format(source)
+    target_format = target_format or guess_format(target)
+    for path, file_format in ((source, source_format), (target, target_format)):
+        if file_format not in FORMATS:
+            raise ValueError(f"Can't tell the format of '{path}', expected one of {', '.join(FORMATS)}")
+
+    errors = []
+    report = {"read": 0, "written": 0, "skipped": 0}
+    seen = set()
+
+    def records():
+        for title, details in READERS[source_format](source, errors):
+            try:
+                movie = normalize(details)
+            except (TypeError, ValueError) as e:
+                errors.append(f"{title}: {e}")
+                continue
+            if not isinstance(title, str) or not title:
+                errors.append(f"{title!r}: invalid title")
+                continue
+            if title in seen:
+                errors.append(f"{title}: duplicate title")
+                continue
+            seen.add(title)
+            report["written"] += 1
+            yield title, movie
+
+    started = time.perf_counter()
+    WRITERS[target_format](target, records(), options)
+    elapsed = time.perf_counter() - started
+
+    report["skipped"] = len(errors)
+    report["read"] = report["written"] + report["skipped"]
+    report["errors"] = errors
+    report["elapsed"] = elapsed
+    report["per_second"] = report["read"] / elapsed if elapsed else 0.0
+    source_bytes = sum(os.path.getsize(os.path.join(source, name)) for name in os.listdir(source)) \
+        if os.path.isdir(source) else os.path.getsize(source)
+    report["megabytes_per_second"] = source_bytes / 2 ** 20 / elapsed if elapsed else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a movie catalog between storage formats, streaming.")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--from", dest="source_format", choices=FORMATS, help="Guessed from the source path")
+    parser.add_argument("--to", dest="target_format", choices=FORMATS, help="Guessed from the target path")
+    parser.add_argument("--shards", type=int, default=16, help="Shards of a sharded target")
+    parser.add_argument("--partition", choices=("hash", "year"), default="hash", help="Layout of a sharded target")
+    args = parser.parse_args()
+
+    try:
+        report = convert(args.source, args.target, args.source_format, args.target_format,
+                         shards=args.shards, partition=args.partition)
+    except (ValueError, IOError, OSError, sqlite3.Error) as e:
+        print(f"Conversion failed: {e}")
+        return
+    print(f"Converted {report['written']} of {report['read']} records ({report['skipped']} skipped) "
+          f"in {report['elapsed']:.2f}s: {report['per_second']:.0f} records/s, "
+          f"{report['megabytes_per_second']:.1f} MB/s.")
+    for error in report["errors"][:20]:
+        print(f"  skipped {error}")
+    if len(report["errors"]) > 20:
+        print(f"  ... and {len(report['errors']) - 20} more")
+
+
+if __name__ == "__main__":
+    main()
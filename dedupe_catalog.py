@@ -0,0 +1,116 @@
+import argparse
+import io
+from contextlib import redirect_stdout
+
+from identity_index import IdentityIndex, valid_imdb_id
+from main import STORAGE_BACKENDS, create_storage
+
+
+def merge_details(kept, duplicate):
+    """
+    Combines a kept movie with a duplicate of it: fields the kept entry lacks
+    (year 0, rating 0, "N/A" poster or IMDb ID) are taken from the duplicate,
+    and the duplicate's notes are appended unless the kept entry has them already.
+    Returns:
+        dict: The merged details; the arguments are left unchanged.
+    """
+    merged = dict(kept)
+    for field, missing in (("year", 0), ("rating", 0), ("poster", "N/A")):
+        if merged.get(field, missing) in (missing, None):
+            merged[field] = duplicate.get(field, missing)
+    if not valid_imdb_id(merged.get("imdb_id")) and valid_imdb_id(duplicate.get("imdb_id")):
+        merged["imdb_id"] = duplicate["imdb_id"]
+    notes = list(merged.get("notes", []))
+    notes.extend(note for note in duplicate.get("notes", []) if note not in notes)
+    if notes:
+        merged["notes"] = notes
+    return merged
+
+
+def plan_dedupe(movies):
+    """
+    Groups duplicate entries in one pass over the catalog: every movie is looked
+    up among the movies kept so far by IMDb ID and normalized title, and the first
+    of each group is kept, with the details of the others merged into it.
+    Args:
+        movies (dict): The catalog.
+    Returns:
+        dict: Kept title -> (merged details, list of duplicate titles), for the
+        groups that have duplicates.
+    """
+    kept = IdentityIndex({})
+    merged = {}  # Kept title -> details merged so far
+    groups = {}
+    for title, details in movies.items():
+        keeper = kept.find(title, details.get("imdb_id"))
+        if keeper is None:
+            kept.on_change(title, None, details)
+            merged[title] = details
+            continue
+        old = merged[keeper]
+        merged[keeper] = merge_details(old, details)
+        # The keeper may just have gained an IMDb ID that later duplicates will match on
+        kept.on_change(keeper, old, merged[keeper])
+        groups.setdefault(keeper, []).append(title)
+    return {keeper: (merged[keeper], duplicates) for keeper, duplicates in groups.items()}
+
+
+def dedupe(storage, dry_run=False):
+    """
+    Removes duplicate movies from a storage, merging their notes and missing
+    details into the entry that is kept. All changes are saved in one batch.
+    Args:
+        storage (IStorage): The storage to clean up.
+        dry_run (bool): Only report what would change.
+    Returns:
+        dict: Report with the movies checked, the groups found (kept title ->
+        duplicate titles), and the counts of removed movies and merged notes.
+    """
+    movies = storage.list_movies()
+    plan = plan_dedupe(movies)
+    report = {
+        "checked": len(movies),
+        "groups": {keeper: duplicates for keeper, (_, duplicates) in plan.items()},
+        "removed": sum(len(duplicates) for _, duplicates in plan.values()),
+        "notes_merged": 0,
+    }
+    for keeper, (details, _) in plan.items():
+        report["notes_merged"] += len(details.get("notes", [])) - len(movies[keeper].get("notes", []))
+    if dry_run:
+        return report
+
+    # The storages print a line per change, which would drown out the report
+    with redirect_stdout(io.StringIO()), storage.batch():
+        for keeper, (details, duplicates) in plan.items():
+            for title in duplicates:
+                storage.delete_movie(title)
+            current = storage.get_movie(keeper)
+            new_notes = details.get("notes", [])[len(current.get("notes", [])):]
+            if any(details.get(field) != current.get(field) for field in ("year", "rating", "poster", "imdb_id")):
+                # The storages only update notes and ratings in place, so other fields mean re-adding
+                storage.delete_movie(keeper)
+                storage.add_movie(keeper, details.get("year", 0), details.get("rating", 0),
+                                  details.get("poster", "N/A"), details.get("imdb_id", "N/A"))
+                new_notes = details.get("notes", [])
+            for note in new_notes:
+                storage.update_movie(keeper, note)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate movies (same IMDb ID or near-identical title).")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), default="json")
+    parser.add_argument("--path", help="Storage file, defaults to the backend's usual file")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the duplicates")
+    args = parser.parse_args()
+
+    report = dedupe(create_storage(args.storage, args.path), dry_run=args.dry_run)
+    action = "Would remove" if args.dry_run else "Removed"
+    print(f"Checked {report['checked']} movies. {action} {report['removed']} duplicates "
+          f"in {len(report['groups'])} groups, merging {report['notes_merged']} notes.")
+    for keeper, duplicates in report["groups"].items():
+        print(f"  {keeper} <- {', '.join(duplicates)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOmdbServer:
+    def __init__(self, movies, files=None):
+        """
+        A local stand-in for the OMDb API, so imports and lookups can run offline.
+        Args:
+            movies (dict): OMDb style records keyed by title; each needs an "imdbID".
+            files (dict): Optional raw responses keyed by URL path, e.g. poster images.
+        """
+        self.movies = movies
+        self.files = files or {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """
+        Base URL of the running server.
+        """
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                parsed = urlparse(self.path)
+                if parsed.path in server.files:
+                    self._send(200, server.files[parsed.path], "application/octet-stream")
+                    return
+                self._send(200, json.dumps(server.lookup(parse_qs(parsed.query))).encode(), "application/json")
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def lookup(self, query):
+        """
+        Answers an OMDb query given as parsed query string parameters.
+        """
+        if "i" in query:
+            for title, movie in self.movies.items():
+                if movie["imdbID"] == query["i"][0]:
+                    return dict(movie, Title=title, Response="True")
+        elif "t" in query:
+            wanted = query["t"][0].lower()
+            for title, movie in self.movies.items():
+                if title.lower() == wanted:
+                    return dict(movie, Title=title, Response="True")
+        return {"Response": "False", "Error": "Movie not found!"}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def file_generation(file_path):
+    """
+    Returns a cheap fingerprint of a file's current version: one stat call.
+    An atomic rename always changes the inode, so a replaced file is noticed
+    even if its size and modification time happen to match.
+    Returns:
+        tuple or None: (inode, mtime in ns, size), or None if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def atomic_write(file_path, write, mode="w", **open_kwargs):
+    """
+    Writes a file through a temporary file that is synced and renamed over it,
+    so readers and crashes only ever see the old or the new content. If write
+    raises, the temporary file is removed and the old file is left as it was.
+    Args:
+        file_path (str): File to replace.
+        write (callable): Called with the open temporary file.
+        mode (str): "w" or "wb".
+        open_kwargs: Passed on to open(), e.g. newline and encoding.
+    """
+    temp_path = f"{file_path}.tmp"
+    try:
+        with open(temp_path, mode, **open_kwargs) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        # Don't leave a partial file behind
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    os.replace(temp_path, file_path)
+
+
+def move_aside(file_path):
+    """
+    Renames an unreadable file out of the way so it isn't overwritten.
+    Returns:
+        str: The new path.
+    """
+    corrupt_path = f"{file_path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+    os.replace(file_path, corrupt_path)
+    return corrupt_path
+
+
+class FileLock:
+    def __init__(self, file_path):
+        """
+        Initializes an advisory lock guarding a data file, held on "<file>.lock"
+        because atomic renames replace the data file itself.
+        The lock is re-entrant within the process: nested and concurrent use from
+        threads of the same storage is serialized by a thread lock, and only the
+        outermost acquisition takes the file lock.
+        Args:
+            file_path (str): The data file to guard.
+        """
+        self.lock_path = f"{file_path}.lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self, shared=False):
+        """
+        Blocks until the lock is held. Shared locks let readers in together;
+        Windows only has exclusive locks, so there every lock is exclusive.
+        """
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(self.lock_path, "a+")
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            except OSError:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def shared(self):
+        """
+        Returns a context manager holding the lock in shared mode, for reading.
+        """
+        return _Holder(self, True)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+class _Holder:
+    def __init__(self, lock, shared):
+        self._lock = lock
+        self._shared = shared
+
+    def __enter__(self):
+        self._lock.acquire(self._shared)
+        return self._lock
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+        return False
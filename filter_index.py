@@ -0,0 +1,92 @@
+from sorted_index import SortedList
+
+
+def _tenths(rating):
+    return int(round(float(rating) * 10))
+
+
+class FilterIndex:
+    def __init__(self, movies):
+        """
+        Initializes sorted indexes over release year and rating, plus the set of
+        movies with notes, for answering combined range filters. Register it as a
+        storage listener to keep it in sync.
+        Args:
+            movies (dict): The catalog to start from.
+        """
+        self._fields = {}  # Title -> (year, rating in tenths, has notes)
+        for title, info in movies.items():
+            self._fields[title] = (int(info['year']), _tenths(info['rating']), bool(info.get('notes')))
+        self._by_year = SortedList((year, title) for title, (year, _, _) in self._fields.items())
+        self._by_rating = SortedList((rating, title) for title, (_, rating, _) in self._fields.items())
+        self._with_notes = {title: None for title, (_, _, notes) in self._fields.items() if notes}
+
+    def __len__(self):
+        return len(self._fields)
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        Args:
+            title (str): The movie's title.
+            old (dict): Details before the change, None for an added movie.
+            new (dict): Details after the change, None for a deleted movie.
+        """
+        fields = self._fields.pop(title, None)
+        if fields is not None:
+            self._by_year.remove((fields[0], title))
+            self._by_rating.remove((fields[1], title))
+            self._with_notes.pop(title, None)
+        if new is not None:
+            year, rating, notes = self._fields[title] = \
+                (int(new['year']), _tenths(new['rating']), bool(new.get('notes')))
+            self._by_year.add((year, title))
+            self._by_rating.add((rating, title))
+            if notes:
+                self._with_notes[title] = None
+
+    @staticmethod
+    def _span(index, low, high):
+        """
+        Returns the positions [start, stop) of the keys between low and high, both
+        inclusive, in an index of (value, title) pairs. None leaves a side open.
+        """
+        start = 0 if low is None else index.bisect_left((low,))
+        stop = len(index) if high is None else index.bisect_left((high + 1,))
+        return start, max(stop, start)
+
+    def filter(self, year_min=None, year_max=None, rating_min=None, rating_max=None, has_notes=None):
+        """
+        Lazily yields the titles matching every given condition; None means any.
+        The narrowest condition is walked in its index (the year or rating range,
+        or the movies with notes) and the others are checked per candidate, so
+        the cost follows the smallest candidate set, not the catalog size.
+        Titles come in the order of the index walked: by year, by rating
+        (lowest first) or in the order notes were first added.
+        Args:
+            year_min (int), year_max (int): Release year range, inclusive.
+            rating_min (float), rating_max (float): Rating range, inclusive.
+            has_notes (bool): Only movies with (True) or without (False) notes.
+        """
+        rating_low = None if rating_min is None else _tenths(rating_min)
+        rating_high = None if rating_max is None else _tenths(rating_max)
+        year_span = self._span(self._by_year, year_min, year_max)
+        rating_span = self._span(self._by_rating, rating_low, rating_high)
+
+        candidates = [
+            (year_span[1] - year_span[0], lambda: (title for _, title in self._by_year.islice(*year_span))),
+            (rating_span[1] - rating_span[0], lambda: (title for _, title in self._by_rating.islice(*rating_span))),
+        ]
+        if has_notes:
+            candidates.append((len(self._with_notes), lambda: iter(list(self._with_notes))))
+        _, walk = min(candidates, key=lambda candidate: candidate[0])
+
+        for title in walk():
+            year, rating, notes = self._fields[title]
+            if year_min is not None and year < year_min or year_max is not None and year > year_max:
+                continue
+            if rating_low is not None and rating < rating_low or rating_high is not None and rating > rating_high:
+                continue
+            if has_notes is not None and notes != has_notes:
+                continue
+            yield title
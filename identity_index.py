@@ -0,0 +1,114 @@
+import re
+import unicodedata
+
+IMDB_ID_PATTERN = re.compile(r"^tt\d{7,}$")
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_title(title):
+    """
+    Reduces a title to the form used to spot near-duplicates: case-folded, accents
+    removed, punctuation dropped and whitespace collapsed, so that
+    "Star Wars: Episode V:" and "star wars - episode v" compare equal.
+    Returns:
+        str: The normalized title; empty for a title without letters or digits.
+    """
+    decomposed = unicodedata.normalize("NFKD", title.casefold())
+    stripped = "".join(character for character in decomposed if not unicodedata.combining(character))
+    return NON_WORD_PATTERN.sub(" ", stripped).strip()
+
+
+def valid_imdb_id(imdb_id):
+    """
+    Tells real IMDb IDs apart from placeholders such as "N/A".
+    """
+    return isinstance(imdb_id, str) and bool(IMDB_ID_PATTERN.match(imdb_id))
+
+
+class IdentityIndex:
+    def __init__(self, movies):
+        """
+        Initializes secondary keys over the catalog: IMDb ID -> titles and
+        normalized title -> titles, for constant-time duplicate checks and IMDb
+        ID lookups. Register it as a storage listener to keep it in sync.
+        Args:
+            movies (dict): The catalog to start from.
+        """
+        self._keys = {}  # Title -> (IMDb ID or None, normalized title)
+        self._by_imdb_id = {}  # IMDb ID -> titles stored with it, in insertion order
+        self._by_normalized = {}  # Normalized title -> titles, in insertion order
+        for title, info in movies.items():
+            self._add(title, info)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def _imdb_key(details):
+        imdb_id = details.get('imdb_id')
+        return imdb_id if valid_imdb_id(imdb_id) else None
+
+    def _add(self, title, details):
+        imdb_id = self._imdb_key(details)
+        normalized = normalize_title(title)
+        self._keys[title] = (imdb_id, normalized)
+        if imdb_id is not None:
+            self._by_imdb_id.setdefault(imdb_id, {})[title] = None
+        self._by_normalized.setdefault(normalized, {})[title] = None
+
+    def _remove(self, title):
+        imdb_id, normalized = self._keys.pop(title)
+        for keys, key in ((self._by_imdb_id, imdb_id), (self._by_normalized, normalized)):
+            titles = keys.get(key)
+            if titles is not None:
+                titles.pop(title, None)
+                if not titles:
+                    del keys[key]
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        Args:
+            title (str): The movie's title.
+            old (dict): Details before the change, None for an added movie.
+            new (dict): Details after the change, None for a deleted movie.
+        """
+        keys = self._keys.get(title)
+        if keys is not None:
+            if new is not None and keys[0] == self._imdb_key(new):
+                return  # Notes and ratings don't change the keys
+            self._remove(title)
+        if new is not None:
+            self._add(title, new)
+
+    def by_imdb_id(self, imdb_id):
+        """
+        Returns the first title stored with an IMDb ID, or None.
+        """
+        titles = self._by_imdb_id.get(imdb_id)
+        return next(iter(titles)) if titles else None
+
+    def find(self, title, imdb_id=None):
+        """
+        Finds a stored movie that a new entry would duplicate: one with the same
+        IMDb ID, or else one whose title normalizes the same way, unless both
+        have IMDb IDs and they differ (remakes often share a title).
+        Args:
+            title (str): Title of the new entry.
+            imdb_id (str): Its IMDb ID, if known.
+        Returns:
+            str or None: The stored title, or None if the entry is new.
+        """
+        imdb_id = imdb_id if valid_imdb_id(imdb_id) else None
+        if imdb_id is not None:
+            found = self.by_imdb_id(imdb_id)
+            if found is not None:
+                return found
+        normalized = normalize_title(title)
+        if not normalized:
+            return None
+        for stored in self._by_normalized.get(normalized, ()):
+            stored_imdb_id = self._keys[stored][0]
+            if imdb_id is None or stored_imdb_id is None:
+                return stored
+        return None
@@ -1,7 +1,46 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import metrics
+from file_lock import file_generation
+from filter_index import FilterIndex
+from identity_index import IdentityIndex
+from movie_stats import MovieStats
+from rating_index import RatingIndex
+from recommender import RandomPicker, Recommender
+from title_index import TitleIndex
+
+# Operations timed per storage class while metrics are enabled
+TIMED_OPERATIONS = (
+    "read_storage", "write_storage", "_persist", "refresh", "list_movies", "add_movie", "delete_movie",
+    "update_movie", "update_rating", "count_movies", "get_movie", "get_movie_by_imdb_id", "find_duplicate",
+    "search_movies", "suggest_titles", "movies_sorted_by_rating", "filter_movies", "top_rated", "bottom_rated",
+    "movie_stats", "random_movie", "similar_movies",
+)
 
 
 class IStorage(ABC):
+    def __init__(self):
+        """
+        Initializes the bookkeeping shared by all storages.
+        """
+        self._batch_depth = 0
+        self._pending = {}  # Titles changed inside a batch, in first-change order
+        self._listeners = []
+        self._indexes = {}  # Derived structures kept in sync through listeners, by name
+        self._startup_cache = None  # StartupCache of storages that keep one
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Wraps each of the subclass's TIMED_OPERATIONS, inherited or its own, in a
+        timer labelled with the storage class. Disabled timers cost one attribute check.
+        """
+        super().__init_subclass__(**kwargs)
+        for name in TIMED_OPERATIONS:
+            method = getattr(cls, name)
+            method = getattr(method, "__wrapped__", method)  # Don't time twice in deeper subclasses
+            timed = metrics.METRICS.timed("storage_operation", storage=cls.__name__, operation=name.lstrip("_"))
+            setattr(cls, name, timed(method))
+
     @abstractmethod
     def list_movies(self):
         """
@@ -30,6 +69,13 @@ class IStorage(ABC):
         """
         pass
 
+    @abstractmethod
+    def update_rating(self, title, rating):
+        """
+        Replace a movie's rating, e.g. with a newer one from OMDb.
+        """
+        pass
+
     @abstractmethod
     def read_storage(self):
         """
@@ -43,3 +89,288 @@ class IStorage(ABC):
         Write data to the storage.
         """
         pass
+
+    def add_listener(self, listener):
+        """
+        Register an object whose on_change(title, old, new) is called after every
+        add, delete or update, with None for the missing side.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, title, old, new):
+        for listener in self._listeners:
+            listener.on_change(title, old, new)
+
+    def _notify_differences(self, old_movies, new_movies):
+        """
+        Tell listeners about every movie that differs between two versions of
+        the catalog, e.g. after reloading a file another process changed.
+        """
+        if not self._listeners:
+            return
+        for title, details in old_movies.items():
+            new = new_movies.get(title)
+            if new is None:
+                self._notify(title, details, None)
+            elif new != details:
+                self._notify(title, details, new)
+        for title, details in new_movies.items():
+            if title not in old_movies:
+                self._notify(title, None, details)
+
+    def refresh(self):
+        """
+        Reload the catalog if another process saved it since it was read.
+        Storages that always read through to their backing store have nothing to do.
+        Returns:
+            bool: True if the catalog was reloaded.
+        """
+        return False
+
+    def _merge_changes(self, titles):
+        """
+        Reload a catalog another process saved and re-apply this process's
+        changes to the given titles on top of it, so neither side's edits are lost.
+        Listeners were already told about those changes; the reload reports them
+        undone and re-applying them reports them again, so listeners end up in step.
+        Args:
+            titles (list): The titles this process changed since the last save.
+        """
+        movies = self.list_movies()
+        mine = {title: dict(movies[title]) if title in movies else None for title in titles}
+        self.refresh()
+        movies = self.list_movies()
+        for title, details in mine.items():
+            old = movies.get(title)
+            old = dict(old) if old is not None else None
+            if details is None:
+                if old is None:
+                    continue
+                del movies[title]
+            else:
+                movies[title] = details
+            self._notify(title, old, details)
+
+    def _drop_indexes(self):
+        """
+        Forget every attached index, e.g. after another process changed the
+        catalog behind this storage's back; they are rebuilt on next use.
+        """
+        indexes = self._indexes.values()
+        self._listeners = [listener for listener in self._listeners
+                           if not any(listener is index for index in indexes)]
+        self._indexes = {}
+
+    def _attach_index(self, name, factory):
+        """
+        Return the named index, building it from the catalog on first use and
+        keeping it up to date from then on.
+        Args:
+            name (str): Name the index is kept under.
+            factory (callable): Builds the index from the movie dictionary.
+        """
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = factory(self.list_movies())
+            self.add_listener(index)
+        return index
+
+    def _read_startup_cache(self, storage_label):
+        """
+        Load the catalog from the startup snapshot of a file storage. Falls back
+        to read_storage().
+        Args:
+            storage_label (str): The storage's label in the hit and miss metrics.
+        Returns:
+            dict: Dictionary of movies.
+        """
+        with self._lock.shared():
+            movies = self._startup_cache.load()
+            if movies is None:
+                metrics.increment("startup_cache_misses", storage=storage_label)
+                return self.read_storage()
+            self._generation = file_generation(self.file_path)
+        metrics.increment("startup_cache_hits", storage=storage_label)
+        return movies
+
+    def save_startup_cache(self):
+        """
+        Save the catalog to the startup cache, if the storage keeps one, so the
+        next start can skip parsing the file. Nothing is written while a batch
+        is open, or when the snapshot on disk is already up to date.
+        Returns:
+            bool: True if a snapshot was written.
+        """
+        if self._startup_cache is None or self._batch_depth:
+            return False
+        return self._startup_cache.save(self.list_movies(), self._generation)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group mutations so they are persisted together when the block exits,
+        instead of once per add, delete or update.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                titles = list(self._pending)
+                self._pending.clear()
+                self._persist(titles)
+
+    def _commit(self, title):
+        """
+        Persist a change to one title, or defer it while a batch is open.
+        """
+        if self._batch_depth:
+            self._pending[title] = None
+        else:
+            self._persist([title])
+
+    def _persist(self, titles):
+        """
+        Write changes to the given titles. Storages without incremental
+        writes simply write everything.
+        """
+        self.write_storage()
+
+    def count_movies(self):
+        """
+        Count the movies in the storage.
+        Returns:
+            int: Number of stored movies.
+        """
+        return len(self.list_movies())
+
+    def get_movie(self, title):
+        """
+        Look up a single movie by its title.
+        Returns:
+            dict or None: The movie's details, or None if it is not stored.
+        """
+        return self.list_movies().get(title)
+
+    def get_movie_by_imdb_id(self, imdb_id):
+        """
+        Look up a single movie by its IMDb ID, from a maintained secondary index.
+        Returns:
+            tuple or None: (title, details) of the movie, or None if it is not stored.
+        """
+        title = self._attach_index("identity", IdentityIndex).by_imdb_id(imdb_id)
+        return (title, self.get_movie(title)) if title is not None else None
+
+    def find_duplicate(self, title, imdb_id=None):
+        """
+        Find the stored movie a new entry would duplicate: the same title, the
+        same IMDb ID, or a title that only differs in case, accents, punctuation
+        or spacing (unless both have different IMDb IDs). Costs O(1) lookups.
+        Args:
+            title (str): Title of the new entry.
+            imdb_id (str): Its IMDb ID, if known.
+        Returns:
+            str or None: The stored title, or None if the entry is new.
+        """
+        if self.get_movie(title) is not None:
+            return title
+        return self._attach_index("identity", IdentityIndex).find(title, imdb_id)
+
+    def search_movies(self, term):
+        """
+        Find movies whose title contains the search term, ignoring case.
+        Served from a trigram index, so only titles sharing the term's trigrams are checked.
+        Returns:
+            list: (title, details) pairs of the matching movies.
+        """
+        movies = self.list_movies()
+        return [(title, movies[title]) for title in self._attach_index("titles", TitleIndex).search(term)]
+
+    def suggest_titles(self, term, limit=5):
+        """
+        Find the titles most similar to a possibly misspelled search term.
+        Returns:
+            list: (title, similarity) pairs, most similar first.
+        """
+        return self._attach_index("titles", TitleIndex).fuzzy(term, limit)
+
+    def movies_sorted_by_rating(self, start=0, stop=None):
+        """
+        List movies from the best to the worst rated, optionally only the ranks
+        [start, stop). Served from a maintained rating index, so a page of k
+        movies costs O(log n + k).
+        Returns:
+            iterator: (title, details) pairs ordered by descending rating.
+        """
+        movies = self.list_movies()
+        titles = self._attach_index("rating", RatingIndex).ranked(start, stop)
+        return ((title, movies[title]) for title in titles)
+
+    def filter_movies(self, year_min=None, year_max=None, rating_min=None, rating_max=None, has_notes=None):
+        """
+        Find movies by release year range, rating range and whether they have notes;
+        None leaves a condition out. Served from sorted year and rating indexes,
+        so the cost follows the number of candidates rather than the catalog size.
+        Returns:
+            iterator: Lazily produced (title, details) pairs of the matching movies.
+        """
+        movies = self.list_movies()
+        titles = self._attach_index("filter", FilterIndex).filter(year_min, year_max, rating_min, rating_max,
+                                                                  has_notes)
+        return ((title, movies[title]) for title in titles)
+
+    def top_rated(self, k):
+        """
+        Return the k best rated movies, best first.
+        Returns:
+            list: (title, details) pairs.
+        """
+        return list(self.movies_sorted_by_rating(0, k))
+
+    def bottom_rated(self, k):
+        """
+        Return the k worst rated movies, worst first.
+        Returns:
+            list: (title, details) pairs.
+        """
+        movies = self.list_movies()
+        return [(title, movies[title]) for title in self._attach_index("rating", RatingIndex).bottom(k)]
+
+    def movie_stats(self, year=None):
+        """
+        Calculate rating statistics over the stored movies, or over one release year.
+        The statistics are maintained incrementally, so this costs the same no
+        matter how large the catalog is.
+        Returns:
+            dict or None: Average and median rating plus the best and worst
+            (title, rating) pairs, or None if there are no movies.
+        """
+        return self._attach_index("stats", MovieStats).summary(year)
+
+    def random_movie(self, weighted=False):
+        """
+        Pick a random movie from the storage, from a maintained array of titles,
+        so a pick costs the same no matter how large the catalog is.
+        Args:
+            weighted (bool): Favour better rated movies, in proportion to their rating.
+        Returns:
+            tuple or None: (title, details) of the picked movie, or None if there are no movies.
+        """
+        picker = self._attach_index("random", RandomPicker)
+        title = picker.weighted() if weighted else picker.uniform()
+        if title is None:
+            return None
+        return title, self.list_movies()[title]
+
+    def similar_movies(self, title, k=5):
+        """
+        Find the k movies most like a stored movie, by release year, rating and
+        title words, from a feature matrix ranked in one vectorized pass.
+        Needs NumPy.
+        Returns:
+            list: (title, details) pairs, most similar first; empty if the title isn't stored.
+        """
+        movies = self.list_movies()
+        similar = self._attach_index("recommender", Recommender).similar(title, k)
+        return [(other, movies[other]) for other, _ in similar]
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import metrics
+
+
+class MovieJournal:
+    def __init__(self, file_path, max_entries=1000, max_ratio=0.5, background=True):
+        """
+        Initializes an append-only change log that sits next to a storage snapshot.
+        Every mutation is recorded as one JSON line, so a single edit costs one small
+        append instead of a full rewrite of the snapshot file.
+        Args:
+            file_path (str): Path to the journal file.
+            max_entries (int): Compact once the journal holds at least this many entries...
+            max_ratio (float): ...and the entries exceed this fraction of the catalog size.
+            background (bool): Run compaction in a background thread instead of inline.
+        """
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.max_ratio = max_ratio
+        self.background = background
+        self.entry_count = 0
+        self._lock = threading.Lock()
+        self._compaction = None
+
+    def replay(self, movie_list):
+        """
+        Applies every journal entry on top of a freshly loaded snapshot.
+        Entries are idempotent (full record puts and deletes), so replaying a journal
+        that was already folded into the snapshot is harmless. A torn last line,
+        left by a crash mid-append, is cut off so the next append starts on a
+        line of its own.
+        Args:
+            movie_list (dict): The snapshot to bring up to date, modified in place.
+        Returns:
+            int: Number of entries applied.
+        """
+        count = 0
+        complete = 0  # Length of the journal up to its last complete line
+        try:
+            with open(self.file_path, "rb") as file:
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break  # Torn by a crash mid-append, never acknowledged
+                    complete += len(line)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        print(f"Skipping corrupt entry in journal '{self.file_path}'.")
+                        continue
+                    self._apply(movie_list, entry)
+                    count += 1
+                torn = file.tell() > complete
+            metrics.count_file("file_bytes_read", self.file_path, storage="journal")
+            if torn:
+                print(f"Dropping a torn last entry from journal '{self.file_path}'.")
+                os.truncate(self.file_path, complete)
+        except FileNotFoundError:
+            pass
+        self.entry_count = count
+        return count
+
+    @staticmethod
+    def _apply(movie_list, entry):
+        if entry["op"] == "put":
+            movie_list[entry["title"]] = entry["movie"]
+        elif entry["op"] == "delete":
+            movie_list.pop(entry["title"], None)
+
+    def record(self, changes):
+        """
+        Appends the current state of the changed titles to the journal in one write.
+        Args:
+            changes (list): (title, movie) pairs; movie is None for a deleted title.
+        """
+        lines = []
+        for title, movie in changes:
+            if movie is None:
+                entry = {"op": "delete", "title": title}
+            else:
+                entry = {"op": "put", "title": title, "movie": _plain_movie(movie)}
+            lines.append(json.dumps(entry) + "\n")
+        if not lines:
+            return
+        text = "".join(lines)
+        with self._lock:
+            try:
+                with open(self.file_path, "a", encoding="utf-8") as file:
+                    file.write(text)
+                self.entry_count += len(lines)
+                metrics.increment("file_bytes_written", len(text.encode("utf-8")), storage="journal")
+            except IOError as e:
+                print(f"Error writing to journal file: {e}")
+
+    def needs_compaction(self, catalog_size):
+        """
+        Checks whether the journal has grown enough to be folded into a new snapshot.
+        Args:
+            catalog_size (int): Number of movies currently in the catalog.
+        Returns:
+            bool: True if a compaction should be started.
+        """
+        return (self.entry_count >= self.max_entries
+                and self.entry_count >= self.max_ratio * catalog_size)
+
+    def compact(self, movie_list, write_snapshot):
+        """
+        Writes a fresh snapshot of the catalog and drops the journal entries it covers.
+        Entries appended while the snapshot is being written are kept.
+        Args:
+            movie_list (dict): The current in-memory catalog.
+            write_snapshot (callable): Writes a catalog dict to the snapshot file.
+        """
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            snapshot = _copy_catalog(movie_list)
+            offset = self._size()
+            covered = self.entry_count
+            if self.background:
+                self._compaction = threading.Thread(
+                    target=self._finish_compaction, args=(snapshot, write_snapshot, offset, covered)
+                )
+                self._compaction.start()
+                return
+        self._finish_compaction(snapshot, write_snapshot, offset, covered)
+
+    def _finish_compaction(self, snapshot, write_snapshot, offset, covered):
+        if not write_snapshot(snapshot):
+            return
+        with self._lock:
+            try:
+                with open(self.file_path, "rb") as file:
+                    file.seek(offset)
+                    tail = file.read()
+                temp_path = f"{self.file_path}.tmp"
+                with open(temp_path, "wb") as file:
+                    file.write(tail)
+                os.replace(temp_path, self.file_path)
+                self.entry_count -= covered
+            except FileNotFoundError:
+                self.entry_count = 0
+            except IOError as e:
+                print(f"Error compacting journal file: {e}")
+
+    def reset(self):
+        """
+        Empties the journal after the snapshot was rewritten in full.
+        """
+        self.wait()
+        with self._lock:
+            try:
+                os.remove(self.file_path)
+            except FileNotFoundError:
+                pass
+            self.entry_count = 0
+
+    def wait(self):
+        """
+        Blocks until a running background compaction has finished.
+        """
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def _size(self):
+        try:
+            return os.path.getsize(self.file_path)
+        except OSError:
+            return 0
+
+
+def _copy_catalog(movie_list):
+    """
+    Copies the catalog deep enough that later in-place edits (notes) don't leak into it.
+    """
+    return {title: _plain_movie(info) for title, info in movie_list.items()}
+
+
+def _plain_movie(info):
+    """
+    Copies one movie into a plain dict with its own notes list, so views such as
+    a CompactCatalog's MovieRecord can be serialized and later edits don't leak in.
+    """
+    info = dict(info)
+    if "notes" in info:
+        info["notes"] = list(info["notes"])
+    return info
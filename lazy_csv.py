@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from file_lock import atomic_write
+from overlay_catalog import OverlayCatalog
+
+INDEX_VERSION = 2
+OFFSET_TYPECODE = "q"
+
+
+def index_path(file_path):
+    """
+    Returns the path of the offset index kept next to a CSV file.
+    """
+    return f"{file_path}.idx"
+
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def scan_offsets(data):
+    """
+    Scans CSV bytes once and maps every title to the byte range of its row.
+    Rows may span several lines when a quoted field holds a newline; a row ends
+    at the first line break with an even number of quotes before it.
+    Args:
+        data (bytes or mmap): The whole CSV file.
+    Returns:
+        tuple: (header fields, {title: (offset, length)}).
+    """
+    header_end = data.find(b"\n")
+    if header_end < 0:
+        return [], {}
+    header = next(csv.reader([data[:header_end].decode("utf-8").rstrip("\r")]))
+    title_column = header.index("title") if "title" in header else 0
+
+    offsets = {}
+    start = position = header_end + 1
+    quotes = 0
+    size = len(data)
+    while position < size:
+        end = data.find(b"\n", position)
+        if end < 0:
+            end = size - 1
+        quotes += data[position:end + 1].count(b'"')
+        position = end + 1
+        if quotes % 2:
+            continue
+        title = None
+        comma = data.find(b",", start, position)
+        if title_column == 0 and comma >= 0 and data[start:start + 1] != b'"':
+            # Fast path: an unquoted title in the first column ends at the first comma
+            title = data[start:comma].decode("utf-8")
+        else:
+            row = next(csv.reader(io.StringIO(data[start:position].decode("utf-8"))), None)
+            if row and len(row) > title_column:
+                title = row[title_column]
+        if title:
+            offsets[title] = (start, position - start)
+        start = position
+        quotes = 0
+    return header, offsets
+
+
+def save_index(file_path, header, offsets):
+    """
+    Persists the offset index next to the CSV file, stamped with its mtime and size.
+    The file holds no code, only data: a JSON line describing the index, a JSON
+    line with the titles, then their (offset, length) pairs as a binary array.
+    """
+    meta = {
+        "version": INDEX_VERSION,
+        "signature": list(_file_signature(file_path)),
+        "header": header,
+        "count": len(offsets),
+        "typecode": OFFSET_TYPECODE,
+        "byteorder": sys.byteorder,
+    }
+    ranges = array(OFFSET_TYPECODE)
+    for offset, length in offsets.values():
+        ranges.append(offset)
+        ranges.append(length)
+
+    def write(file):
+        file.write(json.dumps(meta).encode("utf-8") + b"\n")
+        file.write(json.dumps(list(offsets)).encode("utf-8") + b"\n")
+        ranges.tofile(file)
+
+    try:
+        atomic_write(index_path(file_path), write, mode="wb")
+    except (IOError, OSError) as e:
+        print(f"Error writing CSV index: {e}")
+
+
+def load_index(file_path):
+    """
+    Loads the persisted offset index if it still matches the CSV file. Anything
+    unexpected (another version, a changed file, ranges outside the file) makes
+    the index unusable rather than trusted.
+    Returns:
+        tuple or None: (header, offsets), or None if missing, stale or damaged.
+    """
+    try:
+        with open(index_path(file_path), "rb") as file:
+            meta = json.loads(file.readline())
+            if not isinstance(meta, dict) or meta.get("version") != INDEX_VERSION \
+                    or meta.get("signature") != list(_file_signature(file_path)) \
+                    or meta.get("typecode") != OFFSET_TYPECODE or meta.get("byteorder") != sys.byteorder:
+                return None
+            titles = json.loads(file.readline())
+            ranges = array(OFFSET_TYPECODE)
+            ranges.frombytes(file.read())
+    except (FileNotFoundError, ValueError, UnicodeDecodeError):
+        return None
+    count = meta.get("count")
+    header = meta.get("header")
+    if not isinstance(titles, list) or not isinstance(header, list) or len(titles) != count \
+            or len(ranges) != 2 * count:
+        return None
+    size = meta["signature"][1]
+    if count and (min(ranges) < 0 or max(offset + length for offset, length in zip(ranges[::2], ranges[1::2])) > size):
+        return None
+    return header, dict(zip(titles, zip(ranges[::2], ranges[1::2])))
+
+
+class LazyCsvCatalog(OverlayCatalog):
+    def __init__(self, file_path, decode, header=None, offsets=None):
+        """
+        Initializes a catalog over a memory-mapped CSV file that decodes rows on access.
+        The title -> byte offset index is loaded from the file next to the CSV if it
+        still matches its mtime and size, otherwise built with one scan and saved.
+        Args:
+            file_path (str): Path to the CSV file.
+            decode (callable): Turns a row dict into the movie's details.
+            header (list): Header of a freshly written file, with offsets.
+            offsets (dict): Index of a freshly written file, so it isn't scanned again.
+        """
+        super().__init__()
+        self.file_path = file_path
+        self._decode = decode
+        self._file = None
+        self._map = None
+        self._header, self._offsets = [], {}
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return
+
+        self._file = open(file_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if offsets is not None:
+            self._header, self._offsets = header, offsets
+            save_index(file_path, header, offsets)
+            return
+        index = load_index(file_path)
+        if index is None:
+            index = scan_offsets(self._map)
+            save_index(file_path, *index)
+        self._header, self._offsets = index
+
+    def _base_titles(self):
+        return iter(self._offsets)
+
+    def _base_contains(self, title):
+        return title in self._offsets
+
+    def _base_len(self):
+        return len(self._offsets)
+
+    def _base_get(self, title):
+        offset, length = self._offsets[title]
+        text = self._map[offset:offset + length].decode("utf-8")
+        values = next(csv.reader(io.StringIO(text)))
+        return self._decode(dict(zip(self._header, values)))
+
+    def close(self):
+        """
+        Unmaps the CSV file.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
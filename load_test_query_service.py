@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+from bench_compact_catalog import synthetic_movies
+from query_service import QueryService
+from storage_json import StorageJson
+
+# Request mix of the simulated tools
+TARGETS = [
+    "/movies?offset=0&limit=50",
+    "/search?q=movie 12",
+    "/search?q=synthetc",
+    "/sorted?start=0&limit=50",
+    "/sorted?start=1000&limit=50",
+    "/stats",
+    "/stats?year=1999",
+    "/random",
+]
+
+
+async def _request(reader, writer, host, target, etag=None):
+    """
+    Sends one GET over an open keep-alive connection.
+    Returns:
+        tuple: (status, ETag header or None).
+    """
+    headers = f"GET {target.replace(' ', '%20')} HTTP/1.1\r\nHost: {host}\r\n"
+    if etag:
+        headers += f"If-None-Match: {etag}\r\n"
+    writer.write((headers + "\r\n").encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, response_etag = 0, None
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        elif name.lower() == "etag":
+            response_etag = value.strip()
+    await reader.readexactly(length)
+    return status, response_etag
+
+
+async def _client(host, port, requests, revalidate, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    rng = random.Random()
+    for _ in range(requests):
+        target = rng.choice(TARGETS)
+        started = time.perf_counter()
+        status, etag = await _request(reader, writer, host, target, etags.get(target) if revalidate else None)
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+        if etag:
+            etags[target] = etag
+    writer.close()
+
+
+async def run_load(host, port, clients, requests, revalidate):
+    """
+    Runs concurrent keep-alive clients against a running service.
+    Returns:
+        dict: Request count, requests per second, latency percentiles and status counts.
+    """
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, requests, revalidate, latencies, statuses) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 2),
+        "latency_ms_p99": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "statuses": statuses,
+    }
+
+
+def start_service(storage):
+    """
+    Starts a QueryService on a free port in a background thread.
+    Returns:
+        tuple: (host, port).
+    """
+    bound = []
+    ready = threading.Event()
+
+    def serve():
+        asyncio.run(QueryService(storage).serve(port=0, ready=lambda address: bound.append(address) or ready.set()))
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return bound[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure QueryService throughput under concurrent clients.")
+    parser.add_argument("--host", help="Test an already running service instead of starting one")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--movies", type=int, default=10000, help="Size of the synthetic catalog to serve")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.host:
+            host, port = args.host, args.port
+        else:
+            storage = StorageJson(os.path.join(directory, "movies.json"))
+            with storage.batch(), redirect_stdout(io.StringIO()):
+                for title, details in synthetic_movies(args.movies):
+                    storage.add_movie(title, details["year"], details["rating"], details["poster"],
+                                      details["imdb_id"])
+            host, port = start_service(storage)
+
+        for revalidate in (False, True):
+            report = asyncio.run(run_load(host, port, args.clients, args.requests, revalidate))
+            label = "with If-None-Match" if revalidate else "plain"
+            print(f"{label:>19}: {report['requests']} requests in {report['seconds']}s, "
+                  f"{report['requests_per_second']} req/s, p50 {report['latency_ms_p50']} ms, "
+                  f"p99 {report['latency_ms_p99']} ms, statuses {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,147 @@
+import argparse
+import atexit
+import json
+import os
+import sys
+import metrics
+from batch_runner import BatchRunner
 from storage_json import StorageJson
 from storage_csv import StorageCsv
+from storage_sqlite import StorageSqlite
+from storage_binary import StorageBinary
+from storage_sharded import StorageSharded
 from movie_app import MovieApp
+from omdb_cache import OmdbCache
+from poster_mirror import PosterMirror
+
+STORAGE_BACKENDS = {
+    'json': (StorageJson, 'movies.json'),
+    'csv': (StorageCsv, 'movies.csv'),
+    'sqlite': (StorageSqlite, 'movies.db'),
+    'binary': (StorageBinary, 'movies.bin'),
+    'sharded': (StorageSharded, 'movies_shards'),
+}
+
+
+# Backends whose file parses slower than a snapshot of it loads, and so can start from one instead
+STARTUP_CACHE_BACKENDS = ('csv',)
+
+
+def create_storage(kind, file_path=None, startup_cache=False):
+    """
+    Creates a storage object of the given kind.
+    Args:
+        kind (str): One of the STORAGE_BACKENDS keys.
+        file_path (str): Optional path, defaults to the backend's usual file.
+        startup_cache (bool): For CSV, start from the snapshot saved next to the
+            file by the previous run, and save one on exit.
+    Returns:
+        IStorage: The storage object.
+    """
+    storage_class, default_path = STORAGE_BACKENDS[kind]
+    if startup_cache and kind in STARTUP_CACHE_BACKENDS:
+        storage = storage_class(file_path or default_path, startup_cache=True)
+        atexit.register(storage.save_startup_cache)
+        return storage
+    return storage_class(file_path or default_path)
+
+
+def create_view_counter(kind, file_path=None):
+    """
+    Opens the view counts kept with the rating refresh state next to a storage
+    file, and saves the views counted in this session on exit.
+    Returns:
+        RefreshState: The counter to pass to MovieApp.
+    """
+    from rating_refresh import RefreshState, state_path
+
+    views = RefreshState(state_path(file_path or STORAGE_BACKENDS[kind][1]))
+    atexit.register(views.save)
+    return views
+
+
+def create_poster_mirror(args):
+    """
+    Returns the local poster mirror the website links to, or None unless
+    --mirror-posters was given, in which case the site links to the OMDb URLs.
+    """
+    return PosterMirror('posters') if args.mirror_posters else None
+
+
+def enable_metrics_from_environment():
+    """
+    Turns on metrics if GETFLIX_METRICS names a file, and writes them there on
+    exit (JSON for a .json file, otherwise Prometheus text).
+    """
+    metrics_path = os.environ.get("GETFLIX_METRICS")
+    if metrics_path:
+        metrics.enable()
+        atexit.register(metrics.export, metrics_path)
+
+
+def run_script(args):
+    """
+    Runs a batch script against the chosen storage and prints one JSON line per
+    operation, followed by a summary line.
+    """
+    storage = create_storage(args.storage, args.file, startup_cache=args.startup_cache)
+    runner = BatchRunner(storage, cache=OmdbCache('omdb_cache.db'),
+                         views=create_view_counter(args.storage, args.file))
+    if args.script == '-':
+        summary = runner.run(sys.stdin, commit_every=args.commit_every)
+    else:
+        try:
+            with open(args.script, encoding='utf-8') as file:
+                summary = runner.run(file, commit_every=args.commit_every)
+        except FileNotFoundError:
+            print(f"Script '{args.script}' not found.")
+            return
+    print(json.dumps({"summary": summary}))
 
 
 def main():
+    enable_metrics_from_environment()
+    parser = argparse.ArgumentParser(description="Getflix movie catalog.")
+    parser.add_argument('--storage', choices=sorted(STORAGE_BACKENDS),
+                        help="Storage backend; asked interactively if omitted")
+    parser.add_argument('--file', help="Storage file, defaults to the backend's usual file")
+    parser.add_argument('--script', help="Run operations from this file ('-' for stdin) instead of the menu")
+    parser.add_argument('--commit-every', type=int, help="In script mode, persist after every N operations")
+    parser.add_argument('--no-startup-cache', dest='startup_cache', action='store_false',
+                        help="Always parse the catalog file instead of starting from its snapshot")
+    parser.add_argument('--mirror-posters', action='store_true',
+                        help="Download the posters into posters/ when generating the website")
+    args = parser.parse_args()
+
+    if args.script:
+        args.storage = args.storage or 'json'
+        run_script(args)
+        return
+    if args.storage:
+        storage = create_storage(args.storage, args.file, startup_cache=args.startup_cache)
+        MovieApp(storage, cache=OmdbCache('omdb_cache.db'), poster_mirror=create_poster_mirror(args),
+                 views=create_view_counter(args.storage, args.file)).run()
+        return
+
     print("Choose storage method:")
     print("1. JSON")
     print("2. CSV")
+    print("3. SQLite")
+    print("4. Binary")
+    print("5. Sharded JSON")
 
-    choice = input("Enter choice (1 or 2): ").strip()
+    choice = input("Enter choice (1-5): ").strip()
 
     # Create a storage object based on user's choice
-    if choice == '1':
-        storage = StorageJson('movies.json')
-    elif choice == '2':
-        storage = StorageCsv('movies.csv')
-    else:
+    kind = {'1': 'json', '2': 'csv', '3': 'sqlite', '4': 'binary', '5': 'sharded'}.get(choice)
+    if kind is None:
         print("Invalid choice. Defaulting to JSON storage.")
-        storage = StorageJson('movies.json')
+        kind = 'json'
+    storage = create_storage(kind, startup_cache=args.startup_cache)
 
     # Create a MovieApp object with the selected storage object
-    movie_app = MovieApp(storage)
+    movie_app = MovieApp(storage, cache=OmdbCache('omdb_cache.db'), poster_mirror=create_poster_mirror(args),
+                         views=create_view_counter(kind))
 
     # Run the movie application
     movie_app.run()
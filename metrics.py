@@ -0,0 +1,194 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+_NO_TIMER = nullcontext()
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Initializes an empty set of counters and timers.
+        Recording is off until enable() is called; while off, every recording call
+        returns right after checking one attribute.
+        """
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._timers = {}  # (name, labels) -> [count, total seconds, max seconds]
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """
+        Forgets everything recorded so far.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def increment(self, name, value=1, **labels):
+        """
+        Adds to a counter, e.g. increment("file_bytes_written", 512, storage="json").
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Records one duration for a timer.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    def timer(self, name, **labels):
+        """
+        Times a with block, e.g. `with timer("omdb_request"): ...`.
+        Returns a shared no-op context manager while recording is off.
+        """
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name, **labels):
+        """
+        Decorator that times every call of a function.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def count_file(self, name, file_path, **labels):
+        """
+        Adds the size of a file that was just read or written to a byte counter.
+        """
+        if not self.enabled:
+            return
+        try:
+            self.increment(name, os.path.getsize(file_path), **labels)
+        except OSError:
+            pass
+
+    def snapshot(self):
+        """
+        Returns everything recorded so far as plain data.
+        Returns:
+            dict: {"counters": [...], "timers": [...], "omdb_cache_hit_rate": float or None}.
+        """
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            timers = [{"name": name, "labels": dict(labels), "count": count, "total_seconds": total,
+                       "max_seconds": maximum, "mean_seconds": total / count}
+                      for (name, labels), (count, total, maximum) in sorted(self._timers.items())]
+            hits = self._counters.get(("omdb_cache_hits", ()), 0)
+            misses = self._counters.get(("omdb_cache_misses", ()), 0)
+        return {
+            "counters": counters,
+            "timers": timers,
+            "omdb_cache_hit_rate": hits / (hits + misses) if hits + misses else None,
+        }
+
+    def to_prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        Counters become getflix_<name>_total, timers getflix_<name>_seconds summaries.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        declared = set()
+        for counter in snapshot["counters"]:
+            metric = f"getflix_{counter['name']}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(counter['labels'])} {counter['value']}")
+        for timer in snapshot["timers"]:
+            metric = f"getflix_{timer['name']}_seconds"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+            labels = _format_labels(timer["labels"])
+            lines.append(f"{metric}_count{labels} {timer['count']}")
+            lines.append(f"{metric}_sum{labels} {timer['total_seconds']:.9f}")
+        if snapshot["omdb_cache_hit_rate"] is not None:
+            lines.append("# TYPE getflix_omdb_cache_hit_ratio gauge")
+            lines.append(f"getflix_omdb_cache_hit_ratio {snapshot['omdb_cache_hit_rate']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path):
+        """
+        Writes the metrics to a file: JSON if its name ends in .json, otherwise
+        Prometheus text.
+        """
+        text = json.dumps(self.snapshot(), indent=4) if file_path.endswith(".json") else self.to_prometheus()
+        try:
+            with open(file_path, "w") as file:
+                file.write(text)
+        except IOError as e:
+            print(f"Error writing metrics file: {e}")
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_started")
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._name, time.perf_counter() - self._started, **self._labels)
+        return False
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+# The process-wide metrics everything records into
+METRICS = Metrics()
+enable = METRICS.enable
+disable = METRICS.disable
+increment = METRICS.increment
+timer = METRICS.timer
+count_file = METRICS.count_file
+export = METRICS.export
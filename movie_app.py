@@ -1,41 +1,119 @@
-import statistics
-import random
-import requests
+import re
+import metrics
+from identity_index import valid_imdb_id
+from site_generator import SiteGenerator
 
 API_KEY = "5b29f372"
 API_URL = "http://www.omdbapi.com/"
 
 
-def fetch_movie_details(title):
+def request_movie_details(title=None, imdb_id=None, session=None, api_url=API_URL, cache=None):
+    """
+    Query the OMDb API for a movie by title or IMDb ID.
+
+    Parameters:
+        title (str): The title of the movie to fetch.
+        imdb_id (str): The IMDb ID of the movie, used instead of the title if given.
+        session (requests.Session): Optional session, so bulk lookups reuse pooled connections.
+        api_url (str): Base URL of the OMDb API.
+        cache (OmdbCache): Optional response cache consulted before the API.
+
+    Returns:
+        dict: The decoded OMDb response, including "Response": "False" answers.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+    """
+    if cache is not None:
+        data = cache.get(title, imdb_id)
+        if data is not None:
+            metrics.increment("omdb_cache_hits")
+            return data
+        metrics.increment("omdb_cache_misses")
+
+    import requests  # Imported on the first lookup, so sessions that never call OMDb start faster
+
+    params = {"apikey": API_KEY}
+    if imdb_id:
+        params["i"] = imdb_id
+    else:
+        params["t"] = title
+    with metrics.timer("omdb_request"):
+        response = (session or requests).get(api_url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+
+    if cache is not None:
+        cache.put(data, title, imdb_id)
+    return data
+
+
+def fetch_movie_details(title, imdb_id=None, session=None, api_url=API_URL, cache=None):
     """
     Fetch movie details from the OMDb API if not found in the local storage.
     This function is primarily used as a backup when a movie is not found in the storage.
 
     Parameters:
         title (str): The title of the movie to fetch.
-        api_key (str): The API key used to access the OMDb API.
+        imdb_id (str): The IMDb ID of the movie, used instead of the title if given.
+        session (requests.Session): Optional session to reuse connections.
+        api_url (str): Base URL of the OMDb API.
+        cache (OmdbCache): Optional response cache consulted before the API.
 
     Returns:
         dict or None: A dictionary containing movie details if the movie is found,
                     otherwise None if the movie is not found or if there's an error.
     """
-    url = f"{API_URL}?apikey={API_KEY}&t={title}"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
+    import requests
 
-        data = response.json()
-        if data['Response'] == 'False':
+    try:
+        data = request_movie_details(title, imdb_id, session, api_url, cache)
+        if data.get('Response') == 'False':
             return None
         return data
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
+        metrics.increment("omdb_errors")
         print(f"Error accessing the OMDb API: {e}")
         return None
 
 
+def parse_movie_details(movie_details):
+    """
+    Extract the fields we store from an OMDb response.
+
+    Parameters:
+        movie_details (dict): A successful OMDb response.
+
+    Returns:
+        tuple: (year, rating, poster, imdb_id). Ranges like "2008–2013" keep the
+        first year and a missing "N/A" rating becomes 0.0.
+    """
+    year_match = re.match(r"\d{4}", movie_details.get('Year', ''))
+    year = int(year_match.group()) if year_match else 0
+    try:
+        rating = float(movie_details.get('imdbRating', 0))
+    except ValueError:
+        rating = 0.0
+    poster = movie_details.get('Poster', 'N/A')
+    imdb_id = movie_details.get('imdbID', 'N/A')
+    return year, rating, poster, imdb_id
+
+
 class MovieApp:
-    def __init__(self, storage):
+    def __init__(self, storage, cache=None, poster_mirror=None, views=None):
         self._storage = storage
+        self._cache = cache
+        self._poster_mirror = poster_mirror
+        self._views = views  # RefreshState counting the movies looked at, if any
+
+    def _record_views(self, titles):
+        """
+        Counts views of the movies a command showed, so the rating refresh job
+        updates popular movies first.
+        """
+        if self._views is not None:
+            for title in titles:
+                self._views.record_view(title)
 
     def _command_list_movies(self):
         """
@@ -54,19 +132,24 @@ class MovieApp:
         Command to add a new movie by fetching details from the OMDb API.
         """
         title = input("Enter movie title: ").strip()
-        if title in self._storage.list_movies():
-            print(f"Movie '{title}' already exists.")
+        existing = self._storage.find_duplicate(title)
+        if existing is not None:
+            print(f"Movie '{title}' already exists." if existing == title
+                  else f"Movie '{title}' already exists as '{existing}'.")
             return
 
-        movie_details = fetch_movie_details(title)
+        movie_details = fetch_movie_details(title, cache=self._cache)
         if not movie_details:
             print(f"Movie '{title}' not found in OMDb.")
             return
 
-        year = int(movie_details.get('Year', 0))
-        rating = float(movie_details.get('imdbRating', 0))
-        poster = movie_details.get('Poster', 'N/A')
-        imdb_id = movie_details.get('imdbID', 'N/A')
+        year, rating, poster, imdb_id = parse_movie_details(movie_details)
+
+        # OMDb may resolve the title to a movie stored under another spelling
+        existing = self._storage.find_duplicate(title, imdb_id)
+        if existing is not None:
+            print(f"Movie '{title}' already exists as '{existing}'.")
+            return
 
         self._storage.add_movie(title, year, rating, poster, imdb_id)
         print(f"Movie '{title}' added successfully.")
@@ -75,7 +158,19 @@ class MovieApp:
         """
         Command to delete a movie from the storage.
         """
-        title = input("Enter movie title to delete: ").strip()
+        title = input("Enter movie title or IMDb ID to delete: ").strip()
+        if valid_imdb_id(title):
+            found = self._storage.get_movie_by_imdb_id(title)
+            if found is None:
+                print(f"No movie with IMDb ID '{title}'.")
+                return
+            title = found[0]
+        elif self._storage.get_movie(title) is None:
+            # Only exact titles are deleted, but a near miss is worth pointing out
+            existing = self._storage.find_duplicate(title)
+            if existing is not None:
+                print(f"Movie '{title}' not found. Did you mean '{existing}'?")
+                return
         self._storage.delete_movie(title)
 
     def _command_update_movie(self):
@@ -92,107 +187,165 @@ class MovieApp:
         """
         Command to calculate and display statistics for stored movies.
         """
-        movies = self._storage.list_movies()
-        if not movies:
+        stats = self._storage.movie_stats()
+        if not stats:
             print("No movies to calculate stats for.")
             return
 
-        ratings = [info['rating'] for info in movies.values()]
-        avg_rating = statistics.mean(ratings)
-        median_rating = statistics.median(ratings)
-        best_movie = max(movies, key=lambda x: movies[x]['rating'])
-        worst_movie = min(movies, key=lambda x: movies[x]['rating'])
-
-        print(f"Average rating: {avg_rating:.1f}")
-        print(f"Median rating: {median_rating:.1f}")
-        print(f"Best movie: {best_movie} with rating {movies[best_movie]['rating']}")
-        print(f"Worst movie: {worst_movie} with rating {movies[worst_movie]['rating']}")
+        best_movie, best_rating = stats['best']
+        worst_movie, worst_rating = stats['worst']
+        print(f"Average rating: {stats['average']:.1f}")
+        print(f"Median rating: {stats['median']:.1f}")
+        print(f"Best movie: {best_movie} with rating {best_rating}")
+        print(f"Worst movie: {worst_movie} with rating {worst_rating}")
 
     def _command_random_movie(self):
         """
         Command to display a random movie from the storage.
         """
-        movies = self._storage.list_movies()
-        if not movies:
+        picked = self._storage.random_movie()
+        if not picked:
             print("No movies available.")
             return
 
-        random_movie = random.choice(list(movies.keys()))
-        movie_info = movies[random_movie]
+        random_movie, movie_info = picked
         print(f"Random movie: {random_movie} - Rating: {movie_info['rating']:.1f}")
 
     def _command_search_movie(self):
         """
         Command to search for movies by title in local storage.
         """
-        movies = self._storage.list_movies()
-        if not movies:
+        if not self._storage.count_movies():
             print("No movies available.")
             return
 
         search_term = input("Enter part of movie name: ").lower()
-        found_movies = [movie for movie in movies.keys() if search_term in movie.lower()]
+        found_movies = self._storage.search_movies(search_term)
 
         if found_movies:
-            for movie in found_movies:
-                print(f"{movie}: Year {movies[movie]['year']}, Rating {movies[movie]['rating']:.1f}")
+            for movie, info in found_movies:
+                print(f"{movie}: Year {info['year']}, Rating {info['rating']:.1f}")
+            self._record_views(movie for movie, _ in found_movies)
         else:
             print("No movies found.")
+            suggestions = self._storage.suggest_titles(search_term)
+            if suggestions:
+                print("Did you mean: " + ", ".join(title for title, _ in suggestions) + "?")
 
     def _command_sort_movies_by_rating(self):
         """
-        Command to display movies sorted by rating.
+        Command to display movies sorted by rating, either all of them or a range of ranks.
         """
-        movies = self._storage.list_movies()
-        if not movies:
+        if not self._storage.count_movies():
             print("No movies available.")
             return
 
-        sorted_movies = sorted(movies.items(), key=lambda x: x[1]['rating'], reverse=True)
-        for title, info in sorted_movies:
-            print(f"{title}: Rating {info['rating']:.1f}")
+        try:
+            first, last = self._ask_range("Enter ranks to show (e.g. 1-50, or 51- for the rest), "
+                                          "or press Enter for all: ", int)
+            if first is not None and first < 1:
+                raise ValueError("ranks start at 1")
+        except ValueError:
+            print("Invalid range. Please enter ranks like 1-50 or 51-, lowest first.")
+            return
+
+        start = first - 1 if first is not None else 0
+        shown = 0
+        for rank, (title, info) in enumerate(self._storage.movies_sorted_by_rating(start, last), start + 1):
+            print(f"{rank}. {title}: Rating {info['rating']:.1f}")
+            shown += 1
+        if not shown:
+            print(f"No movies at those ranks, there are {self._storage.count_movies()} movies.")
+
+    def _command_filter_movies(self):
+        """
+        Command to list movies within a release year range and rating range,
+        optionally only those with notes.
+        """
+        if not self._storage.count_movies():
+            print("No movies available.")
+            return
+
+        try:
+            year_min, year_max = self._ask_range("Enter years (e.g. 1990-1999), or press Enter for any: ", int)
+            rating_min, rating_max = self._ask_range("Enter ratings (e.g. 8.5-10), or press Enter for any: ", float)
+        except ValueError:
+            print("Invalid range. Please enter ranges like 1990-1999 or 8.5-10, lowest first.")
+            return
+        has_notes = input("Only movies with notes? (y/N): ").strip().lower() in ("y", "yes") or None
+
+        found = 0
+        for title, info in self._storage.filter_movies(year_min, year_max, rating_min, rating_max, has_notes):
+            print(f"{title}: Year {info['year']}, Rating {info['rating']:.1f}")
+            found += 1
+        print(f"{found} movies found." if found else "No movies found.")
+
+    def _command_similar_movies(self):
+        """
+        Command to list the movies most like a stored movie.
+        """
+        if not self._storage.count_movies():
+            print("No movies available.")
+            return
+
+        title = input("Enter movie name: ")
+        if self._storage.get_movie(title) is None:
+            print(f"Movie '{title}' not found.")
+            return
+        self._record_views([title])
+        try:
+            similar = self._storage.similar_movies(title)
+        except ImportError:
+            print("Recommendations need NumPy, install it with 'pip install numpy'.")
+            return
+        if not similar:
+            print("No other movies to compare with.")
+            return
+        print(f"Movies like {title}:")
+        for other, info in similar:
+            print(f"{other}: Year {info['year']}, Rating {info['rating']:.1f}")
+
+    @staticmethod
+    def _ask_range(prompt, convert):
+        """
+        Asks for a range like "1990-1999"; either end may be left out ("1990-", "-8"),
+        and a single value ("1995") is a range of its own.
+        Returns:
+            tuple: (low, high), None for an open end.
+        Raises:
+            ValueError: If an end isn't a number, or the range is reversed.
+        """
+        text = input(prompt).strip()
+        low, separator, high = text.partition("-")
+        if not separator:
+            high = low
+        low = convert(low) if low.strip() else None
+        high = convert(high) if high.strip() else None
+        if low is not None and high is not None and low > high:
+            raise ValueError(f"range {text} is reversed")
+        return low, high
 
     def _generate_website(self):
         """
-        Generate a static HTML website showing movies.
+        Generate a static HTML website showing all movies, split into pages.
+        Only pages whose content changed since the last run are rewritten.
         """
         movies = self._storage.list_movies()
         if not movies:
             print("No movies available to generate the website.")
             return
 
-        # Load the template and generate the movie grid (same logic as before)
-        with open("index_template.html", "r") as template_file:
-            template_content = template_file.read()
-
-        # Replace placeholders
-        title = "Welcome to GetFlix"
-        movie_grid_html = ""
-        for title, info in list(movies.items())[:20]:  # Display first 20 movies
-            poster = info.get('poster', 'N/A')
-            year = info['year']
-            rating = info['rating']
-            imdb_id = info.get('imdb_id', 'N/A')
-            imdb_url = f"https://www.imdb.com/title/{imdb_id}/" if imdb_id != 'N/A' else "#"
-            notes = " | ".join(info.get('notes', []))
-            movie_grid_html += f"""
-<li class="movie-item">
-    <a href="{imdb_url}" target="_blank">
-        <img src="{poster}" alt="{title} poster" />
-        <div class="tooltip">{notes}</div>
-    </a>
-    <p>{title} - Year: {year} - Rating: {rating:.1f}</p>
-</li>
-"""
-
-        replaced_content = template_content.replace("__TEMPLATE_TITLE__", title).replace(
-            "__TEMPLATE_MOVIE_GRID__", movie_grid_html
-        )
-        # Write the complete website to index.html
-        with open("index.html", "w") as website_file:
-            website_file.write(replaced_content)
-
-        print("Website generated successfully!")
+        poster_path = None
+        if self._poster_mirror is not None:
+            mirrored = self._poster_mirror.mirror(info.get('poster', 'N/A') for info in movies.values())
+            print(f"Posters: {mirrored['fetched']} fetched ({mirrored['bytes_fetched']} bytes), "
+                  f"{mirrored['skipped']} already mirrored ({mirrored['bytes_skipped']} bytes), "
+                  f"{len(mirrored['failed'])} failed.")
+            poster_path = self._poster_mirror.local_path
+
+        report = SiteGenerator(poster_path=poster_path).build(movies)
+        print(f"Website generated successfully! {report['written']} of {report['pages']} pages written, "
+              f"{report['removed']} removed.")
 
     def run(self):
         """
@@ -210,7 +363,9 @@ class MovieApp:
             print("7. Search movie")
             print("8. Movies sorted by rating")
             print("9. Generate website")
-            print("Enter choice (0-9): ")
+            print("10. Filter movies by year and rating")
+            print("11. Movies like...")
+            print("Enter choice (0-11): ")
 
             # Define the dictionary mapping choices to the corresponding command methods
             command_mapping = {
@@ -223,6 +378,8 @@ class MovieApp:
                 7: self._command_search_movie,
                 8: self._command_sort_movies_by_rating,
                 9: self._generate_website,
+                10: self._command_filter_movies,
+                11: self._command_similar_movies,
             }
 
             # Get user command
@@ -239,7 +396,10 @@ class MovieApp:
                 # Fetch and execute the corresponding command
                 command = command_mapping.get(choice)
                 if command:
-                    command()  # Call the function
+                    # Pick up changes another process saved, at the cost of a stat call
+                    self._storage.refresh()
+                    with metrics.timer("command", command=command.__name__.lstrip("_")):
+                        command()  # Call the function
                 else:
                     print("Invalid choice. Please try again.")
 
@@ -0,0 +1,141 @@
+BUCKETS = 101  # Ratings 0.0 to 10.0 in steps of 0.1
+
+
+def _bucket(rating):
+    return min(max(int(round(rating * 10)), 0), BUCKETS - 1)
+
+
+class RatingDistribution:
+    def __init__(self):
+        """
+        Initializes an empty distribution of ratings.
+        Ratings are kept at the 0.1 precision add_movie stores them with, counted in a
+        Fenwick tree over the 101 possible values, so the k-th smallest rating (and
+        with it the median, best and worst) is found in O(log 101) steps.
+        """
+        self.count = 0
+        self.total = 0  # Sum of ratings in tenths, kept as an int so it never drifts
+        self._tree = [0] * (BUCKETS + 1)
+        self._titles = [None] * BUCKETS  # Per bucket: dict of titles in insertion order
+
+    def add(self, title, rating):
+        bucket = _bucket(rating)
+        self.count += 1
+        self.total += bucket
+        self._update(bucket, 1)
+        if self._titles[bucket] is None:
+            self._titles[bucket] = {}
+        self._titles[bucket][title] = None
+
+    def remove(self, title, rating):
+        bucket = _bucket(rating)
+        titles = self._titles[bucket]
+        if titles is None or title not in titles:
+            return
+        del titles[title]
+        self.count -= 1
+        self.total -= bucket
+        self._update(bucket, -1)
+
+    def _update(self, bucket, delta):
+        i = bucket + 1
+        while i <= BUCKETS:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _kth(self, k):
+        """
+        Returns the bucket holding the k-th smallest rating (1-based).
+        """
+        position = 0
+        step = 1 << (BUCKETS.bit_length() - 1)
+        while step:
+            following = position + step
+            if following <= BUCKETS and self._tree[following] < k:
+                position = following
+                k -= self._tree[following]
+            step >>= 1
+        return position
+
+    def summary(self):
+        """
+        Returns the statistics of the distribution.
+        Returns:
+            dict or None: Average and median rating plus the best and worst
+            (title, rating) pairs, or None if the distribution is empty.
+        """
+        if not self.count:
+            return None
+        lower = self._kth((self.count + 1) // 2)
+        upper = self._kth(self.count // 2 + 1)
+        best = self._kth(self.count)
+        worst = self._kth(1)
+        return {
+            "average": self.total / self.count / 10,
+            "median": (lower + upper) / 20,
+            "best": (next(iter(self._titles[best])), best / 10),
+            "worst": (next(iter(self._titles[worst])), worst / 10),
+        }
+
+
+class MovieStats:
+    def __init__(self, movies):
+        """
+        Initializes incrementally maintained rating statistics, overall and per year.
+        Register it as a storage listener to keep it in sync with adds and deletes.
+        Args:
+            movies (dict): The catalog to start from.
+        """
+        self._overall = RatingDistribution()
+        self._years = {}
+        for title, info in movies.items():
+            self._add(title, info)
+
+    def _add(self, title, info):
+        self._overall.add(title, info['rating'])
+        distribution = self._years.get(info['year'])
+        if distribution is None:
+            distribution = self._years[info['year']] = RatingDistribution()
+        distribution.add(title, info['rating'])
+
+    def _remove(self, title, info):
+        self._overall.remove(title, info['rating'])
+        distribution = self._years.get(info['year'])
+        if distribution is not None:
+            distribution.remove(title, info['rating'])
+            if not distribution.count:
+                del self._years[info['year']]
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        Args:
+            title (str): The movie's title.
+            old (dict): Details before the change, None for an added movie.
+            new (dict): Details after the change, None for a deleted movie.
+        """
+        if old is not None and new is not None and (old['rating'], old['year']) == (new['rating'], new['year']):
+            return
+        if old is not None:
+            self._remove(title, old)
+        if new is not None:
+            self._add(title, new)
+
+    def summary(self, year=None):
+        """
+        Returns the rating statistics of the whole catalog or of one year.
+        Args:
+            year (int): Optional release year to restrict the statistics to.
+        Returns:
+            dict or None: See RatingDistribution.summary.
+        """
+        if year is None:
+            return self._overall.summary()
+        distribution = self._years.get(year)
+        return distribution.summary() if distribution else None
+
+    def years(self):
+        """
+        Returns the release years that have movies, in ascending order.
+        """
+        return sorted(self._years)
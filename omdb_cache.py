@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import threading
+import time
+
+# OMDb answers that mean "this movie does not exist"; other failures such as an
+# exhausted request limit must not be cached
+NOT_FOUND_ERRORS = {"Movie not found!", "Incorrect IMDb ID."}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+"""
+
+
+def normalize_title(title):
+    """
+    Normalizes a title for cache lookups: case-folded with collapsed whitespace.
+    Args:
+        title (str): Movie title.
+    Returns:
+        str: The normalized title.
+    """
+    return " ".join(title.casefold().split())
+
+
+class OmdbCache:
+    def __init__(self, file_path, ttl=7 * 24 * 3600, negative_ttl=24 * 3600, max_entries=10000):
+        """
+        Initializes an on-disk cache of OMDb responses.
+        Responses are keyed by normalized title and by imdbID, expire after a TTL
+        and the least recently used entries are evicted beyond max_entries.
+        Args:
+            file_path (str): Path to the SQLite file holding the cache.
+            ttl (float): Seconds a found movie stays valid.
+            negative_ttl (float): Seconds a "Movie not found!" answer stays valid.
+            max_entries (int): Maximum number of cached keys.
+        """
+        self.file_path = file_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    @staticmethod
+    def _key(title=None, imdb_id=None):
+        if imdb_id:
+            return f"i:{imdb_id.lower()}"
+        return f"t:{normalize_title(title)}"
+
+    def get(self, title=None, imdb_id=None):
+        """
+        Looks up a cached response.
+        Args:
+            title (str): Movie title, used if no IMDb ID is given.
+            imdb_id (str): IMDb ID of the movie.
+        Returns:
+            dict or None: The cached OMDb response (possibly a "Response": "False"
+            answer), or None on a miss.
+        """
+        key = self._key(title, imdb_id)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                data = json.loads(row[0])
+                ttl = self.ttl if data.get("Response") != "False" else self.negative_ttl
+                if now - row[1] < ttl:
+                    self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                    self._connection.commit()
+                    self.hits += 1
+                    return data
+            self.misses += 1
+            return None
+
+    def put(self, data, title=None, imdb_id=None):
+        """
+        Stores an OMDb response under the requested key and, for found movies,
+        also under its imdbID and reported title so either lookup hits next time.
+        Args:
+            data (dict): The OMDb response.
+            title (str): The title that was requested.
+            imdb_id (str): The IMDb ID that was requested.
+        """
+        if data.get("Response") == "False":
+            if data.get("Error") not in NOT_FOUND_ERRORS:
+                return
+            keys = {self._key(title, imdb_id)}
+        else:
+            keys = {self._key(title, imdb_id)}
+            if data.get("imdbID"):
+                keys.add(self._key(imdb_id=data["imdbID"]))
+            if data.get("Title"):
+                keys.add(self._key(title=data["Title"]))
+
+        now = time.time()
+        payload = json.dumps(data)
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO responses (key, payload, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                [(key, payload, now, now) for key in keys]
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        count = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        Returns:
+            dict: Hits, misses, hit rate and number of cached keys.
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        """
+        Closes the cache database.
+        """
+        self._connection.close()
@@ -0,0 +1,94 @@
+from collections.abc import ItemsView, MutableMapping, ValuesView
+
+
+class OverlayCatalog(MutableMapping):
+    def __init__(self):
+        """
+        Base class for catalogs that read movies on demand from a file and keep
+        changes in memory until the storage rewrites the file.
+        Subclasses implement _base_titles, _base_contains, _base_len and _base_get.
+        A movie is decoded on first access and kept, so in-place edits (notes) stick
+        and memory grows with what is touched rather than with the file size.
+        """
+        self._loaded = {}  # Title -> details of every movie read or written so far
+        self._new = {}  # Titles not in the file, in insertion order
+        self._deleted = set()  # Titles in the file that were deleted
+
+    def _base_titles(self):
+        raise NotImplementedError
+
+    def _base_contains(self, title):
+        raise NotImplementedError
+
+    def _base_len(self):
+        raise NotImplementedError
+
+    def _base_get(self, title):
+        raise NotImplementedError
+
+    def __contains__(self, title):
+        if title in self._loaded or title in self._new:
+            return True
+        return title not in self._deleted and self._base_contains(title)
+
+    def __getitem__(self, title):
+        details = self._loaded.get(title)
+        if details is None:
+            if title in self._deleted or not self._base_contains(title):
+                raise KeyError(title)
+            details = self._loaded[title] = self._base_get(title)
+        return details
+
+    def __setitem__(self, title, details):
+        if title not in self:
+            if title in self._deleted:
+                self._deleted.discard(title)
+            else:
+                self._new[title] = None
+        self._loaded[title] = details
+
+    def __delitem__(self, title):
+        if title not in self:
+            raise KeyError(title)
+        self._loaded.pop(title, None)
+        if title in self._new:
+            del self._new[title]
+        else:
+            self._deleted.add(title)
+
+    def __iter__(self):
+        for title in self._base_titles():
+            if title not in self._deleted:
+                yield title
+        yield from list(self._new)
+
+    def __len__(self):
+        return self._base_len() - len(self._deleted) + len(self._new)
+
+    def _peek(self, title):
+        """
+        Returns a movie's details without keeping them, for one-off full scans.
+        """
+        details = self._loaded.get(title)
+        return details if details is not None else self._base_get(title)
+
+    def items(self):
+        return _OverlayItems(self)
+
+    def values(self):
+        return _OverlayValues(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} movies)"
+
+
+class _OverlayItems(ItemsView):
+    def __iter__(self):
+        for title in self._mapping:
+            yield title, self._mapping._peek(title)
+
+
+class _OverlayValues(ValuesView):
+    def __iter__(self):
+        for title in self._mapping:
+            yield self._mapping._peek(title)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+MANIFEST_NAME = "manifest.json"
+
+
+class PosterMirror:
+    def __init__(self, store_dir="posters", max_workers=8, session=None, revalidate=False):
+        """
+        Initializes a local, content-addressed mirror of the poster images.
+        Every image is stored once under the SHA-256 of its bytes, so identical
+        posters behind different URLs share a file. A manifest maps each URL to its
+        file, so re-runs skip posters that are already mirrored.
+        Args:
+            store_dir (str): Directory the posters are stored in, relative to the site.
+            max_workers (int): Maximum number of concurrent downloads.
+            session (requests.Session): Optional session; by default one is created
+                with a connection pool sized to max_workers when posters are first
+                downloaded, so requests is only imported when it is needed.
+            revalidate (bool): Ask the server whether mirrored posters changed
+                (conditional GET) instead of trusting the local copy.
+        """
+        self.store_dir = store_dir
+        self.max_workers = max_workers
+        self.revalidate = revalidate
+        self._session = session
+        self._lock = threading.Lock()
+        self._stored = set()
+        self._manifest = self._read_manifest()
+
+    def local_path(self, url):
+        """
+        Returns the path of the mirrored copy of a poster, or the URL itself if the
+        poster isn't mirrored.
+        """
+        entry = self._manifest.get(url)
+        if entry is None:
+            return url
+        return posixpath.join(self.store_dir.replace(os.sep, "/"), entry["file"])
+
+    def mirror(self, urls):
+        """
+        Downloads the posters that are not mirrored yet, concurrently.
+        Args:
+            urls (iterable): Poster URLs; "N/A" and duplicates are ignored.
+        Returns:
+            dict: Counts of fetched, skipped and deduplicated posters, bytes
+            fetched and skipped, and the failures by URL.
+        """
+        report = {"fetched": 0, "skipped": 0, "deduplicated": 0,
+                  "bytes_fetched": 0, "bytes_skipped": 0, "failed": {}}
+        wanted = {url for url in urls if url and url.startswith(("http://", "https://"))}
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        to_fetch = []
+        for url in wanted:
+            entry = self._manifest.get(url)
+            if entry is not None and os.path.exists(os.path.join(self.store_dir, entry["file"])):
+                if not self.revalidate:
+                    report["skipped"] += 1
+                    report["bytes_skipped"] += entry["size"]
+                    continue
+            to_fetch.append(url)
+
+        if to_fetch and self._session is None:
+            self._session = self._create_session()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for url, outcome in zip(to_fetch, executor.map(self._fetch, to_fetch)):
+                status, value = outcome
+                if status == "failed":
+                    report["failed"][url] = value
+                elif status == "unchanged":
+                    report["skipped"] += 1
+                    report["bytes_skipped"] += value
+                else:
+                    report["fetched"] += 1
+                    report["bytes_fetched"] += value
+                    if status == "duplicate":
+                        report["deduplicated"] += 1
+
+        self._write_manifest()
+        return report
+
+    def _create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _fetch(self, url):
+        """
+        Downloads one poster and stores it under its content hash.
+        Returns:
+            tuple: ("stored" | "duplicate", bytes fetched), ("unchanged", bytes
+            skipped) or ("failed", error message).
+        """
+        entry = self._manifest.get(url)
+        if entry is not None and not os.path.exists(os.path.join(self.store_dir, entry["file"])):
+            entry = None
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        import requests
+
+        try:
+            response = self._session.get(url, headers=headers, timeout=30)
+            if response.status_code == 304 and entry is not None:
+                return "unchanged", entry["size"]
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            return "failed", str(e)
+
+        content = response.content
+        file_name = hashlib.sha256(content).hexdigest() + self._extension(url, response)
+        path = os.path.join(self.store_dir, file_name)
+        with self._lock:
+            # Claim the hash so a concurrent download of the same image counts as a duplicate
+            status = "duplicate" if file_name in self._stored or os.path.exists(path) else "stored"
+            self._stored.add(file_name)
+        if status == "stored":
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, path)
+
+        with self._lock:
+            self._manifest[url] = {
+                "file": file_name,
+                "size": len(content),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        return status, len(content)
+
+    @staticmethod
+    def _extension(url, response):
+        extension = posixpath.splitext(urlparse(url).path)[1].lower()
+        if extension in (".jpg", ".jpeg", ".png", ".gif", ".webp"):
+            return extension
+        content_type = response.headers.get("Content-Type", "").split(";")[0]
+        return mimetypes.guess_extension(content_type) or ".img"
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.store_dir, MANIFEST_NAME), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self):
+        try:
+            with open(os.path.join(self.store_dir, MANIFEST_NAME), "w") as file:
+                json.dump(self._manifest, file)
+        except IOError as e:
+            print(f"Error writing poster manifest: {e}")
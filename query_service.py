@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from istorage import IStorage
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+MAX_LIMIT = 1000
+MAX_CACHED_RESPONSES = 1024
+VIEWS_SAVE_INTERVAL = 60.0  # Seconds between saves of the view counts
+
+
+class QueryError(Exception):
+    """
+    A request the service can't answer, with the HTTP status to reply with.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _movie(title, details):
+    return {"title": title, **dict(details)}
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        raise QueryError(400, f"'{name}' must be a whole number")
+
+
+class QueryService:
+    def __init__(self, storage, refresh_interval=1.0, views=None):
+        """
+        Initializes a read-only JSON query service over a storage that is loaded once.
+        Answers come from the storage's in-memory indexes. Each response carries an
+        ETag derived from its body, so clients revalidating unchanged results get
+        304 Not Modified. Bodies of the most recent requests are cached until the
+        catalog changes.
+        Args:
+            storage (IStorage): The catalog to serve.
+            refresh_interval (float): Seconds between checks for changes another
+                process saved to the storage file.
+            views (RefreshState): Optional view counter for the movies that
+                /movie, /search and /similar answers show; saved periodically.
+        """
+        self._storage = storage
+        self._refresh_interval = refresh_interval
+        self._views = views
+        self._version = 0  # Bumped on every catalog change; cached bodies are only valid for one version
+        # Request target -> (version, etag, body, viewed titles), least recently used first
+        self._responses = OrderedDict()
+        refresh = type(storage).refresh
+        # Storages that read through to a database may change without notifying us, so don't cache for them
+        self._cacheable = getattr(refresh, "__wrapped__", refresh) is not IStorage.refresh
+        storage.add_listener(self)
+
+    def on_change(self, title, old, new):
+        self._new_version()
+
+    def _new_version(self):
+        self._version += 1
+        self._responses.clear()  # Cached bodies only match the version they were made for
+
+    def handle(self, method, target, if_none_match=None):
+        """
+        Answers one request.
+        Args:
+            method (str): HTTP method; only GET is served.
+            target (str): Path and query string, e.g. "/search?q=heat".
+            if_none_match (str): The request's If-None-Match header, if any.
+        Returns:
+            tuple: (status, extra headers, body bytes).
+        """
+        if method != "GET":
+            return self._error(405, "Only GET is supported")
+        cacheable = self._cacheable and not target.startswith("/random")
+        cached = self._responses.get(target) if cacheable else None
+        if cached is not None and cached[0] == self._version:
+            self._responses.move_to_end(target)
+            etag, body, viewed = cached[1], cached[2], cached[3]
+        else:
+            try:
+                result = self._query(target)
+            except QueryError as e:
+                return self._error(e.status, str(e))
+            body = json.dumps(result).encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            viewed = self._viewed_titles(target, result)
+            if cacheable:
+                self._responses[target] = (self._version, etag, body, viewed)
+                if len(self._responses) > MAX_CACHED_RESPONSES:
+                    self._responses.popitem(last=False)
+        if self._views is not None:
+            for title in viewed:
+                self._views.record_view(title)
+
+        if target.startswith("/random"):
+            return 200, {"Cache-Control": "no-store"}, body
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return 304, headers, b""
+        return 200, headers, body
+
+    def _query(self, target):
+        """
+        Runs the query a request target asks for.
+        Returns:
+            The JSON-serializable result.
+        Raises:
+            QueryError: If the path is unknown or a parameter is invalid.
+        """
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        storage = self._storage
+
+        if parts.path == "/movies":
+            offset = max(_int_param(query, "offset", 0), 0)
+            limit = min(max(_int_param(query, "limit", 50), 0), MAX_LIMIT)
+            movies = storage.list_movies()
+            page = islice(movies.items(), offset, offset + limit)
+            return {"total": storage.count_movies(), "movies": [_movie(title, info) for title, info in page]}
+
+        if parts.path == "/search":
+            term = query.get("q", [""])[0].lower()
+            if not term:
+                raise QueryError(400, "Missing search term 'q'")
+            found = [_movie(title, info) for title, info in storage.search_movies(term)]
+            suggestions = [title for title, _ in storage.suggest_titles(term)] if not found else []
+            return {"movies": found, "suggestions": suggestions}
+
+        if parts.path == "/sorted":
+            start = max(_int_param(query, "start", 0), 0)
+            stop = start + min(max(_int_param(query, "limit", 50), 0), MAX_LIMIT)
+            return {"movies": [_movie(title, info) for title, info in storage.movies_sorted_by_rating(start, stop)]}
+
+        if parts.path == "/stats":
+            year = query.get("year", [None])[0]
+            if year is not None and not year.isdigit():
+                raise QueryError(400, "'year' must be a whole number")
+            return {"stats": storage.movie_stats(int(year) if year is not None else None)}
+
+        if parts.path == "/random":
+            picked = storage.random_movie(weighted=query.get("weighted", ["0"])[0] in ("1", "true"))
+            return {"movie": _movie(*picked) if picked else None}
+
+        if parts.path == "/similar":
+            title = query.get("title", [""])[0]
+            if storage.get_movie(title) is None:
+                raise QueryError(404, f"Movie '{title}' not found")
+            limit = min(max(_int_param(query, "limit", 5), 0), MAX_LIMIT)
+            return {"movies": [_movie(other, info) for other, info in storage.similar_movies(title, limit)]}
+
+        if parts.path == "/movie":
+            title = query.get("title", [""])[0]
+            details = storage.get_movie(title)
+            if details is None:
+                raise QueryError(404, f"Movie '{title}' not found")
+            return {"movie": _movie(title, details)}
+
+        raise QueryError(404, f"Unknown path '{parts.path}'")
+
+    @staticmethod
+    def _viewed_titles(target, result):
+        """
+        Returns the titles of the movies a response shows in detail: the movie
+        asked for by /movie and /similar, and the movies /search found.
+        """
+        parts = urlsplit(target)
+        if parts.path in ("/movie", "/similar"):
+            return (parse_qs(parts.query)["title"][0],)
+        if parts.path == "/search":
+            return tuple(movie["title"] for movie in result["movies"])
+        return ()
+
+    @staticmethod
+    def _error(status, message):
+        return status, {}, json.dumps({"error": message}).encode("utf-8")
+
+    async def _serve_client(self, reader, writer):
+        """
+        Serves the requests of one HTTP/1.1 connection, keeping it open between requests.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                status, extra_headers, body = self.handle(method, target, headers.get("if-none-match"))
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                         "Content-Type: application/json",
+                         f"Content-Length: {len(body)}",
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                lines.extend(f"{name}: {value}" for name, value in extra_headers.items())
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _watch_storage(self):
+        """
+        Periodically picks up changes other processes saved to the storage file,
+        and saves the view counts.
+        """
+        last_saved = time.monotonic()
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            if self._storage.refresh():
+                self._new_version()
+            if self._views is not None and time.monotonic() - last_saved >= VIEWS_SAVE_INTERVAL:
+                self._views.save()
+                last_saved = time.monotonic()
+
+    async def serve(self, host="127.0.0.1", port=8000, ready=None):
+        """
+        Serves requests until cancelled.
+        Args:
+            host (str): Address to listen on.
+            port (int): Port to listen on; 0 picks a free one.
+            ready (callable): Called with the bound (host, port) once listening.
+        """
+        server = await asyncio.start_server(self._serve_client, host, port)
+        watcher = asyncio.create_task(self._watch_storage())
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[:2])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            if self._views is not None:
+                self._views.save()
+
+
+def main():
+    from main import STORAGE_BACKENDS, create_storage, create_view_counter
+
+    parser = argparse.ArgumentParser(description="Serve catalog queries as JSON over HTTP.")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), default="json")
+    parser.add_argument("--file", help="Storage file, defaults to the backend's usual file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--refresh-interval", type=float, default=1.0,
+                        help="Seconds between checks for changes to the storage file")
+    args = parser.parse_args()
+
+    service = QueryService(create_storage(args.storage, args.file), refresh_interval=args.refresh_interval,
+                           views=create_view_counter(args.storage, args.file))
+    print(f"Serving on http://{args.host}:{args.port}/ (movies, search, sorted, stats, random, similar, movie)")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
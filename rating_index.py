@@ -0,0 +1,61 @@
+from itertools import count
+
+from sorted_index import SortedList
+
+
+class RatingIndex:
+    def __init__(self, movies):
+        """
+        Initializes an index of titles ordered from the best to the worst rating.
+        Movies with the same rating keep the order they were added in. Register it as
+        a storage listener to keep it in sync; top-k, bottom-k and rank ranges
+        then cost O(log n + k) instead of a full sort.
+        Args:
+            movies (dict): The catalog to start from.
+        """
+        self._sequence = count()
+        self._keys = {
+            title: (-info['rating'], next(self._sequence), title)
+            for title, info in movies.items()
+        }
+        self._order = SortedList(self._keys.values())
+
+    def __len__(self):
+        return len(self._order)
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        Args:
+            title (str): The movie's title.
+            old (dict): Details before the change, None for an added movie.
+            new (dict): Details after the change, None for a deleted movie.
+        """
+        if old is not None and new is not None and old['rating'] == new['rating']:
+            return
+        key = self._keys.pop(title, None)
+        if key is not None:
+            self._order.remove(key)
+        if new is not None:
+            key = self._keys[title] = (-new['rating'], next(self._sequence), title)
+            self._order.add(key)
+
+    def ranked(self, start=0, stop=None):
+        """
+        Lazily yields the titles at ranks [start, stop), rank 0 being the best rated.
+        """
+        for key in self._order.islice(start, stop):
+            yield key[2]
+
+    def top(self, k):
+        """
+        Returns the k best rated titles, best first.
+        """
+        return list(self.ranked(0, k))
+
+    def bottom(self, k):
+        """
+        Returns the k worst rated titles, worst first.
+        """
+        start = max(len(self._order) - k, 0)
+        return list(self.ranked(start))[::-1]
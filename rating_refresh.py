@@ -0,0 +1,272 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from file_lock import FileLock, atomic_write
+from identity_index import IMDB_ID_PATTERN
+from main import STORAGE_BACKENDS, create_storage
+from movie_app import API_URL, request_movie_details
+
+
+class RefreshState:
+    def __init__(self, file_path):
+        """
+        Initializes the per-movie refresh bookkeeping kept in a JSON sidecar file,
+        so refresh runs are incremental and pick up where an interrupted run stopped.
+        The app and the query service count views in the same file, so the refresh
+        job can put the most-viewed movies first.
+        Args:
+            file_path (str): Path to the sidecar file.
+        """
+        self.file_path = file_path
+        self._lock = FileLock(file_path)
+        self.refreshed, self.views = self._read()  # Title -> Unix time of the last refresh / view count
+        self._new_views = {}  # Views counted since the last save
+        self._changed = False
+
+    def _read(self):
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            return data.get("refreshed", {}), data.get("views", {})
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, AttributeError):
+            print(f"Ignoring unreadable refresh state '{self.file_path}'.")
+        return {}, {}
+
+    def record_view(self, title, count=1):
+        """
+        Counts views of a movie, so popular movies are refreshed first.
+        """
+        self.views[title] = self.views.get(title, 0) + count
+        self._new_views[title] = self._new_views.get(title, 0) + count
+        self._changed = True
+
+    def mark_refreshed(self, title, when=None):
+        self.refreshed[title] = when if when is not None else time.time()
+        self._changed = True
+
+    def priority(self, title, now):
+        """
+        Returns how urgently a movie needs a refresh: its staleness in seconds,
+        weighted by its views. Never refreshed movies come first.
+        """
+        return (now - self.refreshed.get(title, 0)) * (1 + self.views.get(title, 0))
+
+    def save(self):
+        """
+        Writes the sidecar file atomically if anything changed. Other processes
+        may have saved it meanwhile, so it is merged with the file under its lock:
+        the latest refresh time of each movie wins, and the views counted here
+        are added to the saved counts.
+        """
+        if not self._changed:
+            return
+        with self._lock:
+            refreshed, views = self._read()
+            for title, when in self.refreshed.items():
+                if when > refreshed.get(title, 0):
+                    refreshed[title] = when
+            for title, count in self._new_views.items():
+                views[title] = views.get(title, 0) + count
+            data = {"refreshed": refreshed, "views": views}
+            try:
+                atomic_write(self.file_path, lambda file: json.dump(data, file), encoding="utf-8")
+            except (IOError, OSError) as e:
+                print(f"Error writing refresh state: {e}")
+                return
+        self.refreshed, self.views = refreshed, views
+        self._new_views = {}
+        self._changed = False
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        """
+        Initializes a thread-safe rate limiter allowing `rate` requests per second
+        on average and up to `burst` at once.
+        """
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RatingRefresher:
+    def __init__(self, storage, state, max_workers=4, rate=5.0, api_url=API_URL, session=None):
+        """
+        Initializes the refresh job.
+        Args:
+            storage (IStorage): Storage whose ratings are refreshed.
+            state (RefreshState): Per-movie refresh timestamps and view counts.
+            max_workers (int): Maximum number of concurrent OMDb requests.
+            rate (float): Maximum OMDb requests per second.
+            api_url (str): Base URL of the OMDb API.
+            session (requests.Session): Optional session; by default one is created
+                with a connection pool sized to max_workers.
+        """
+        self._storage = storage
+        self._state = state
+        self.max_workers = max_workers
+        self.api_url = api_url
+        self._bucket = TokenBucket(rate, burst=max_workers)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self._session = session
+        self._in_flight = {}  # IMDb ID -> Future of the running lookup
+        self._in_flight_lock = threading.Lock()
+
+    def due(self, max_age, limit=None, now=None):
+        """
+        Lists the movies whose rating is older than max_age, most urgent first.
+        Movies without an IMDb ID can't be refreshed and are left out.
+        Args:
+            max_age (float): Seconds after which a rating counts as stale.
+            limit (int): Return at most this many titles.
+        Returns:
+            list: (title, imdb_id) pairs.
+        """
+        now = now if now is not None else time.time()
+        stale = []
+        for title, details in self._storage.list_movies().items():
+            imdb_id = details.get("imdb_id", "N/A")
+            if IMDB_ID_PATTERN.match(imdb_id) and now - self._state.refreshed.get(title, 0) >= max_age:
+                stale.append((title, imdb_id))
+        stale.sort(key=lambda entry: self._state.priority(entry[0], now), reverse=True)
+        return stale[:limit] if limit is not None else stale
+
+    def lookup(self, executor, imdb_id):
+        """
+        Starts an OMDb lookup of an IMDb ID, or joins the one already running for it.
+        Returns:
+            Future: Resolves to the new rating, or None if OMDb has none.
+        """
+        import requests
+
+        with self._in_flight_lock:
+            future = self._in_flight.get(imdb_id)
+            if future is not None:
+                return future
+            future = self._in_flight[imdb_id] = Future()
+
+        def fetch():
+            try:
+                self._bucket.acquire()
+                data = request_movie_details(None, imdb_id, self._session, self.api_url)
+                rating = data.get("imdbRating", "N/A") if data.get("Response") != "False" else "N/A"
+                future.set_result(float(rating) if rating != "N/A" else None)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                future.set_exception(e)
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight.pop(imdb_id, None)
+
+        executor.submit(fetch)
+        return future
+
+    def run(self, max_age=30 * 86400, limit=None, chunk_size=500):
+        """
+        Refreshes stale ratings. Lookups run concurrently under the rate limit; each
+        chunk's changed ratings are written in one batched commit and its timestamps
+        saved, so an interrupted run loses at most one chunk of work.
+        Args:
+            max_age (float): Seconds after which a rating counts as stale.
+            limit (int): Refresh at most this many movies.
+            chunk_size (int): Movies per commit.
+        Returns:
+            dict: Report with checked, changed and failed counts, elapsed time and throughput.
+        """
+        import requests
+
+        started = time.perf_counter()
+        due = self.due(max_age, limit)
+        changed = {}
+        failed = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(due), chunk_size):
+                chunk = due[start:start + chunk_size]
+                futures = [(title, self.lookup(executor, imdb_id)) for title, imdb_id in chunk]
+                ratings = {}
+                for title, future in futures:
+                    try:
+                        ratings[title] = future.result()
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        failed[title] = str(e)
+
+                with self._storage.batch():
+                    for title, rating in ratings.items():
+                        details = self._storage.get_movie(title)
+                        if details is None:
+                            continue
+                        if rating is not None and round(rating, 1) != details["rating"]:
+                            changed[title] = (details["rating"], round(rating, 1))
+                            self._storage.update_rating(title, rating)
+                        self._state.mark_refreshed(title)
+                self._state.save()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "checked": len(due),
+            "changed": changed,
+            "failed": failed,
+            "elapsed": elapsed,
+            "per_second": len(due) / elapsed if elapsed else 0.0,
+        }
+
+
+def state_path(storage_path):
+    """
+    Returns the path of the refresh state kept next to a storage file.
+    """
+    return f"{storage_path}.refresh.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh stored ratings from OMDb.")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), default="json")
+    parser.add_argument("--path", help="Storage file, defaults to the backend's usual file")
+    parser.add_argument("--max-age-days", type=float, default=30, help="Refresh ratings older than this")
+    parser.add_argument("--limit", type=int, help="Refresh at most this many movies")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent OMDb requests")
+    parser.add_argument("--rate", type=float, default=5.0, help="Maximum OMDb requests per second")
+    args = parser.parse_args()
+
+    storage_path = args.path or STORAGE_BACKENDS[args.storage][1]
+    refresher = RatingRefresher(create_storage(args.storage, storage_path), RefreshState(state_path(storage_path)),
+                                max_workers=args.workers, rate=args.rate)
+    report = refresher.run(args.max_age_days * 86400, args.limit)
+    print(f"Checked {report['checked']} ratings in {report['elapsed']:.2f}s ({report['per_second']:.1f}/s), "
+          f"{len(report['changed'])} changed, {len(report['failed'])} failed.")
+    for title, (old, new) in report["changed"].items():
+        print(f"  {title}: {old} -> {new}")
+    for title, error in report["failed"].items():
+        print(f"  {title}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import random
+import re
+import zlib
+
+MAX_RATING = 10.0
+MAX_WEIGHTED_TRIES = 64
+BASE_YEAR = 2000  # Years are stored relative to this, keeping float32 precise
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class RandomPicker:
+    def __init__(self, movies):
+        """
+        Initializes an array of titles for constant-time random picks. Deleting
+        moves the last title into the freed slot, so the array never has gaps.
+        Register it as a storage listener to keep it in sync.
+        Args:
+            movies (dict): The catalog to start from.
+        """
+        self._titles = []
+        self._ratings = []
+        self._positions = {}  # Title -> index in _titles
+        for title, info in movies.items():
+            self._append(title, info['rating'])
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _append(self, title, rating):
+        self._positions[title] = len(self._titles)
+        self._titles.append(title)
+        self._ratings.append(float(rating))
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        """
+        position = self._positions.get(title)
+        if new is None:
+            if position is None:
+                return
+            del self._positions[title]
+            last_title, last_rating = self._titles.pop(), self._ratings.pop()
+            if position < len(self._titles):
+                self._titles[position], self._ratings[position] = last_title, last_rating
+                self._positions[last_title] = position
+        elif position is None:
+            self._append(title, new['rating'])
+        else:
+            self._ratings[position] = float(new['rating'])
+
+    def uniform(self, rng=random):
+        """
+        Picks a title with equal probability, in O(1).
+        Returns:
+            str or None: The title, or None if there are none.
+        """
+        return rng.choice(self._titles) if self._titles else None
+
+    def weighted(self, rng=random):
+        """
+        Picks a title with probability proportional to its rating, by rejection
+        sampling: a uniform pick is kept with probability rating / 10. That takes
+        10 / average rating tries on average, a constant for any catalog size.
+        Returns:
+            str or None: The title, or None if there are none.
+        """
+        if not self._titles:
+            return None
+        for _ in range(MAX_WEIGHTED_TRIES):
+            position = rng.randrange(len(self._titles))
+            if rng.random() * MAX_RATING < self._ratings[position]:
+                return self._titles[position]
+        # Only reached when almost every rating is 0; fall back to a uniform pick
+        return self.uniform(rng)
+
+
+class Recommender:
+    def __init__(self, movies, title_features=16, year_weight=1.0, rating_weight=1.0, title_weight=0.5):
+        """
+        Initializes a NumPy feature matrix with one row per movie: scaled release
+        year and rating, plus hashed title words. "More like this" queries then
+        rank every movie in one vectorized pass. Rows are kept in a growable array
+        and deletes move the last row into the gap, so updates cost O(1).
+        Register it as a storage listener to keep it in sync.
+        Args:
+            movies (dict): The catalog to start from.
+            title_features (int): Buckets for hashed title words; 0 ignores titles.
+            year_weight (float): Weight of a 10 year difference.
+            rating_weight (float): Weight of a 1 point rating difference.
+            title_weight (float): Weight of the title words.
+        """
+        import numpy  # Only needed for recommendations, so imported on first use
+
+        self._numpy = numpy
+        self._title_features = title_features
+        self._weights = (year_weight / 10, rating_weight, title_weight)
+        self._titles = list(movies)
+        self._positions = {title: position for position, title in enumerate(self._titles)}
+        capacity = max(len(self._titles), 16)
+        self._matrix = numpy.zeros((capacity, 2 + title_features), dtype=numpy.float32)
+        self._norms = numpy.zeros(capacity, dtype=numpy.float32)  # Squared length of every row
+        if self._titles:
+            # Whole columns at once; only the title words need a loop
+            count = len(self._titles)
+            details = [movies[title] for title in self._titles]
+            self._matrix[:count, 0] = numpy.fromiter((float(info['year']) for info in details), numpy.float64,
+                                                     count) - BASE_YEAR
+            self._matrix[:count, 0] *= self._weights[0]
+            self._matrix[:count, 1] = numpy.fromiter((float(info['rating']) for info in details), numpy.float64,
+                                                     count) * self._weights[1]
+            if title_features:
+                self._matrix[:count, 2:] = self._title_block(self._titles)
+            self._norms[:count] = numpy.einsum("ij,ij->i", self._matrix[:count], self._matrix[:count])
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _title_block(self, titles):
+        """
+        Hashes the words of many titles at once: every distinct word is hashed
+        once, and the bucket counts are scattered into the block in one call.
+        """
+        numpy = self._numpy
+        buckets = {}  # Word -> its bucket
+        rows, columns = [], []
+        for position, title in enumerate(titles):
+            for word in WORD_PATTERN.findall(title.lower()):
+                bucket = buckets.get(word)
+                if bucket is None:
+                    bucket = buckets[word] = zlib.crc32(word.encode("utf-8")) % self._title_features
+                rows.append(position)
+                columns.append(bucket)
+        block = numpy.zeros((len(titles), self._title_features), dtype=numpy.float32)
+        numpy.add.at(block, (numpy.array(rows, dtype=numpy.intp), numpy.array(columns, dtype=numpy.intp)), 1)
+        norms = numpy.sqrt(numpy.einsum("ij,ij->i", block, block))
+        norms[norms == 0] = 1
+        block *= (self._weights[2] / norms)[:, None]
+        return block
+
+    def _title_row(self, title):
+        """
+        Hashes a title's words into the title feature buckets, scaled to title_weight.
+        """
+        buckets = [0] * self._title_features
+        for word in WORD_PATTERN.findall(title.lower()):
+            buckets[zlib.crc32(word.encode("utf-8")) % self._title_features] += 1
+        norm = sum(count * count for count in buckets) ** 0.5
+        return [count * self._weights[2] / norm for count in buckets] if norm else buckets
+
+    def _set_row(self, title, info):
+        position = self._positions.get(title)
+        if position is None:
+            position = self._positions[title] = len(self._titles)
+            self._titles.append(title)
+            if position == len(self._matrix):
+                self._matrix = self._numpy.concatenate([self._matrix, self._numpy.zeros_like(self._matrix)])
+                self._norms = self._numpy.concatenate([self._norms, self._numpy.zeros_like(self._norms)])
+        year_weight, rating_weight, _ = self._weights
+        row = self._matrix[position]
+        row[0] = (float(info['year']) - BASE_YEAR) * year_weight
+        row[1] = float(info['rating']) * rating_weight
+        if self._title_features:
+            row[2:] = self._title_row(title)
+        self._norms[position] = row @ row
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        """
+        if new is not None:
+            self._set_row(title, new)
+            return
+        position = self._positions.pop(title, None)
+        if position is None:
+            return
+        last = len(self._titles) - 1
+        last_title = self._titles.pop()
+        if position < last:
+            self._titles[position] = last_title
+            self._positions[last_title] = position
+            self._matrix[position] = self._matrix[last]
+            self._norms[position] = self._norms[last]
+
+    def similar(self, title, k=5):
+        """
+        Finds the k movies closest to a stored movie in the feature space.
+        Squared distances come from |a|^2 - 2 a.b + |b|^2 with the row lengths kept
+        up to date, so a query is one matrix-vector product over the catalog.
+        Returns:
+            list: (title, distance) pairs, closest first; empty if the title isn't indexed.
+        """
+        position = self._positions.get(title)
+        k = min(k, len(self._titles) - 1)
+        if position is None or k <= 0:
+            return []
+        numpy = self._numpy
+        count = len(self._titles)
+        query = self._matrix[position]
+        distances = self._matrix[:count] @ (-2 * query)
+        distances += self._norms[:count]
+        distances += self._norms[position]
+        distances[position] = numpy.inf
+        # Partial selection of the k best, then sort only those
+        nearest = numpy.argpartition(distances, k - 1)[:k]
+        nearest = nearest[numpy.argsort(distances[nearest], kind="stable")]
+        return [(self._titles[i], float(numpy.sqrt(max(distances[i], 0.0)))) for i in nearest]
@@ -0,0 +1,235 @@
+import hashlib
+import html
+import json
+import os
+import re
+from bisect import bisect_right
+
+MANIFEST_NAME = ".site_manifest.json"
+SITE_TITLE = "Welcome to GetFlix"
+
+
+def page_name(number):
+    """
+    Returns the file name of a page of the movie grid, the first one being index.html.
+    """
+    return "index.html" if number == 1 else f"page-{number}.html"
+
+
+def movie_page_name(title, info):
+    """
+    Returns the file name of a movie's own page, stable across builds.
+    """
+    imdb_id = info.get('imdb_id', 'N/A')
+    if imdb_id != 'N/A':
+        return f"movies/{imdb_id}.html"
+    slug = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")[:60]
+    digest = hashlib.sha1(title.encode("utf-8")).hexdigest()[:8]
+    return f"movies/{slug}-{digest}.html"
+
+
+def _sort_key(title):
+    return [title.casefold(), title]
+
+
+class SiteGenerator:
+    def __init__(self, output_dir=".", template_path="index_template.html", page_size=50,
+                 movie_pages=False, poster_path=None):
+        """
+        Initializes a static site generator for the whole catalog.
+        The grid is listed by title and split into pages of about page_size
+        movies. Each page covers a title range whose boundaries are kept in a
+        manifest in the output directory, together with content hashes, so adding
+        or deleting a movie only changes the page of its range, and a rebuild
+        only rewrites the pages whose content changed and removes pages that are
+        no longer produced.
+        Args:
+            output_dir (str): Directory the site is written to.
+            template_path (str): HTML template with __TEMPLATE_TITLE__ and
+                __TEMPLATE_MOVIE_GRID__ placeholders.
+            page_size (int): Number of movies per page.
+            movie_pages (bool): Also write one page per movie.
+            poster_path (callable): Optional function mapping a poster URL to the
+                path the site should reference instead, e.g. a local mirror.
+        """
+        self.output_dir = output_dir
+        self.template_path = template_path
+        self.page_size = page_size
+        self.movie_pages = movie_pages
+        self.poster_path = poster_path
+
+    def build(self, movies):
+        """
+        Renders the catalog and writes the pages that changed since the last build.
+        Args:
+            movies (dict): The catalog to render.
+        Returns:
+            dict: Number of pages produced, written, left unchanged and removed.
+        """
+        with open(self.template_path, "r") as template_file:
+            template_content = template_file.read().replace("__TEMPLATE_TITLE__", SITE_TITLE)
+        head, _, tail = template_content.partition("__TEMPLATE_MOVIE_GRID__")
+
+        old_manifest, starts = self._read_manifest()
+        manifest = {}
+        report = {"pages": 0, "written": 0, "unchanged": 0, "removed": 0}
+
+        pages = self._paginate(movies, starts)
+        for number, (_, titles) in enumerate(pages, 1):
+            grid = [self._render_item(title, movies[title]) for title in titles]
+            nav = self._render_nav(number, number < len(pages))
+            self._emit(page_name(number), [head, *grid, tail.replace("</body>", nav + "</body>")],
+                       old_manifest, manifest, report)
+            if self.movie_pages:
+                for title in titles:
+                    self._emit(movie_page_name(title, movies[title]), [self._render_movie_page(title, movies[title])],
+                               old_manifest, manifest, report)
+
+        for name in old_manifest.keys() - manifest.keys():
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+                report["removed"] += 1
+            except FileNotFoundError:
+                pass
+        self._write_manifest(manifest, [start for start, _ in pages[1:]])
+        return report
+
+    def _paginate(self, movies, starts):
+        """
+        Splits the catalog into pages by title range. Movies go to the page of the
+        range they fall in, so the other pages keep their content; a page is only
+        split once it holds more than twice page_size movies, and merged into the
+        previous one once both fit on one page.
+        Args:
+            movies (dict): The catalog.
+            starts (list): Sort keys where pages 2, 3, ... began in the last build,
+                or None to paginate from scratch.
+        Returns:
+            list: (start sort key, sorted titles) per page; there is always one page.
+        """
+        keys = sorted(_sort_key(title) for title in movies)
+        if starts is None:
+            groups, max_size = [(None, [title for _, title in keys])], self.page_size
+        else:
+            groups, max_size = [(None, [])] + [(start, []) for start in starts], 2 * self.page_size
+            for key in keys:
+                groups[bisect_right(starts, key)][1].append(key[1])
+
+        pages = []
+        for start, titles in groups:
+            if not titles:
+                continue
+            if pages and len(pages[-1][1]) + len(titles) <= self.page_size:
+                pages[-1][1].extend(titles)
+            elif len(titles) > max_size:
+                for offset in range(0, len(titles), self.page_size):
+                    chunk = titles[offset:offset + self.page_size]
+                    pages.append((start if offset == 0 else _sort_key(chunk[0]), chunk))
+            else:
+                pages.append((start, titles))
+        return pages or [(None, [])]
+
+    def _emit(self, name, parts, old_manifest, manifest, report):
+        """
+        Writes one file, piece by piece, unless its content hash is unchanged.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+        content_hash = manifest[name] = digest.hexdigest()
+        report["pages"] += 1
+
+        path = os.path.join(self.output_dir, name)
+        if old_manifest.get(name) == content_hash and os.path.exists(path):
+            report["unchanged"] += 1
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as page_file:
+            page_file.writelines(parts)
+        report["written"] += 1
+
+    def _poster(self, info):
+        poster = info.get('poster', 'N/A')
+        if self.poster_path is not None:
+            poster = self.poster_path(poster)
+        return poster
+
+    def _render_item(self, title, info):
+        imdb_id = info.get('imdb_id', 'N/A')
+        if self.movie_pages:
+            link, target = movie_page_name(title, info), ""
+        else:
+            link = f"https://www.imdb.com/title/{imdb_id}/" if imdb_id != 'N/A' else "#"
+            target = ' target="_blank"'
+        notes = " | ".join(info.get('notes', []))
+        return f"""
+<li class="movie-item">
+    <a href="{html.escape(link)}"{target}>
+        <img src="{html.escape(self._poster(info))}" alt="{html.escape(title)} poster" />
+        <div class="tooltip">{html.escape(notes)}</div>
+    </a>
+    <p>{html.escape(title)} - Year: {info['year']} - Rating: {info['rating']:.1f}</p>
+</li>
+"""
+
+    @staticmethod
+    def _render_nav(number, has_next):
+        # Only links to the neighbours, so a page's content doesn't depend on the page count
+        links = []
+        if number > 1:
+            links.append(f'<a href="{page_name(number - 1)}">Previous</a>')
+        if has_next:
+            links.append(f'<a href="{page_name(number + 1)}">Next</a>')
+        return f'<div class="pagination">{" ".join(links)}</div>\n' if links else ""
+
+    def _render_movie_page(self, title, info):
+        imdb_id = info.get('imdb_id', 'N/A')
+        imdb_link = (f'<p><a href="https://www.imdb.com/title/{html.escape(imdb_id)}/" target="_blank">IMDb</a></p>'
+                     if imdb_id != 'N/A' else "")
+        poster = self._poster(info)
+        if "://" not in poster and poster != 'N/A':
+            poster = "../" + poster  # Local posters are relative to the site root
+        notes = "".join(f"<li>{html.escape(note)}</li>" for note in info.get('notes', []))
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>{html.escape(title)}</title>
+    <link rel="stylesheet" href="../style.css"/>
+</head>
+<body>
+<div class="list-movies-title">
+    <h1>{html.escape(title)}</h1>
+</div>
+<div class="movie-item">
+    <img src="{html.escape(poster)}" alt="{html.escape(title)} poster" />
+    <p>Year: {info['year']} - Rating: {info['rating']:.1f}</p>
+    {imdb_link}
+    <ul>{notes}</ul>
+</div>
+</body>
+</html>
+"""
+
+    def _read_manifest(self):
+        """
+        Returns the content hashes by file name and the page start keys of the
+        last build; no start keys for a missing manifest or one from before
+        pages had title ranges.
+        """
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST_NAME), "r") as file:
+                manifest = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}, None
+        if "files" not in manifest:
+            return manifest, None
+        return manifest["files"], manifest["page_starts"]
+
+    def _write_manifest(self, manifest, starts):
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST_NAME), "w") as file:
+                json.dump({"files": manifest, "page_starts": starts}, file)
+        except IOError as e:
+            print(f"Error writing site manifest: {e}")
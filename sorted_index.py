@@ -0,0 +1,197 @@
+from bisect import bisect_left, bisect_right, insort
+
+LOAD = 512  # Target sublist length; sublists are split at twice this size
+
+
+class SortedList:
+    def __init__(self, values=()):
+        """
+        Initializes a sorted list that stays sorted under inserts and removals.
+        Values live in a list of short sorted sublists, with a Fenwick tree over the
+        sublist lengths, so add, remove, positional access and bisection all take
+        O(log n) and a slice of k values costs O(log n + k).
+        Args:
+            values (iterable): Initial values, in any order.
+        """
+        values = sorted(values)
+        self._lists = [values[i:i + LOAD] for i in range(0, len(values), LOAD)]
+        self._maxes = [sublist[-1] for sublist in self._lists]
+        self._len = len(values)
+        self._build_tree()
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for sublist in self._lists:
+            yield from sublist
+
+    def __reversed__(self):
+        for sublist in reversed(self._lists):
+            yield from reversed(sublist)
+
+    def __contains__(self, value):
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            return False
+        sublist = self._lists[i]
+        j = bisect_left(sublist, value)
+        return j < len(sublist) and sublist[j] == value
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedList index out of range")
+        i, j = self._locate(index)
+        return self._lists[i][j]
+
+    def add(self, value):
+        """
+        Inserts a value, keeping the list sorted.
+        """
+        if not self._maxes:
+            self._lists.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            self._build_tree()
+            return
+        i = bisect_right(self._maxes, value)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(value)
+            self._maxes[i] = value
+        else:
+            insort(self._lists[i], value)
+        self._len += 1
+        if len(self._lists[i]) > 2 * LOAD:
+            sublist = self._lists[i]
+            self._lists[i:i + 1] = [sublist[:LOAD], sublist[LOAD:]]
+            self._maxes[i:i + 1] = [sublist[LOAD - 1], sublist[-1]]
+            self._build_tree()
+        else:
+            self._update(i, 1)
+
+    def remove(self, value):
+        """
+        Removes one occurrence of a value.
+        Raises:
+            ValueError: If the value is not in the list.
+        """
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            raise ValueError(f"{value!r} not in SortedList")
+        sublist = self._lists[i]
+        j = bisect_left(sublist, value)
+        if j == len(sublist) or sublist[j] != value:
+            raise ValueError(f"{value!r} not in SortedList")
+        del sublist[j]
+        self._len -= 1
+        if sublist:
+            self._maxes[i] = sublist[-1]
+            self._update(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._build_tree()
+
+    def discard(self, value):
+        """
+        Removes one occurrence of a value if it is present.
+        """
+        try:
+            self.remove(value)
+        except ValueError:
+            pass
+
+    def bisect_left(self, value):
+        """
+        Returns the position where value would be inserted before equal values.
+        """
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            return self._len
+        return self._prefix(i) + bisect_left(self._lists[i], value)
+
+    def bisect_right(self, value):
+        """
+        Returns the position where value would be inserted after equal values.
+        """
+        i = bisect_right(self._maxes, value)
+        if i == len(self._maxes):
+            return self._len
+        return self._prefix(i) + bisect_right(self._lists[i], value)
+
+    def islice(self, start=0, stop=None):
+        """
+        Lazily yields the values at positions [start, stop).
+        """
+        stop = self._len if stop is None else min(stop, self._len)
+        start = max(start, 0)
+        if start >= stop:
+            return
+        i, j = self._locate(start)
+        remaining = stop - start
+        while remaining:
+            sublist = self._lists[i]
+            chunk = sublist[j:j + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            i, j = i + 1, 0
+
+    def irange(self, minimum=None, maximum=None):
+        """
+        Lazily yields the values between minimum and maximum, both inclusive.
+        None leaves that side unbounded.
+        """
+        start = 0 if minimum is None else self.bisect_left(minimum)
+        stop = self._len if maximum is None else self.bisect_right(maximum)
+        return self.islice(start, stop)
+
+    def count_range(self, minimum=None, maximum=None):
+        """
+        Counts the values between minimum and maximum in O(log n).
+        """
+        start = 0 if minimum is None else self.bisect_left(minimum)
+        stop = self._len if maximum is None else self.bisect_right(maximum)
+        return max(stop - start, 0)
+
+    def _build_tree(self):
+        size = len(self._lists)
+        tree = [0] * (size + 1)
+        for i, sublist in enumerate(self._lists, 1):
+            tree[i] += len(sublist)
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, i, delta):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, i):
+        """
+        Returns the number of values in the sublists before sublist i.
+        """
+        total = 0
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, index):
+        """
+        Maps a position to (sublist, offset) by descending the Fenwick tree.
+        """
+        position = 0
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            following = position + step
+            if following < len(self._tree) and self._tree[following] <= index:
+                position = following
+                index -= self._tree[following]
+            step >>= 1
+        return position, index
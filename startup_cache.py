@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+
+from file_lock import atomic_write, file_generation
+
+SNAPSHOT_VERSION = 3  # Bump when the snapshot layout changes
+CHUNK_SIZE = 1 << 20
+
+
+def snapshot_path(source_path):
+    """
+    Returns the path of the startup snapshot kept next to a catalog file.
+    """
+    return f"{source_path}.snapshot"
+
+
+def file_digest(file_path):
+    """
+    Returns the SHA-1 hex digest of a file's content, read in chunks.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _valid_movies(movies):
+    """
+    Checks that a loaded snapshot has the shape of a catalog: movie dicts by
+    title, with the numeric year and rating the indexes are built from.
+    """
+    if not isinstance(movies, dict):
+        return False
+    for details in movies.values():
+        if not isinstance(details, dict):
+            return False
+        year, rating = details.get("year"), details.get("rating")
+        if type(year) is not int or type(rating) not in (int, float):
+            return False
+        notes = details.get("notes")
+        if notes is not None and not (isinstance(notes, list) and all(isinstance(note, str) for note in notes)):
+            return False
+    return True
+
+
+class StartupCache:
+    def __init__(self, source_path):
+        """
+        Initializes the startup cache of a catalog file: a snapshot of the parsed
+        catalog kept next to the file, so a warm start loads the snapshot instead
+        of parsing the file. A snapshot is used only while the file's mtime, size
+        and SHA-1 hash match the ones recorded with it; hashing reads the file far
+        faster than parsing it. The snapshot holds no code, only data: a JSON line
+        describing it, then the movies as compact JSON, which loads in about half
+        the time it takes to parse the CSV rows. Indexes are built from the catalog
+        when first needed, as without a snapshot.
+        Args:
+            source_path (str): The catalog file the snapshot stands in for.
+        """
+        self.source_path = source_path
+        self.file_path = snapshot_path(source_path)
+        self._saved = None  # (mtime_ns, size) of the file the snapshot on disk matches, once known
+
+    def load(self):
+        """
+        Loads the snapshot if it still matches the catalog file. Callers hold the
+        file's lock, so the file can't change while it is checked. Anything
+        unexpected (another version, a changed file, data that isn't a catalog)
+        makes the snapshot unusable rather than trusted.
+        Returns:
+            dict or None: The movies, or None if there is no usable snapshot.
+        """
+        try:
+            stat = os.stat(self.source_path)
+            with open(self.file_path, "rb") as file:
+                header = json.loads(file.readline())
+                if not isinstance(header, dict) or header.get("version") != SNAPSHOT_VERSION:
+                    return None
+                if (header.get("mtime_ns"), header.get("size")) != (stat.st_mtime_ns, stat.st_size):
+                    return None
+                if header.get("digest") != file_digest(self.source_path):
+                    return None
+                movies = json.loads(file.read())
+        except (OSError, ValueError, UnicodeDecodeError, RecursionError):
+            # Missing, truncated or foreign snapshots are simply not used
+            return None
+        if not _valid_movies(movies) or len(movies) != header.get("count"):
+            return None
+        self._saved = (stat.st_mtime_ns, stat.st_size)
+        return movies
+
+    def save(self, movies, generation):
+        """
+        Writes a snapshot of a catalog, provided it matches the catalog file:
+        nothing is written if the file changed since `generation`, or if the
+        snapshot on disk already covers this file.
+        Args:
+            movies (dict): The catalog, as last read from or written to the file.
+            generation (tuple): file_generation() of the file the catalog matches.
+        Returns:
+            bool: True if a snapshot was written.
+        """
+        try:
+            stat = os.stat(self.source_path)
+        except OSError:
+            return False
+        if file_generation(self.source_path) != generation:
+            return False
+        if self._saved == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": file_digest(self.source_path),
+            "count": len(movies),
+        }
+
+        def write(file):
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+            file.write(json.dumps(movies, separators=(",", ":")).encode("utf-8"))
+
+        try:
+            atomic_write(self.file_path, write, mode="wb")
+        except (TypeError, ValueError) as e:
+            # Only plain JSON data can be snapshotted
+            print(f"Can't snapshot '{self.source_path}': {e}")
+            return False
+        except (IOError, OSError) as e:
+            print(f"Error writing startup snapshot: {e}")
+            return False
+        self._saved = (stat.st_mtime_ns, stat.st_size)
+        return True
@@ -0,0 +1,346 @@
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+from array import array
+from contextlib import redirect_stdout
+
+import metrics
+from file_lock import atomic_write
+from istorage import IStorage
+from journal import MovieJournal
+from overlay_catalog import OverlayCatalog
+
+MAGIC = b"GFLX"
+VERSION = 1
+# Magic, version, movie count, then offsets of the string table, the columns and the title directory
+HEADER = struct.Struct("<4sHxxIQQQ")
+STRING_REF = struct.Struct("<QI")  # Offset into the file and byte length
+STRING_FIELDS = ("title", "poster", "imdb_id", "notes")
+
+
+def write_catalog(file_path, movies):
+    """
+    Writes movies to a binary catalog file, streaming them in one pass.
+    Layout: header, string table (UTF-8 strings back to back), fixed-width
+    columns (year and rating in tenths as uint16, then one (offset, length)
+    reference column per string field) and a title directory listing the
+    record numbers sorted by title, for binary search.
+    Args:
+        file_path (str): Path of the file to write; written to a temp file and swapped in.
+        movies (dict): Catalog to write, any mapping of title -> details.
+    """
+    def write(file):
+        years = array("H")
+        ratings = array("H")
+        refs = {field: (array("Q"), array("I")) for field in STRING_FIELDS}
+        titles = []
+        pooled = {}  # Poster and IMDb strings are often repeated, store them once
+
+        file.write(b"\0" * HEADER.size)
+        strings_offset = position = HEADER.size
+        for title, details in movies.items():
+            years.append(int(details.get("year", 0)))
+            ratings.append(int(round(float(details.get("rating", 0)) * 10)))
+            notes = details.get("notes")
+            values = {
+                "title": title,
+                "poster": details.get("poster", "N/A"),
+                "imdb_id": details.get("imdb_id", "N/A"),
+                "notes": json.dumps(notes) if notes else "",
+            }
+            for field in STRING_FIELDS:
+                encoded = values[field].encode("utf-8")
+                offset = pooled.get(encoded) if field in ("poster", "imdb_id") else None
+                if offset is None:
+                    offset = position
+                    file.write(encoded)
+                    position += len(encoded)
+                    if field in ("poster", "imdb_id") and len(pooled) < 1_000_000:
+                        pooled[encoded] = offset
+                refs[field][0].append(offset)
+                refs[field][1].append(len(encoded))
+                if field == "title":
+                    titles.append(encoded)
+
+        columns_offset = position
+        file.write(years.tobytes())
+        file.write(ratings.tobytes())
+        for field in STRING_FIELDS:
+            offsets, lengths = refs[field]
+            file.write(b"".join(STRING_REF.pack(offset, length) for offset, length in zip(offsets, lengths)))
+        directory_offset = file.tell()
+        file.write(array("I", sorted(range(len(titles)), key=titles.__getitem__)).tobytes())
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, len(titles), strings_offset, columns_offset, directory_offset))
+
+    atomic_write(file_path, write, mode="wb")
+    metrics.count_file("file_bytes_written", file_path, storage="binary")
+
+
+class BinaryCatalog(OverlayCatalog):
+    def __init__(self, file_path):
+        """
+        Initializes a catalog over a memory-mapped binary catalog file.
+        Opening only reads the header; lookups binary-search the title directory
+        and decode just the record they need.
+        Args:
+            file_path (str): Path to the binary catalog file.
+        """
+        super().__init__()
+        self.file_path = file_path
+        self._file = None
+        self._map = None
+        self._count = 0
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return
+
+        self._file = open(file_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, _, columns_offset, directory_offset = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{file_path}' is not a version {VERSION} movie catalog")
+        self._count = count
+        self._years_offset = columns_offset
+        self._ratings_offset = columns_offset + 2 * count
+        self._refs_offset = columns_offset + 4 * count
+        self._directory_offset = directory_offset
+
+    def _string(self, field, record):
+        base = self._refs_offset + STRING_FIELDS.index(field) * STRING_REF.size * self._count
+        offset, length = STRING_REF.unpack_from(self._map, base + record * STRING_REF.size)
+        return self._map[offset:offset + length]
+
+    def _find(self, title):
+        """
+        Binary-searches the title directory.
+        Returns:
+            int or None: The record number of the title.
+        """
+        if not self._count:
+            return None
+        wanted = title.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            record = struct.unpack_from("<I", self._map, self._directory_offset + 4 * middle)[0]
+            if self._string("title", record) < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            record = struct.unpack_from("<I", self._map, self._directory_offset + 4 * low)[0]
+            if self._string("title", record) == wanted:
+                return record
+        return None
+
+    def _base_titles(self):
+        for record in range(self._count):
+            yield self._string("title", record).decode("utf-8")
+
+    def _base_contains(self, title):
+        return self._find(title) is not None
+
+    def _base_len(self):
+        return self._count
+
+    def _base_get(self, title):
+        record = self._find(title)
+        details = {
+            "year": struct.unpack_from("<H", self._map, self._years_offset + 2 * record)[0],
+            "rating": struct.unpack_from("<H", self._map, self._ratings_offset + 2 * record)[0] / 10,
+            "poster": self._string("poster", record).decode("utf-8"),
+            "imdb_id": self._string("imdb_id", record).decode("utf-8"),
+        }
+        notes = self._string("notes", record)
+        if notes:
+            details["notes"] = json.loads(notes)
+        return details
+
+    def close(self):
+        """
+        Unmaps the catalog file.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+
+class StorageBinary(IStorage):
+    def __init__(self, file_path, journal=False):
+        """
+        Initializes the StorageBinary with the specified file path.
+        The catalog file is memory-mapped and never parsed as a whole.
+        Args:
+            file_path (str): Path to the binary catalog file.
+            journal (bool): Record mutations in an append-only journal next to the file
+                instead of rewriting the whole file on every change.
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.movie_list = self.read_storage()
+        self._journal = None
+        if journal:
+            self._journal = MovieJournal(f"{file_path}.journal")
+            self._journal.replay(self.movie_list)
+
+    def read_storage(self):
+        """
+        Opens the binary catalog file.
+        Returns:
+            BinaryCatalog: Dictionary-like view of the movies.
+        """
+        return BinaryCatalog(self.file_path)
+
+    def write_storage(self):
+        """
+        Rewrites the binary catalog file with the current movie list.
+        """
+        if self._write_snapshot(self.movie_list):
+            if self._journal is not None:
+                self._journal.reset()
+            old_catalog = self.movie_list
+            self.movie_list = BinaryCatalog(self.file_path)
+            old_catalog.close()
+
+    def _write_snapshot(self, movies):
+        """
+        Writes a catalog snapshot to a temporary file and swaps it in.
+        Returns:
+            bool: True if the snapshot was written.
+        """
+        try:
+            write_catalog(self.file_path, movies)
+            return True
+        except (IOError, OSError) as e:
+            print(f"Error writing to binary catalog: {e}")
+            return False
+
+    def _persist(self, titles):
+        """
+        Persists changes to the given titles: one journal append in journal mode,
+        otherwise a full rewrite of the file.
+        Args:
+            titles (list): The titles that were added, changed or deleted.
+        """
+        if self._journal is None:
+            self.write_storage()
+            return
+        self._journal.record([(title, self.movie_list.get(title)) for title in titles])
+        if self._journal.needs_compaction(len(self.movie_list)):
+            self._journal.compact(self.movie_list, self._write_snapshot)
+
+    def list_movies(self):
+        """
+        List all movies from the storage.
+        Returns:
+            BinaryCatalog: Dictionary-like view of the movies.
+        """
+        return self.movie_list
+
+    def add_movie(self, title, year, rating, poster, imdb_id):
+        """
+        Add a new movie to the storage.
+        Args:
+            title (str): Movie title.
+            year (int): Movie release year.
+            rating (float): Movie rating.
+            poster (str): URL of the movie poster.
+            imdb_id (str): IMDb ID of the movie.
+        """
+        if title in self.movie_list:
+            print(f"Movie '{title}' already exists!")
+            return
+
+        self.movie_list[title] = {
+            "year": year,
+            "rating": round(rating, 1),
+            "poster": poster,
+            "imdb_id": imdb_id
+        }
+        details = self.movie_list[title]
+        self._notify(title, None, details)
+        self._commit(title)
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from the storage.
+        Args:
+            title (str): Movie title to delete.
+        """
+        if title in self.movie_list:
+            old = self.movie_list.pop(title)
+            self._notify(title, old, None)
+            self._commit(title)
+            print(f"Movie '{title}' deleted successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, note):
+        """
+        Updates a movie's information by adding a note, then saves the catalog.
+        Args:
+            title (str): Movie title to update.
+            note (str): The note to add to the movie.
+        """
+        if title in self.movie_list:
+            details = self.movie_list[title]
+            old = {**details, "notes": list(details.get("notes", []))}
+            details.setdefault("notes", []).append(note)
+            self._notify(title, old, details)
+            self._commit(title)
+            print(f"Note added to '{title}' successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_rating(self, title, rating):
+        """
+        Replaces a movie's rating, then saves the catalog.
+        Args:
+            title (str): Movie title to update.
+            rating (float): The new rating.
+        Returns:
+            bool: True if the movie exists.
+        """
+        if title not in self.movie_list:
+            print(f"Movie '{title}' not found.")
+            return False
+        details = self.movie_list[title]
+        old = dict(details)
+        details["rating"] = round(rating, 1)
+        self._notify(title, old, details)
+        self._commit(title)
+        return True
+
+
+def main():
+    from main import STORAGE_BACKENDS, create_storage
+
+    parser = argparse.ArgumentParser(description="Convert between binary catalogs and the other storage formats.")
+    parser.add_argument("direction", choices=["import", "export"],
+                        help="import: other format -> binary, export: binary -> other format")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--format", choices=sorted(set(STORAGE_BACKENDS) - {"binary"}), default="json",
+                        help="The non-binary side's storage format")
+    args = parser.parse_args()
+
+    if args.direction == "import":
+        write_catalog(args.target, create_storage(args.format, args.source).list_movies())
+    else:
+        target = create_storage(args.format, args.target)
+        # The storages report every single add and note, keep the output to one line
+        with target.batch(), redirect_stdout(io.StringIO()):
+            for title, details in BinaryCatalog(args.source).items():
+                target.add_movie(title, details["year"], details["rating"], details["poster"], details["imdb_id"])
+                for note in details.get("notes", []):
+                    target.update_movie(title, note)
+    print(f"Converted '{args.source}' to '{args.target}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,214 @@
 import csv
+import io
+import json
+import metrics
+from compact_catalog import CompactCatalog
+from file_lock import FileLock, atomic_write, file_generation
 from istorage import IStorage
+from journal import MovieJournal
+from lazy_csv import LazyCsvCatalog
+from startup_cache import StartupCache
+
+FIELDNAMES = ['title', 'year', 'rating', 'poster', 'imdb_id', 'notes']  # Notes are a JSON-encoded list
 
 
 class StorageCsv(IStorage):
-    def __init__(self, file_path):
+    def __init__(self, file_path, journal=False, compact=False, lazy=False, startup_cache=False):
         """
         Initializes the StorageCsv with the specified file path.
+        Several processes can share the file: saves hold an advisory lock and
+        replace the file atomically, and refresh() reloads it only when its
+        generation changed.
         Args:
             file_path (str): Path to the CSV file to store movie data.
+            journal (bool): Record mutations in an append-only journal next to the file
+                instead of rewriting the whole file on every change.
+            compact (bool): Keep the movies in a memory-compact CompactCatalog
+                instead of a dict of dicts.
+            lazy (bool): Memory-map the file and decode rows only when they are
+                accessed, using a title -> offset index persisted next to the file.
+            startup_cache (bool): Load the catalog from a snapshot next to the
+                file while it still matches the file; save_startup_cache() writes it.
+                Not used with journal, compact or lazy.
         """
+        super().__init__()
         self.file_path = file_path
-        self.movie_list = self.read_storage()  # Load the movie data upon initialization
+        self._compact = compact
+        self._lazy = lazy
+        self._lock = FileLock(file_path)
+        self._generation = None  # Version of the file the catalog was read from or last saved as
+        if startup_cache and not (journal or compact or lazy):
+            self._startup_cache = StartupCache(file_path)
+            self.movie_list = self._read_startup_cache("csv")
+        else:
+            self.movie_list = self.read_storage()  # Load the movie data upon initialization
+        self._journal = None
+        if journal:
+            self._journal = MovieJournal(f"{file_path}.journal")
+            self._journal.replay(self.movie_list)
 
     def read_storage(self):
         """
         Reads data from the CSV storage file and returns a dictionary of movies.
         """
-        movie_list = {}
+        with self._lock.shared():
+            self._generation = file_generation(self.file_path)
+            if self._lazy:
+                return LazyCsvCatalog(self.file_path, self._decode_row)
+            return self._read_rows()
+
+    def _read_rows(self):
+        """
+        Parses every row of the CSV file.
+        """
+        movie_list = CompactCatalog() if self._compact else {}
         try:
-            with open(self.file_path, mode='r', newline='') as file:
+            with open(self.file_path, mode='r', newline='', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
                 for row in reader:
-                    # Check if all required columns are present
-                    if 'title' in row and 'rating' in row and 'year' in row:
-                        movie_list[row['title']] = {
-                            'year': int(row.get('year', 0)),  # Handle missing year
-                            'rating': float(row.get('rating', 0)),  # Handle missing rating
-                            'poster': row.get('poster', 'N/A'),
-                            'imdb_id': row.get('imdb_id', 'N/A')
-                        }
-                    else:
-                        print(f"Missing expected fields in row: {row}")
+                    # Only the title is required, other missing fields get defaults
+                    if not row.get('title'):
+                        print(f"Skipping row without a title: {row}")
+                        continue
+                    try:
+                        movie_list[row['title']] = self._decode_row(row)
+                    except ValueError as e:
+                        print(f"Skipping invalid row for '{row['title']}': {e}")
+            metrics.count_file("file_bytes_read", self.file_path, storage="csv")
         except FileNotFoundError:
             print(f"File '{self.file_path}' not found. Creating a new CSV file.")
-        except KeyError as e:
-            print(f"Error: Missing expected field {e} in the CSV file.")
         return movie_list
 
+    @staticmethod
+    def _decode_row(row):
+        """
+        Converts a CSV row into the movie's details. Missing or empty fields get
+        defaults, so files written before a column existed still load.
+        Raises:
+            ValueError: If the year, rating or notes can't be parsed.
+        """
+        details = {
+            'year': int(row.get('year') or 0),  # Handle missing year
+            'rating': float(row.get('rating') or 0),  # Handle missing rating
+            'poster': row.get('poster') or 'N/A',
+            'imdb_id': row.get('imdb_id') or 'N/A'
+        }
+        if row.get('notes'):
+            details['notes'] = json.loads(row['notes'])
+        return details
+
     def write_storage(self):
         """
         Writes the current movie list to the CSV storage file.
         """
+        with self._lock:
+            index = self._write_snapshot(self.movie_list)
+            if index and self._journal is not None:
+                # A full rewrite folds the journal into the file
+                self._journal.reset()
+            if index and self._lazy:
+                # Re-map the new file, using the offsets recorded while writing it
+                old_catalog = self.movie_list
+                self.movie_list = LazyCsvCatalog(self.file_path, self._decode_row, *index)
+                old_catalog.close()
+
+    def refresh(self):
+        """
+        Reloads the catalog if another process saved the file since it was read.
+        Costs one stat call when nothing changed. Journal mode keeps the file to
+        itself, and nothing is reloaded while a batch is open.
+        Returns:
+            bool: True if the catalog was reloaded.
+        """
+        if self._journal is not None or self._batch_depth:
+            return False
+        if file_generation(self.file_path) == self._generation:
+            return False
+        old_catalog = self.movie_list
+        self.movie_list = self.read_storage()
+        self._notify_differences(old_catalog, self.movie_list)
+        if self._lazy:
+            old_catalog.close()
+        return True
+
+    def _write_snapshot(self, movies):
+        """
+        Writes a catalog snapshot to a temporary file and swaps it in, so a crash
+        mid-write never leaves a truncated snapshot behind the journal.
+        Args:
+            movies (dict): Catalog to write.
+        Returns:
+            tuple or bool: (header, offsets) of the written rows in lazy mode, otherwise
+            True if the snapshot was written; False on failure.
+        """
+        written = []
         try:
-            with open(self.file_path, mode='w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=['title', 'year', 'rating', 'poster', 'imdb_id'])
-                writer.writeheader()
-                for title, details in self.movie_list.items():
-                    writer.writerow({
-                        'title': title,
-                        'year': details.get('year', 0),
-                        'rating': details.get('rating', 0),
-                        'poster': details.get('poster', 'N/A'),
-                        'imdb_id': details.get('imdb_id', 'N/A')
-                    })
+            with self._lock:
+                atomic_write(self.file_path,
+                             lambda file: written.append(self._write_rows(file, movies, track_offsets=self._lazy)),
+                             newline='', encoding='utf-8')
+                self._generation = file_generation(self.file_path)
+            offsets = written[0]
+            metrics.count_file("file_bytes_written", self.file_path, storage="csv")
+            if self._lazy:
+                return FIELDNAMES, offsets
+            return True
         except IOError as e:
             print(f"Error writing to CSV file: {e}")
+            return False
+
+    @staticmethod
+    def _write_rows(file, movies, track_offsets=False):
+        """
+        Writes the header and one row per movie to a UTF-8 text file.
+        Args:
+            file: The open file.
+            movies (dict): Catalog to write.
+            track_offsets (bool): Also record where each row ends up in the file.
+        Returns:
+            dict or None: Title -> (byte offset, byte length) of its row, if tracked.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(FIELDNAMES)
+        offsets = {} if track_offsets else None
+        position = 0
+        for title, details in movies.items():
+            line = buffer.getvalue()
+            file.write(line)
+            position += len(line.encode('utf-8')) if track_offsets else 0
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([
+                title,
+                details.get('year', 0),
+                details.get('rating', 0),
+                details.get('poster', 'N/A'),
+                details.get('imdb_id', 'N/A'),
+                json.dumps(list(details['notes'])) if details.get('notes') else ''
+            ])
+            if track_offsets:
+                offsets[title] = (position, len(buffer.getvalue().encode('utf-8')))
+        file.write(buffer.getvalue())
+        return offsets
+
+    def _persist(self, titles):
+        """
+        Persists changes to the given titles: one journal append in journal mode,
+        otherwise a full rewrite of the file.
+        Args:
+            titles (list): The titles that were added, changed or deleted.
+        """
+        if self._journal is None:
+            with self._lock:
+                if file_generation(self.file_path) != self._generation:
+                    # Another process saved the file since we read it: keep its changes too
+                    self._merge_changes(titles)
+                self.write_storage()
+            return
+        self._journal.record([(title, self.movie_list.get(title)) for title in titles])
+        if self._journal.needs_compaction(len(self.movie_list)):
+            self._journal.compact(self.movie_list, self._write_snapshot)
 
     def list_movies(self):
         """
@@ -84,7 +238,8 @@ class StorageCsv(IStorage):
             'poster': poster,
             'imdb_id': imdb_id
         }
-        self.write_storage()
+        self._notify(title, None, self.movie_list[title])
+        self._commit(title)
 
     def delete_movie(self, title):
         """
@@ -93,8 +248,9 @@ class StorageCsv(IStorage):
             title (str): Movie title to delete.
         """
         if title in self.movie_list:
-            del self.movie_list[title]
-            self.write_storage()
+            old = self.movie_list.pop(title)
+            self._notify(title, old, None)
+            self._commit(title)
             print(f"Movie '{title}' deleted successfully.")
         else:
             print(f"Movie '{title}' not found.")
@@ -107,10 +263,32 @@ class StorageCsv(IStorage):
             note (str): The note to add to the movie.
         """
         if title in self.movie_list:
+            details = self.movie_list[title]
+            old = {**details, "notes": list(details.get("notes", []))}
             if 'notes' not in self.movie_list[title]:
                 self.movie_list[title]['notes'] = []
             self.movie_list[title]['notes'].append(note)
-            self.write_storage()
+            self._notify(title, old, self.movie_list[title])
+            self._commit(title)
             print(f"Note added to '{title}' successfully.")
         else:
             print(f"Movie '{title}' not found.")
+
+    def update_rating(self, title, rating):
+        """
+        Replaces a movie's rating, then saves the catalog.
+        Args:
+            title (str): Movie title to update.
+            rating (float): The new rating.
+        Returns:
+            bool: True if the movie exists.
+        """
+        if title not in self.movie_list:
+            print(f"Movie '{title}' not found.")
+            return False
+        details = self.movie_list[title]
+        old = dict(details)
+        details['rating'] = round(rating, 1)
+        self._notify(title, old, details)
+        self._commit(title)
+        return True
@@ -1,16 +1,35 @@
 import json
+import metrics
+from compact_catalog import CompactCatalog
+from file_lock import FileLock, atomic_write, file_generation, move_aside
 from istorage import IStorage
+from journal import MovieJournal
 
 
 class StorageJson(IStorage):
-    def __init__(self, file_path):
+    def __init__(self, file_path, journal=False, compact=False):
         """
         Initializes the StorageJson with the specified file path.
+        Several processes can share the file: saves hold an advisory lock and
+        replace the file atomically, and refresh() reloads it only when its
+        generation changed.
         Args:
             file_path (str): Path to the JSON file to store movie data.
+            journal (bool): Record mutations in an append-only journal next to the file
+                instead of rewriting the whole file on every change.
+            compact (bool): Keep the movies in a memory-compact CompactCatalog
+                instead of a dict of dicts.
         """
+        super().__init__()
         self.file_path = file_path
+        self._compact = compact
+        self._lock = FileLock(file_path)
+        self._generation = None  # Version of the file the catalog was read from or last saved as
         self.movie_list = self.read_storage()  # Load the movie data upon initialization
+        self._journal = None
+        if journal:
+            self._journal = MovieJournal(f"{file_path}.journal")
+            self._journal.replay(self.movie_list)
 
     def read_storage(self):
         """
@@ -18,21 +37,109 @@ class StorageJson(IStorage):
         Returns:
             dict: Dictionary of movies.
         """
-        try:
-            with open(self.file_path, "r") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}  # Return an empty dictionary if the file doesn't exist or is corrupted
+        with self._lock.shared():
+            self._generation = file_generation(self.file_path)
+            try:
+                with open(self.file_path, "r") as file:
+                    movies = json.load(file)
+                metrics.count_file("file_bytes_read", self.file_path, storage="json")
+            except FileNotFoundError:
+                movies = {}  # Start empty if the file doesn't exist yet
+            except json.JSONDecodeError as e:
+                # Keep the damaged file for inspection instead of overwriting it on the next save
+                movies = {}
+                self._generation = None
+                try:
+                    print(f"JSON file '{self.file_path}' is corrupted ({e}), "
+                          f"moved it to '{move_aside(self.file_path)}'. Starting with an empty catalog.")
+                except OSError as move_error:
+                    print(f"JSON file '{self.file_path}' is corrupted ({e}) and could not be moved: {move_error}")
+        if not self._compact:
+            return movies
+        catalog = CompactCatalog()
+        for title, details in movies.items():
+            try:
+                catalog[title] = details
+            except (TypeError, ValueError) as e:
+                print(f"Skipping invalid movie '{title}': {e}")
+        return catalog
 
     def write_storage(self):
         """
         Write the current movie list to the JSON storage file.
         """
+        with self._lock:
+            # A full rewrite folds the journal into the file
+            if self._write_snapshot(self.movie_list) and self._journal is not None:
+                self._journal.reset()
+
+    def refresh(self):
+        """
+        Reloads the catalog if another process saved the file since it was read.
+        Costs one stat call when nothing changed. Journal mode keeps the file to
+        itself, and nothing is reloaded while a batch is open.
+        Returns:
+            bool: True if the catalog was reloaded.
+        """
+        if self._journal is not None or self._batch_depth:
+            return False
+        if file_generation(self.file_path) == self._generation:
+            return False
+        old_catalog = self.movie_list
+        self.movie_list = self.read_storage()
+        self._notify_differences(old_catalog, self.movie_list)
+        return True
+
+    def _write_snapshot(self, movies):
+        """
+        Writes a catalog snapshot to a temporary file and swaps it in, so a crash
+        mid-write never leaves a truncated snapshot behind the journal.
+        Args:
+            movies (dict): Catalog to write.
+        Returns:
+            bool: True if the snapshot was written.
+        """
         try:
-            with open(self.file_path, "w") as file:
-                json.dump(self.movie_list, file, indent=4)
+            with self._lock:
+                atomic_write(self.file_path, lambda file: self._dump(movies, file))
+                self._generation = file_generation(self.file_path)
+            metrics.count_file("file_bytes_written", self.file_path, storage="json")
+            return True
         except IOError as e:
             print(f"Error writing to JSON file: {e}")
+            return False
+
+    @staticmethod
+    def _dump(movies, file):
+        """
+        Writes the catalog as indented JSON, one movie at a time, so any mapping
+        of movies (not only a dict) can be written without copying it first.
+        """
+        file.write("{")
+        first = True
+        for title, details in movies.items():
+            file.write(("\n    " if first else ",\n    ") + json.dumps(title) + ": "
+                       + json.dumps(dict(details), indent=4).replace("\n", "\n    "))
+            first = False
+        file.write("}" if first else "\n}")
+
+    def _persist(self, titles):
+        """
+        Persists changes to the given titles: one journal append in journal mode,
+        otherwise a full rewrite of the file.
+        Args:
+            titles (list): The titles that were added, changed or deleted.
+        """
+        if self._journal is None:
+            with self._lock:
+                if file_generation(self.file_path) != self._generation:
+                    # Another process saved the file since we read it: keep its changes too
+                    self._merge_changes(titles)
+                self.write_storage()
+            return
+        self._journal.record([(title, self.movie_list.get(title)) for title in titles])
+        if self._journal.needs_compaction(len(self.movie_list)):
+            self._journal.compact(self.movie_list, self._write_snapshot)
 
     def list_movies(self):
         """
@@ -62,7 +169,8 @@ class StorageJson(IStorage):
             "poster": poster,
             "imdb_id": imdb_id
         }
-        self.write_storage()
+        self._notify(title, None, self.movie_list[title])
+        self._commit(title)
 
     def delete_movie(self, title):
         """
@@ -71,8 +179,9 @@ class StorageJson(IStorage):
             title (str): Movie title to delete.
         """
         if title in self.movie_list:
-            del self.movie_list[title]
-            self.write_storage()
+            old = self.movie_list.pop(title)
+            self._notify(title, old, None)
+            self._commit(title)
             print(f"Movie '{title}' deleted successfully.")
         else:
             print(f"Movie '{title}' not found.")
@@ -85,10 +194,32 @@ class StorageJson(IStorage):
             note (str): The note to add to the movie.
         """
         if title in self.movie_list:
+            details = self.movie_list[title]
+            old = {**details, "notes": list(details.get("notes", []))}
             if 'notes' not in self.movie_list[title]:
                 self.movie_list[title]['notes'] = []
             self.movie_list[title]['notes'].append(note)
-            self.write_storage()
+            self._notify(title, old, self.movie_list[title])
+            self._commit(title)
             print(f"Note added to '{title}' successfully.")
         else:
             print(f"Movie '{title}' not found.")
+
+    def update_rating(self, title, rating):
+        """
+        Replaces a movie's rating, then saves the catalog.
+        Args:
+            title (str): Movie title to update.
+            rating (float): The new rating.
+        Returns:
+            bool: True if the movie exists.
+        """
+        if title not in self.movie_list:
+            print(f"Movie '{title}' not found.")
+            return False
+        details = self.movie_list[title]
+        old = dict(details)
+        details["rating"] = round(rating, 1)
+        self._notify(title, old, details)
+        self._commit(title)
+        return True
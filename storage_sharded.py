@@ -0,0 +1,329 @@
+import json
+import os
+import zlib
+from collections.abc import MutableMapping
+
+import metrics
+from file_lock import atomic_write
+from istorage import IStorage
+from storage_json import StorageJson
+
+MANIFEST_NAME = "manifest.json"
+DIRECTORY_NAME = "titles.json"
+MANIFEST_VERSION = 1
+PARTITIONS = ("hash", "year")
+
+
+def _read_shard(file_path):
+    """
+    Parses one shard file; module level so a process pool can run it.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+class ShardedCatalog(MutableMapping):
+    def __init__(self, storage):
+        """
+        Dictionary-like view of a sharded catalog. Looking up a title loads only
+        its shard; iterating loads every shard, in parallel where worthwhile.
+        """
+        self._storage = storage
+
+    def __getitem__(self, title):
+        shard = self._storage._locate(title)
+        if shard is None:
+            raise KeyError(title)
+        return self._storage._shard(shard)[title]
+
+    def __contains__(self, title):
+        return self._storage._locate(title) is not None
+
+    def __setitem__(self, title, details):
+        storage = self._storage
+        shard = storage._locate(title)
+        if shard is not None and shard == storage._shard_for(title, details.get("year", 0)):
+            storage._shard(shard)[title] = details
+            storage._dirty.add(shard)
+            return
+        if shard is not None:
+            # A new year moves the movie to another shard of a year-partitioned catalog
+            storage._remove(shard, title)
+        storage._insert(title, details)
+
+    def __delitem__(self, title):
+        shard = self._storage._locate(title)
+        if shard is None:
+            raise KeyError(title)
+        self._storage._remove(shard, title)
+
+    def __iter__(self):
+        self._storage._load_all()
+        for name in self._storage.shard_names():
+            yield from list(self._storage._shard(name))
+
+    def __len__(self):
+        return sum(self._storage.manifest["counts"].values())
+
+    def __repr__(self):
+        return f"ShardedCatalog({len(self)} movies in {len(self._storage.shard_names())} shards)"
+
+
+class StorageSharded(IStorage):
+    def __init__(self, directory, shards=16, partition="hash", max_workers=None, parallel_bytes=8 * 2 ** 20):
+        """
+        Initializes the StorageSharded over a directory of JSON shard files.
+        Movies are partitioned by a CRC32 hash of the title into a fixed number of
+        shards, or into one shard per release year. A small manifest records the
+        layout and the movie count of every shard, so opening the catalog reads no
+        shard at all; a shard is loaded when one of its movies is needed and only
+        the shards a change touched are rewritten.
+        Args:
+            directory (str): Directory holding the manifest and the shard files.
+            shards (int): Number of hash shards for a new catalog.
+            partition (str): "hash" or "year", for a new catalog. An existing
+                catalog keeps the layout recorded in its manifest.
+            max_workers (int): Processes used to parse shards for full scans.
+            parallel_bytes (int): Full scans smaller than this are read in-process,
+                where starting a process pool would cost more than it saves.
+        """
+        super().__init__()
+        if partition not in PARTITIONS:
+            raise ValueError(f"partition must be one of {', '.join(PARTITIONS)}")
+        self.file_path = directory
+        self.max_workers = max_workers
+        self.parallel_bytes = parallel_bytes
+        self._loaded = {}  # Shard name -> movies of the loaded shards
+        self._dirty = set()  # Shards changed since they were last written
+        self._directory = None  # Title -> shard, kept for year partitioning only
+        self.manifest = self._read_manifest() or {
+            "version": MANIFEST_VERSION, "partition": partition, "shards": shards, "counts": {},
+        }
+        self.movie_list = ShardedCatalog(self)
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.file_path, MANIFEST_NAME), "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"'{self.file_path}' is not a version {MANIFEST_VERSION} sharded catalog")
+        return manifest
+
+    def shard_names(self):
+        """
+        Lists the shards that hold movies, in a stable order.
+        """
+        return sorted(name for name, count in self.manifest["counts"].items() if count)
+
+    def _shard_path(self, name):
+        return os.path.join(self.file_path, f"{name}.json")
+
+    def _shard_for(self, title, year):
+        if self.manifest["partition"] == "year":
+            return f"year-{int(year):04d}"
+        return f"shard-{zlib.crc32(title.encode('utf-8')) % self.manifest['shards']:03d}"
+
+    def _titles(self):
+        """
+        Returns the title -> shard directory of a year-partitioned catalog.
+        """
+        if self._directory is None:
+            try:
+                with open(os.path.join(self.file_path, DIRECTORY_NAME), "r", encoding="utf-8") as file:
+                    self._directory = json.load(file)
+            except FileNotFoundError:
+                self._directory = {}
+        return self._directory
+
+    def _locate(self, title):
+        """
+        Finds the shard holding a title.
+        Returns:
+            str or None: The shard name, or None if the title isn't stored.
+        """
+        if self.manifest["partition"] == "year":
+            return self._titles().get(title)
+        shard = self._shard_for(title, 0)
+        return shard if title in self._shard(shard) else None
+
+    def _shard(self, name):
+        """
+        Returns the movies of a shard, reading its file on first use.
+        """
+        movies = self._loaded.get(name)
+        if movies is None:
+            movies = self._loaded[name] = _read_shard(self._shard_path(name))
+            metrics.count_file("file_bytes_read", self._shard_path(name), storage="sharded")
+        return movies
+
+    def _load_all(self):
+        """
+        Loads every shard not loaded yet, parsing them in a process pool when
+        there is enough data to make it worthwhile.
+        """
+        missing = [name for name in self.shard_names() if name not in self._loaded]
+        paths = [self._shard_path(name) for name in missing]
+        size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        if len(missing) > 1 and size >= self.parallel_bytes and self.max_workers != 1:
+            from concurrent.futures import ProcessPoolExecutor  # Only large scans need it, so not at startup
+
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                for name, movies in zip(missing, pool.map(_read_shard, paths)):
+                    self._loaded[name] = movies
+            for path in paths:
+                metrics.count_file("file_bytes_read", path, storage="sharded")
+        else:
+            for name in missing:
+                self._shard(name)  # Counts the bytes it reads
+
+    def _insert(self, title, details):
+        shard = self._shard_for(title, details.get("year", 0))
+        self._shard(shard)[title] = details
+        self.manifest["counts"][shard] = self.manifest["counts"].get(shard, 0) + 1
+        if self.manifest["partition"] == "year":
+            self._titles()[title] = shard
+        self._dirty.add(shard)
+
+    def _remove(self, shard, title):
+        details = self._shard(shard).pop(title)
+        self.manifest["counts"][shard] -= 1
+        if self.manifest["partition"] == "year":
+            del self._titles()[title]
+        self._dirty.add(shard)
+        return details
+
+    def read_storage(self):
+        """
+        Reads every shard.
+        Returns:
+            dict: Dictionary of movies.
+        """
+        self._load_all()
+        movies = {}
+        for name in self.shard_names():
+            movies.update(self._shard(name))
+        return movies
+
+    def write_storage(self):
+        """
+        Writes the shards changed since the last write, then the manifest.
+        """
+        try:
+            os.makedirs(self.file_path, exist_ok=True)
+            for name in sorted(self._dirty):
+                if self.manifest["counts"].get(name):
+                    atomic_write(self._shard_path(name), lambda file: StorageJson._dump(self._loaded[name], file),
+                                 encoding="utf-8")
+                    metrics.count_file("file_bytes_written", self._shard_path(name), storage="sharded")
+                else:
+                    # An emptied shard is removed rather than kept as "{}"
+                    self.manifest["counts"].pop(name, None)
+                    if os.path.exists(self._shard_path(name)):
+                        os.remove(self._shard_path(name))
+            if self.manifest["partition"] == "year" and self._dirty:
+                atomic_write(os.path.join(self.file_path, DIRECTORY_NAME),
+                             lambda file: json.dump(self._titles(), file), encoding="utf-8")
+            self._dirty.clear()
+            atomic_write(os.path.join(self.file_path, MANIFEST_NAME),
+                         lambda file: json.dump(self.manifest, file, indent=4), encoding="utf-8")
+        except (IOError, OSError) as e:
+            print(f"Error writing sharded catalog: {e}")
+
+    def list_movies(self):
+        """
+        List all movies from the storage.
+        Returns:
+            ShardedCatalog: Dictionary-like view of the movies.
+        """
+        return self.movie_list
+
+    def count_movies(self):
+        """
+        Count the movies in the storage, from the manifest.
+        Returns:
+            int: Number of stored movies.
+        """
+        return len(self.movie_list)
+
+    def add_movie(self, title, year, rating, poster, imdb_id):
+        """
+        Add a new movie to the storage.
+        Args:
+            title (str): Movie title.
+            year (int): Movie release year.
+            rating (float): Movie rating.
+            poster (str): URL of the movie poster.
+            imdb_id (str): IMDb ID of the movie.
+        """
+        if title in self.movie_list:
+            print(f"Movie '{title}' already exists!")
+            return
+
+        self._insert(title, {
+            "year": year,
+            "rating": round(rating, 1),
+            "poster": poster,
+            "imdb_id": imdb_id
+        })
+        self._notify(title, None, self.movie_list[title])
+        self._commit(title)
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from the storage.
+        Args:
+            title (str): Movie title to delete.
+        """
+        shard = self._locate(title)
+        if shard is not None:
+            old = self._remove(shard, title)
+            self._notify(title, old, None)
+            self._commit(title)
+            print(f"Movie '{title}' deleted successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, note):
+        """
+        Updates a movie's information by adding a note, then saves its shard.
+        Args:
+            title (str): Movie title to update.
+            note (str): The note to add to the movie.
+        """
+        shard = self._locate(title)
+        if shard is not None:
+            details = self._shard(shard)[title]
+            old = {**details, "notes": list(details.get("notes", []))}
+            details.setdefault("notes", []).append(note)
+            self._dirty.add(shard)
+            self._notify(title, old, details)
+            self._commit(title)
+            print(f"Note added to '{title}' successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_rating(self, title, rating):
+        """
+        Replaces a movie's rating, then saves its shard.
+        Args:
+            title (str): Movie title to update.
+            rating (float): The new rating.
+        Returns:
+            bool: True if the movie exists.
+        """
+        shard = self._locate(title)
+        if shard is None:
+            print(f"Movie '{title}' not found.")
+            return False
+        details = self._shard(shard)[title]
+        old = dict(details)
+        details["rating"] = round(rating, 1)
+        self._dirty.add(shard)
+        self._notify(title, old, details)
+        self._commit(title)
+        return True
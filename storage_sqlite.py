@@ -0,0 +1,372 @@
+import random
+import sqlite3
+from identity_index import IdentityIndex, valid_imdb_id
+from istorage import IStorage
+from recommender import MAX_RATING, MAX_WEIGHTED_TRIES, Recommender
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    year INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    poster TEXT NOT NULL DEFAULT 'N/A',
+    imdb_id TEXT NOT NULL DEFAULT 'N/A'
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    movie_id INTEGER NOT NULL REFERENCES movies(id) ON DELETE CASCADE,
+    note TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_movies_imdb_id ON movies(imdb_id);
+CREATE INDEX IF NOT EXISTS idx_movies_year ON movies(year);
+DROP INDEX IF EXISTS idx_movies_rating;
+-- Ties in insertion order, like RatingIndex; scanned backwards for the worst rated
+CREATE INDEX IF NOT EXISTS idx_movies_rating_rank ON movies(rating DESC, id);
+CREATE INDEX IF NOT EXISTS idx_notes_movie_id ON notes(movie_id);
+"""
+
+
+class StorageSqlite(IStorage):
+    def __init__(self, file_path):
+        """
+        Initializes the StorageSqlite with the specified database path.
+        Unlike the JSON and CSV storages nothing is loaded up front; every
+        query goes to the indexed tables.
+        Args:
+            file_path (str): Path to the SQLite database file.
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.connection = sqlite3.connect(file_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self._data_version = self._read_data_version()
+
+    def read_storage(self):
+        """
+        Reads every movie from the database.
+        Returns:
+            dict: Dictionary of movies.
+        """
+        notes = {}
+        for movie_id, note in self.connection.execute("SELECT movie_id, note FROM notes ORDER BY id"):
+            notes.setdefault(movie_id, []).append(note)
+
+        movie_list = {}
+        for row in self.connection.execute(
+                "SELECT id, title, year, rating, poster, imdb_id FROM movies ORDER BY id"):
+            movie_list[row[1]] = self._details(row, notes.get(row[0]))
+        return movie_list
+
+    def write_storage(self):
+        """
+        Commits pending changes to the database.
+        """
+        try:
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing to SQLite database: {e}")
+
+    def list_movies(self):
+        """
+        List all movies from the storage.
+        Returns:
+            dict: Dictionary of movies.
+        """
+        return self.read_storage()
+
+    def add_movie(self, title, year, rating, poster, imdb_id):
+        """
+        Add a new movie to the storage.
+        Args:
+            title (str): Movie title.
+            year (int): Movie release year.
+            rating (float): Movie rating.
+            poster (str): URL of the movie poster.
+            imdb_id (str): IMDb ID of the movie.
+        """
+        try:
+            self.connection.execute(
+                "INSERT INTO movies (title, year, rating, poster, imdb_id) VALUES (?, ?, ?, ?, ?)",
+                (title, year, round(rating, 1), poster, imdb_id)
+            )
+        except sqlite3.IntegrityError:
+            print(f"Movie '{title}' already exists!")
+            return
+        self._commit(title)
+        if self._listeners:
+            self._notify(title, None, self.get_movie(title))
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from the storage.
+        Args:
+            title (str): Movie title to delete.
+        """
+        old = self.get_movie(title) if self._listeners else None
+        cursor = self.connection.execute("DELETE FROM movies WHERE title = ?", (title,))
+        if cursor.rowcount:
+            self._commit(title)
+            self._notify(title, old, None)
+            print(f"Movie '{title}' deleted successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, note):
+        """
+        Updates a movie by adding a note to the notes table.
+        Args:
+            title (str): Movie title to update.
+            note (str): The note to add to the movie.
+        """
+        movie_id = self._movie_id(title)
+        if movie_id is None:
+            print(f"Movie '{title}' not found.")
+            return
+        old = self.get_movie(title) if self._listeners else None
+        self.connection.execute("INSERT INTO notes (movie_id, note) VALUES (?, ?)", (movie_id, note))
+        self._commit(title)
+        if self._listeners:
+            self._notify(title, old, self.get_movie(title))
+        print(f"Note added to '{title}' successfully.")
+
+    def update_rating(self, title, rating):
+        """
+        Replaces a movie's rating.
+        Args:
+            title (str): Movie title to update.
+            rating (float): The new rating.
+        Returns:
+            bool: True if the movie exists.
+        """
+        old = self.get_movie(title) if self._listeners else None
+        cursor = self.connection.execute("UPDATE movies SET rating = ? WHERE title = ?", (round(rating, 1), title))
+        if not cursor.rowcount:
+            print(f"Movie '{title}' not found.")
+            return False
+        self._commit(title)
+        if self._listeners:
+            self._notify(title, old, self.get_movie(title))
+        return True
+
+    def count_movies(self):
+        """
+        Count the movies in the storage.
+        Returns:
+            int: Number of stored movies.
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def get_movie(self, title):
+        """
+        Look up a single movie by its title using the unique title index.
+        Returns:
+            dict or None: The movie's details, or None if it is not stored.
+        """
+        row = self.connection.execute(
+            "SELECT id, title, year, rating, poster, imdb_id FROM movies WHERE title = ?", (title,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._details(row, self._notes(row[0]))
+
+    def get_movie_by_imdb_id(self, imdb_id):
+        """
+        Look up a single movie by its IMDb ID using the IMDb ID index.
+        Returns:
+            tuple or None: (title, details) of the movie, or None if it is not stored.
+        """
+        if not valid_imdb_id(imdb_id):
+            return None
+        row = self.connection.execute(
+            "SELECT id, title, year, rating, poster, imdb_id FROM movies WHERE imdb_id = ? ORDER BY id LIMIT 1",
+            (imdb_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[1], self._details(row, self._notes(row[0]))
+
+    def find_duplicate(self, title, imdb_id=None):
+        """
+        Find the stored movie a new entry would duplicate. The exact title and the
+        IMDb ID are looked up in the table's indexes; near-identical titles come
+        from the in-memory identity index, which is rebuilt when another
+        connection changed the database.
+        Args:
+            title (str): Title of the new entry.
+            imdb_id (str): Its IMDb ID, if known.
+        Returns:
+            str or None: The stored title, or None if the entry is new.
+        """
+        if self._movie_id(title) is not None:
+            return title
+        found = self.get_movie_by_imdb_id(imdb_id)
+        if found is not None:
+            return found[0]
+        self.refresh()
+        return self._attach_index("identity", IdentityIndex).find(title, imdb_id)
+
+    def refresh(self):
+        """
+        Drops the in-memory indexes if another connection committed changes
+        since they were built. Costs one PRAGMA query when nothing changed.
+        Returns:
+            bool: True if the database was changed by another connection.
+        """
+        data_version = self._read_data_version()
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        self._drop_indexes()
+        return True
+
+    def _read_data_version(self):
+        # Changes whenever another connection commits, never for this connection's own commits
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def search_movies(self, term):
+        """
+        Find movies whose title contains the search term, ignoring case.
+        Returns:
+            list: (title, details) pairs of the matching movies.
+        """
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = self.connection.execute(
+            "SELECT id, title, year, rating, poster, imdb_id FROM movies "
+            "WHERE title LIKE ? ESCAPE '\\' ORDER BY id", (pattern,)
+        ).fetchall()
+        return [(row[1], self._details(row, self._notes(row[0]))) for row in rows]
+
+    def movies_sorted_by_rating(self, start=0, stop=None):
+        """
+        List movies from the best to the worst rated, walking the rating index.
+        Movies with the same rating keep the order they were added in, so pages
+        of a ranking never repeat or skip a movie.
+        Returns:
+            iterator: (title, details) pairs ordered by descending rating.
+        """
+        limit = -1 if stop is None else max(stop - start, 0)
+        cursor = self.connection.execute(
+            "SELECT id, title, year, rating, poster, imdb_id FROM movies "
+            "ORDER BY rating DESC, id LIMIT ? OFFSET ?", (limit, start)
+        )
+        return ((row[1], self._details(row)) for row in cursor)
+
+    def filter_movies(self, year_min=None, year_max=None, rating_min=None, rating_max=None, has_notes=None):
+        """
+        Find movies by release year range, rating range and whether they have notes,
+        using the year and rating indexes.
+        Returns:
+            iterator: Lazily produced (title, details) pairs of the matching movies.
+        """
+        conditions, parameters = [], []
+        for condition, value in (("year >= ?", year_min), ("year <= ?", year_max),
+                                 ("rating >= ?", rating_min), ("rating <= ?", rating_max)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        if has_notes is not None:
+            conditions.append(("" if has_notes else "NOT ") + "EXISTS (SELECT 1 FROM notes WHERE movie_id = movies.id)")
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor = self.connection.execute(
+            "SELECT id, title, year, rating, poster, imdb_id FROM movies" + where + " ORDER BY id", parameters
+        )
+        return ((row[1], self._details(row, self._notes(row[0]))) for row in cursor)
+
+    def bottom_rated(self, k):
+        """
+        Return the k worst rated movies, worst first.
+        Returns:
+            list: (title, details) pairs.
+        """
+        cursor = self.connection.execute(
+            "SELECT id, title, year, rating, poster, imdb_id FROM movies ORDER BY rating, id DESC LIMIT ?", (k,)
+        )
+        return [(row[1], self._details(row)) for row in cursor]
+
+    def movie_stats(self, year=None):
+        """
+        Calculate rating statistics with aggregate and index-ordered queries.
+        Args:
+            year (int): Optional release year to restrict the statistics to.
+        Returns:
+            dict or None: Average and median rating plus the best and worst
+            (title, rating) pairs, or None if there are no movies.
+        """
+        where, params = ("WHERE year = ?", (year,)) if year is not None else ("", ())
+        count, average = self.connection.execute(
+            f"SELECT COUNT(*), AVG(rating) FROM movies {where}", params).fetchone()
+        if not count:
+            return None
+        middle = [rating for (rating,) in self.connection.execute(
+            f"SELECT rating FROM movies {where} ORDER BY rating LIMIT ? OFFSET ?",
+            params + (2 - count % 2, (count - 1) // 2)
+        )]
+        best = self.connection.execute(
+            f"SELECT title, rating FROM movies {where} ORDER BY rating DESC, id LIMIT 1", params).fetchone()
+        worst = self.connection.execute(
+            f"SELECT title, rating FROM movies {where} ORDER BY rating, id LIMIT 1", params).fetchone()
+        return {
+            "average": average,
+            "median": sum(middle) / len(middle),
+            "best": tuple(best),
+            "worst": tuple(worst),
+        }
+
+    def random_movie(self, weighted=False):
+        """
+        Pick a random movie from the storage.
+        Args:
+            weighted (bool): Favour better rated movies, in proportion to their rating.
+                Uniform picks are kept with probability rating / 10, so this takes
+                10 / average rating queries on average.
+        Returns:
+            tuple or None: (title, details) of the picked movie, or None if there are no movies.
+        """
+        count = self.count_movies()
+        if not count:
+            return None
+        for _ in range(MAX_WEIGHTED_TRIES if weighted else 1):
+            row = self.connection.execute(
+                "SELECT id, title, year, rating, poster, imdb_id FROM movies LIMIT 1 OFFSET ?",
+                (random.randrange(count),)
+            ).fetchone()
+            if not weighted or random.random() * MAX_RATING < row[3]:
+                break
+        return row[1], self._details(row, self._notes(row[0]))
+
+    def similar_movies(self, title, k=5):
+        """
+        Find the k movies most like a stored movie, by release year, rating and
+        title words. The feature matrix is built from the table once and kept up
+        to date like the other indexes; only the k results are read back.
+        Needs NumPy.
+        Returns:
+            list: (title, details) pairs, most similar first; empty if the title isn't stored.
+        """
+        self.refresh()
+        similar = self._attach_index("recommender", Recommender).similar(title, k)
+        return [(other, self.get_movie(other)) for other, _ in similar]
+
+    def _movie_id(self, title):
+        row = self.connection.execute("SELECT id FROM movies WHERE title = ?", (title,)).fetchone()
+        return row[0] if row else None
+
+    def _notes(self, movie_id):
+        return [note for (note,) in self.connection.execute(
+            "SELECT note FROM notes WHERE movie_id = ? ORDER BY id", (movie_id,)
+        )]
+
+    @staticmethod
+    def _details(row, notes=None):
+        details = {
+            "year": row[2],
+            "rating": row[3],
+            "poster": row[4],
+            "imdb_id": row[5]
+        }
+        if notes:
+            details["notes"] = notes
+        return details
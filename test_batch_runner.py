@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import tempfile
+from functools import partial
+
+from batch_runner import BatchRunner, parse_operation
+from fake_omdb_server import FakeOmdbServer
+from movie_app import fetch_movie_details
+from storage_json import StorageJson
+
+OMDB_MOVIES = {
+    "Inception": {"Year": "2010", "imdbRating": "8.8", "Poster": "N/A", "imdbID": "tt1375666"},
+}
+
+SCRIPT = """
+# Comments and blank lines are skipped
+add Inception
+{"op": "add", "title": "Heat", "year": 1995, "rating": 8.3, "imdb_id": "tt0113277"}
+note "Heat" "Great heist movie"
+note "Unknown" "Nothing"
+search inc
+stats
+delete Inception
+rename Heat
+"""
+
+
+def test_parse_operation():
+    assert parse_operation("  ") is None
+    assert parse_operation('note "The Matrix" "Red pill"') == {"op": "note", "title": "The Matrix", "note": "Red pill"}
+    assert parse_operation("delete The Matrix") == {"op": "delete", "title": "The Matrix"}
+    assert parse_operation('{"op": "stats", "year": 1999}') == {"op": "stats", "year": 1999}
+
+
+def test_batch_runs_operations_with_few_commits():
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer(OMDB_MOVIES) as server:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        writes = []
+        original_write = storage.write_storage
+        storage.write_storage = lambda: writes.append(1) or original_write()
+
+        runner = BatchRunner(storage, fetch=partial(fetch_movie_details, api_url=server.url))
+        out = io.StringIO()
+        summary = runner.run(SCRIPT.splitlines(), commit_every=4, out=out)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        assert [result["status"] for result in results] == \
+            ["ok", "ok", "ok", "not_found", "ok", "ok", "ok", "error"]
+        assert results[0]["rating"] == 8.8
+        assert results[4]["results"][0]["title"] == "Inception"
+        assert results[5]["stats"]["best"] == ["Inception", 8.8]
+        assert summary["operations"] == 8 and summary["ok"] == 6 and summary["failed"] == 2
+        # Eight operations, persisted twice instead of once per change
+        assert len(writes) == 2
+
+        reloaded = StorageJson(os.path.join(directory, "movies.json"))
+        assert list(reloaded.list_movies()) == ["Heat"]
+        assert reloaded.get_movie("Heat")["notes"] == ["Great heist movie"]
+
+
+def test_operations_with_wrongly_typed_fields_fail_alone():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        script = "\n".join([
+            '{"op": "add", "title": 5}',
+            '{"op": "add", "title": "Heat", "rating": 8.3, "imdb_id": 113277}',
+            '{"op": "note", "title": ["Heat"], "note": "Classic"}',
+            '{"op": "search", "term": null}',
+            '{"op": "add", "title": "Heat", "year": 1995, "rating": 8.3}',
+            '{"op": "note", "title": "Heat", "note": 7}',
+        ])
+        out = io.StringIO()
+        summary = BatchRunner(storage, fetch=None).run(script.splitlines(), out=out)
+        statuses = [json.loads(line)["status"] for line in out.getvalue().splitlines()]
+        assert statuses == ["error", "error", "error", "error", "ok", "error"]
+        assert (summary["ok"], summary["failed"]) == (1, 5)
+        assert list(StorageJson(os.path.join(directory, "movies.json")).list_movies()) == ["Heat"]
+
+
+if __name__ == "__main__":
+    test_parse_operation()
+    test_batch_runs_operations_with_few_commits()
+    test_operations_with_wrongly_typed_fields_fail_alone()
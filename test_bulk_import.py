@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from bulk_import import BulkImporter, read_entries
+from fake_omdb_server import FakeOmdbServer
+from storage_json import StorageJson
+
+OMDB_MOVIES = {
+    "Inception": {"Year": "2010", "imdbRating": "8.8", "Poster": "N/A", "imdbID": "tt1375666"},
+    "The Matrix": {"Year": "1999", "imdbRating": "8.7", "Poster": "N/A", "imdbID": "tt0133093"},
+    "Breaking Bad": {"Year": "2008–2013", "imdbRating": "9.5", "Poster": "N/A", "imdbID": "tt0903747"},
+}
+
+
+def test_bulk_import():
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer(OMDB_MOVIES) as server:
+        titles_path = os.path.join(directory, "titles.txt")
+        with open(titles_path, "w", encoding="utf-8") as file:
+            file.write("# seed list\nInception\ntt0133093\nBreaking Bad\nNo Such Movie\nInception\n")
+
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        storage.add_movie("Inception", 2010, 8.8, "N/A", "tt1375666")
+        report = BulkImporter(storage, max_workers=4, api_url=server.url).run(read_entries(titles_path))
+
+        assert report["requested"] == 4
+        assert report["imported"] == 2
+        assert report["skipped"] == 1
+        assert list(report["failed"]) == ["No Such Movie"]
+        # Already stored titles never reach the API
+        assert server.requests == 3
+        assert storage.list_movies()["The Matrix"]["imdb_id"] == "tt0133093"
+        assert storage.list_movies()["Breaking Bad"]["year"] == 2008
+        assert set(StorageJson(storage.file_path).list_movies()) == {"Inception", "The Matrix", "Breaking Bad"}
+
+
+if __name__ == "__main__":
+    test_bulk_import()
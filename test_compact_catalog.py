@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+
+from compact_catalog import CompactCatalog
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+
+def test_compact_catalog_behaves_like_dict():
+    with open("movies.json", "r") as file:
+        movies = json.load(file)
+    catalog = CompactCatalog(movies)
+
+    assert len(catalog) == len(movies)
+    assert {title: dict(info) for title, info in catalog.items()} == movies
+
+    catalog["Odd One"] = {"year": 2001, "rating": 6.66, "poster": "N/A", "imdb_id": "custom-id"}
+    assert catalog["Odd One"]["rating"] == 6.7
+    assert catalog["Odd One"]["imdb_id"] == "custom-id"
+
+    catalog["Odd One"]["notes"] = []
+    catalog["Odd One"]["notes"].append("In place")
+    assert catalog["Odd One"]["notes"] == ["In place"]
+
+    removed = catalog.pop("Odd One")
+    assert removed["notes"] == ["In place"]
+    assert "Odd One" not in catalog
+
+    # The freed slot is reused without leaking the old notes
+    catalog["Reused"] = {"year": 1999, "rating": 8.0, "poster": "N/A", "imdb_id": "tt0000001"}
+    assert "notes" not in catalog["Reused"]
+
+
+def test_compact_storages_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage_class, name in [(StorageJson, "movies.json"), (StorageCsv, "movies.csv")]:
+            file_path = os.path.join(directory, name)
+            storage = storage_class(file_path, compact=True)
+            storage.add_movie("Inception", 2010, 8.8, "https://example.com/inception.jpg", "tt1375666")
+            storage.update_movie("Inception", "Updated note")
+            assert storage.movie_stats()["best"] == ("Inception", 8.8)
+
+            reopened = storage_class(file_path, compact=True)
+            assert dict(reopened.list_movies()["Inception"])["poster"] == "https://example.com/inception.jpg"
+
+
+def test_out_of_range_fields_and_reused_slots():
+    catalog = CompactCatalog()
+    catalog["Ancient"] = {"year": -500, "rating": 7.0}
+    catalog["Far future"] = {"year": 70000, "rating": 6.0}
+    assert (catalog["Ancient"]["year"], catalog["Far future"]["year"]) == (-500, 70000)
+    for info in ({"year": 2 ** 40, "rating": 7.0}, {"year": 2000, "rating": -1}):
+        try:
+            catalog["Bad"] = info
+            assert False, "expected the field to be rejected"
+        except ValueError:
+            pass
+    assert "Bad" not in catalog and len(catalog) == 2
+
+    # A movie in a freed slot doesn't inherit the previous movie's year and rating
+    del catalog["Ancient"]
+    catalog["Sparse"] = {"poster": "N/A"}
+    assert (catalog["Sparse"]["year"], catalog["Sparse"]["rating"]) == (0, 0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.json")
+        with open(file_path, "w") as file:
+            json.dump({"Heat": {"year": 1995, "rating": 8.3}, "Bad": {"year": 2 ** 40, "rating": 1.0}}, file)
+        assert list(StorageJson(file_path, compact=True).list_movies()) == ["Heat"]
+
+
+if __name__ == "__main__":
+    test_compact_catalog_behaves_like_dict()
+    test_compact_storages_round_trip()
+    test_out_of_range_fields_and_reused_slots()
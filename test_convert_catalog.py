@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+
+from convert_catalog import READERS, convert, read_json
+from storage_binary import StorageBinary
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_sharded import StorageSharded
+from storage_sqlite import StorageSqlite
+
+
+def _source(directory):
+    storage = StorageJson(os.path.join(directory, "movies.json"))
+    with storage.batch():
+        for i in range(300):
+            storage.add_movie(f"Movie {i}", 1950 + i % 70, (i % 100) / 10, f"https://img/{i}.jpg", f"tt{i:07d}")
+        storage.update_movie("Movie 3", "First note")
+        storage.update_movie("Movie 3", 'Second, "quoted" note')
+        storage.add_movie('Title, with "quotes"', 2001, 7.5, "N/A", "N/A")
+    return storage.list_movies()
+
+
+def test_round_trip_through_every_format():
+    with tempfile.TemporaryDirectory() as directory:
+        expected = _source(directory)
+        source = os.path.join(directory, "movies.json")
+        targets = [("movies.csv", StorageCsv), ("movies.db", StorageSqlite), ("movies.bin", StorageBinary),
+                   ("shards", StorageSharded)]
+        for name, storage_class in targets:
+            target = os.path.join(directory, name)
+            report = convert(source, target)
+            assert report["read"] == report["written"] == 301 and report["skipped"] == 0
+            assert dict(storage_class(target).list_movies()) == expected, name
+
+            # And back again
+            back = os.path.join(directory, f"back-{name}.json")
+            convert(target, back, target_format="json")
+            with open(back) as file:
+                assert json.load(file) == expected, name
+
+
+def test_csv_keeps_notes_and_tolerates_missing_fields():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(path)
+        storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+        storage.update_movie("Heat", "Great heist movie")
+        assert StorageCsv(path).get_movie("Heat")["notes"] == ["Great heist movie"]
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("title,year,rating\nHeat,1995\n,2000,5\nRan,1985,eight\nAlien,1979,8.5\n")
+        movies = StorageCsv(path).list_movies()
+        assert movies["Heat"] == {"year": 1995, "rating": 0.0, "poster": "N/A", "imdb_id": "N/A"}
+        assert sorted(movies) == ["Alien", "Heat"]
+
+        report = convert(path, os.path.join(directory, "movies.json"))
+        assert report["read"] == 4 and report["written"] == 2 and report["skipped"] == 2
+
+
+def test_json_reader_streams_across_chunks():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.json")
+        movies = {f"Movie {i}": {"year": 2000, "rating": 5.0, "notes": ["x" * 500]} for i in range(5000)}
+        with open(path, "w") as file:
+            json.dump(movies, file)
+        assert dict(read_json(path, [])) == movies
+
+        with open(path, "w") as file:
+            file.write('{"Heat": {"year": 1995}, "Ran": {"year": 19')
+        errors = []
+        assert list(read_json(path, errors)) == [("Heat", {"year": 1995})]
+        assert len(errors) == 1 and errors[0].startswith("record 2")
+
+
+def test_malformed_json_records_are_skipped():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.json")
+        with open(path, "w") as file:
+            file.write('{"Heat": {"year": 1995, "notes": ["a, \\"b\\": c"]},\n'
+                       ' "Ran": {"year": 1985, "rating": eight},\n'
+                       ' "Alien": {"year": 1979} "Brazil": {"year": 1985},\n'
+                       ' "Up": {"year": 2009}}')
+        report = convert(path, os.path.join(directory, "movies.csv"))
+        assert report["written"] == 3 and report["skipped"] == 2
+        assert sorted(StorageCsv(os.path.join(directory, "movies.csv")).list_movies()) == ["Alien", "Heat", "Up"]
+
+
+def test_failed_conversions_leave_no_partial_files():
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "movies.json")
+        _source(directory)
+
+        def failing(path, errors):
+            for number, record in enumerate(read_json(path, errors)):
+                if number == 100:
+                    raise OSError("disk went away")
+                yield record
+
+        READERS["json"] = failing
+        try:
+            for name in ("shards", "movies.csv", "movies.db"):
+                target = os.path.join(directory, name)
+                try:
+                    convert(source, target)
+                    assert False, "expected the conversion to fail"
+                except OSError:
+                    pass
+                folder = target if name == "shards" else directory
+                assert not [file for file in os.listdir(folder) if file.endswith(".tmp")], name
+        finally:
+            READERS["json"] = read_json
+
+if __name__ == "__main__":
+    test_round_trip_through_every_format()
+    test_csv_keeps_notes_and_tolerates_missing_fields()
+    test_json_reader_streams_across_chunks()
+    test_malformed_json_records_are_skipped()
+    test_failed_conversions_leave_no_partial_files()
@@ -0,0 +1,95 @@
+import json
+import multiprocessing
+import os
+import tempfile
+
+from file_lock import file_generation
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+
+def _add_movies(file_path, worker, count):
+    storage = StorageJson(file_path)
+    for i in range(count):
+        storage.add_movie(f"Worker {worker} Movie {i}", 2000, 7.0, "N/A", "N/A")
+
+
+def test_concurrent_writers_keep_every_change():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.json")
+        workers = [multiprocessing.Process(target=_add_movies, args=(file_path, worker, 20)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert len(StorageJson(file_path).list_movies()) == 80
+
+
+def test_refresh_reloads_only_changed_files():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.csv")
+        reader = StorageCsv(file_path)
+        writer = StorageCsv(file_path)
+        writer.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+
+        assert reader.search_movies("heat") == []
+        assert reader.refresh()
+        # The reader's title index was updated from the reloaded catalog
+        assert [title for title, _ in reader.search_movies("heat")] == ["Heat"]
+        assert not reader.refresh()
+
+        # Both sides edit: saving merges instead of overwriting the other's change
+        reader.add_movie("Alien", 1979, 8.5, "N/A", "tt0078748")
+        writer.add_movie("Ran", 1985, 8.2, "N/A", "tt0089881")
+        assert sorted(StorageCsv(file_path).list_movies()) == ["Alien", "Heat", "Ran"]
+        assert file_generation(file_path) == writer._generation
+
+
+def test_merged_saves_report_each_change_once():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage_class, name in ((StorageJson, "movies.json"), (StorageCsv, "movies.csv")):
+            file_path = os.path.join(directory, name)
+            seed = storage_class(file_path)
+            for i in range(10):
+                seed.add_movie(f"Movie {i}", 2000, 8.0, "N/A", "N/A")
+            a = storage_class(file_path)
+            b = storage_class(file_path)
+            a.movie_stats()
+            a.random_movie()
+            list(a.movies_sorted_by_rating())
+
+            b.add_movie("B1", 2001, 5.0, "N/A", "N/A")
+            a.add_movie("A1", 2002, 6.0, "N/A", "N/A")
+            a.update_rating("A1", 7.0)
+            a.delete_movie("Movie 0")
+
+            stats = a.movie_stats()
+            assert a._indexes["stats"]._overall.count == 11
+            assert round(stats["average"], 3) == round((8 * 9 + 5 + 7) / 11, 3)
+            assert len(a._indexes["random"]) == 11
+            assert len(list(a.movies_sorted_by_rating())) == 11
+            assert sorted(storage_class(file_path).list_movies()) == sorted(a.list_movies())
+
+
+def test_corrupt_json_is_moved_aside():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.json")
+        with open(file_path, "w") as file:
+            file.write('{"Heat": {"year": 19')
+        storage = StorageJson(file_path)
+        assert storage.list_movies() == {}
+        corrupt = [name for name in os.listdir(directory) if name.startswith("movies.json.corrupt-")]
+        assert len(corrupt) == 1
+
+        storage.add_movie("Ran", 1985, 8.2, "N/A", "tt0089881")
+        with open(file_path) as file:
+            assert list(json.load(file)) == ["Ran"]
+        with open(os.path.join(directory, corrupt[0])) as file:
+            assert file.read() == '{"Heat": {"year": 19'
+
+
+if __name__ == "__main__":
+    test_concurrent_writers_keep_every_change()
+    test_refresh_reloads_only_changed_files()
+    test_merged_saves_report_each_change_once()
+    test_corrupt_json_is_moved_aside()
@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+
+from filter_index import FilterIndex
+from storage_binary import StorageBinary
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_sharded import StorageSharded
+from storage_sqlite import StorageSqlite
+
+QUERIES = [
+    {},
+    {"year_min": 1990, "year_max": 1999},
+    {"year_min": 1990, "year_max": 1999, "rating_min": 8.5},
+    {"rating_min": 9.9, "rating_max": 10},
+    {"year_max": 1950, "has_notes": True},
+    {"year_min": 2000, "rating_max": 3, "has_notes": False},
+    {"has_notes": True},
+    {"year_min": 2030},
+]
+
+
+def _expected(movies, year_min=None, year_max=None, rating_min=None, rating_max=None, has_notes=None):
+    return sorted(
+        title for title, info in movies.items()
+        if (year_min is None or info["year"] >= year_min) and (year_max is None or info["year"] <= year_max)
+        and (rating_min is None or info["rating"] >= rating_min)
+        and (rating_max is None or info["rating"] <= rating_max)
+        and (has_notes is None or bool(info.get("notes")) == has_notes)
+    )
+
+
+def test_filter_matches_a_full_scan_through_changes():
+    rng = random.Random(3)
+    movies = {f"Movie {i}": {"year": rng.randint(1920, 2024), "rating": rng.randint(10, 100) / 10}
+              for i in range(2000)}
+    index = FilterIndex(movies)
+    for i in range(300):
+        title = f"Movie {rng.randrange(2100)}"
+        old = movies.get(title)
+        if old is not None and i % 3 == 0:
+            del movies[title]
+            index.on_change(title, old, None)
+        elif old is not None:
+            movies[title] = dict(old, notes=["Seen"], rating=rng.randint(10, 100) / 10)
+            index.on_change(title, old, movies[title])
+        else:
+            movies[title] = {"year": rng.randint(1920, 2024), "rating": 5.0}
+            index.on_change(title, None, movies[title])
+
+    for query in QUERIES:
+        assert sorted(index.filter(**query)) == _expected(movies, **query), query
+
+
+def test_storages_agree_and_results_are_lazy():
+    with tempfile.TemporaryDirectory() as directory:
+        json_storage = StorageJson(os.path.join(directory, "movies.json"))
+        sqlite_storage = StorageSqlite(os.path.join(directory, "movies.db"))
+        for storage in (json_storage, sqlite_storage):
+            rng = random.Random(5)
+            with storage.batch():
+                for i in range(300):
+                    storage.add_movie(f"Movie {i}", 1940 + i % 80, rng.randint(10, 100) / 10, "N/A", "N/A")
+                for i in range(0, 300, 7):
+                    storage.update_movie(f"Movie {i}", "Seen")
+        expected = json_storage.list_movies()
+        for query in QUERIES:
+            for storage in (json_storage, sqlite_storage):
+                found = storage.filter_movies(**query)
+                assert not isinstance(found, list)
+                assert sorted(title for title, _ in found) == _expected(expected, **query), (storage, query)
+
+
+class _Recorder:
+    def __init__(self):
+        self.changes = []
+
+    def on_change(self, title, old, new):
+        self.changes.append((title, old, dict(new)))
+
+
+def test_note_listeners_get_the_movie_before_the_note():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in (StorageJson(os.path.join(directory, "movies.json")),
+                        StorageCsv(os.path.join(directory, "movies.csv")),
+                        StorageSharded(os.path.join(directory, "shards"), shards=4),
+                        StorageBinary(os.path.join(directory, "movies.bin"))):
+            storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+            storage.update_movie("Heat", "First")
+            recorder = _Recorder()
+            storage.add_listener(recorder)
+            storage.update_movie("Heat", "Second")
+            _, old, new = recorder.changes[0]
+            assert old["notes"] == ["First"], storage
+            assert new["notes"] == ["First", "Second"], storage
+
+
+if __name__ == "__main__":
+    test_filter_matches_a_full_scan_through_changes()
+    test_storages_agree_and_results_are_lazy()
+    test_note_listeners_get_the_movie_before_the_note()
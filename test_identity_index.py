@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+from batch_runner import BatchRunner
+from bulk_import import BulkImporter
+from dedupe_catalog import dedupe
+from fake_omdb_server import FakeOmdbServer
+from identity_index import IdentityIndex, normalize_title
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_sqlite import StorageSqlite
+
+
+def test_normalize_title():
+    assert normalize_title("Star Wars: Episode V:") == normalize_title("star wars - Episode V") == "star wars episode v"
+    assert normalize_title("Amélie") == "amelie"
+    assert normalize_title("  Heat  ") == "heat"
+    assert normalize_title("!!!") == ""
+
+
+def test_index_follows_changes():
+    movies = {
+        "Heat": {"year": 1995, "rating": 8.3, "imdb_id": "tt0113277"},
+        "Dune": {"year": 1984, "rating": 6.3, "imdb_id": "tt0087182"},
+        "Solaris": {"year": 1972, "rating": 8.0, "imdb_id": "N/A"},
+    }
+    index = IdentityIndex(movies)
+    assert index.by_imdb_id("tt0113277") == "Heat"
+    assert index.find("HEAT!") == "Heat"
+    assert index.find("Anything", "tt0113277") == "Heat"
+    # Remakes share a title but not an IMDb ID
+    assert index.find("Dune.", "tt1160419") is None
+    assert index.find("Dune.") == "Dune"
+    # A movie without an IMDb ID can't be told apart, so the title decides
+    assert index.find("solaris", "tt0069293") == "Solaris"
+    assert index.find("!!!") is None
+
+    index.on_change("Solaris", movies["Solaris"], dict(movies["Solaris"], imdb_id="tt0069293"))
+    assert index.by_imdb_id("tt0069293") == "Solaris"
+    index.on_change("Heat", movies["Heat"], dict(movies["Heat"], notes=["Diner scene"]))
+    assert index.by_imdb_id("tt0113277") == "Heat"
+    index.on_change("Heat", movies["Heat"], None)
+    assert index.by_imdb_id("tt0113277") is None and index.find("heat") is None
+    assert len(index) == 2
+
+
+def test_storages_find_duplicates_and_movies_by_imdb_id():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in (StorageJson(os.path.join(directory, "movies.json")),
+                        StorageSqlite(os.path.join(directory, "movies.db"))):
+            storage.add_movie("Star Wars: Episode V", 1980, 8.7, "N/A", "tt0080684")
+            assert storage.find_duplicate("Star Wars: Episode V") == "Star Wars: Episode V"
+            assert storage.find_duplicate("Star Wars: Episode V:") == "Star Wars: Episode V"
+            assert storage.find_duplicate("The Empire Strikes Back", "tt0080684") == "Star Wars: Episode V"
+            assert storage.find_duplicate("Alien", "tt0078748") is None
+            assert storage.get_movie_by_imdb_id("tt0080684")[0] == "Star Wars: Episode V"
+            storage.delete_movie("Star Wars: Episode V")
+            assert storage.get_movie_by_imdb_id("tt0080684") is None
+
+
+def test_dedupe_merges_notes_into_the_first_entry():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(path)
+        with storage.batch():
+            storage.add_movie("Star Wars: Episode V:", 1980, 8.7, "N/A", "N/A")
+            storage.add_movie("Star Wars: Episode V", 1980, 8.7, "https://example.com/v.jpg", "tt0080684")
+            storage.add_movie("The Empire Strikes Back", 1980, 8.7, "N/A", "tt0080684")
+            storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+            storage.update_movie("Star Wars: Episode V:", "Seen in 1980")
+            storage.update_movie("Star Wars: Episode V", "Best sequel")
+            storage.update_movie("The Empire Strikes Back", "Seen in 1980")
+            storage.update_movie("The Empire Strikes Back", "Hoth")
+
+        preview = dedupe(storage, dry_run=True)
+        assert preview["groups"] == {"Star Wars: Episode V:": ["Star Wars: Episode V", "The Empire Strikes Back"]}
+        assert storage.count_movies() == 4
+
+        report = dedupe(storage)
+        assert report["removed"] == 2 and report["notes_merged"] == 2
+        kept = StorageCsv(path).list_movies()
+        assert set(kept) == {"Heat", "Star Wars: Episode V:"}
+        assert kept["Star Wars: Episode V:"]["notes"] == ["Seen in 1980", "Best sequel", "Hoth"]
+        assert kept["Star Wars: Episode V:"]["imdb_id"] == "tt0080684"
+        assert kept["Star Wars: Episode V:"]["poster"] == "https://example.com/v.jpg"
+        assert dedupe(storage)["removed"] == 0
+
+
+def test_adds_skip_movies_stored_under_another_spelling():
+    omdb = {
+        "The Empire Strikes Back": {"Year": "1980", "imdbRating": "8.7", "Poster": "N/A", "imdbID": "tt0080684"},
+    }
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer(omdb) as server:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        storage.add_movie("Star Wars: Episode V", 1980, 8.7, "N/A", "tt0080684")
+
+        report = BulkImporter(storage, max_workers=2, api_url=server.url).run(
+            ["tt0080684", "star wars episode v", "The Empire Strikes Back"])
+        assert report["imported"] == 0 and report["skipped"] == 3
+        # Only the title OMDb had to resolve was looked up
+        assert server.requests == 1
+
+        runner = BatchRunner(storage, fetch=lambda title, cache=None: None)
+        result = runner.apply({"op": "add", "title": "Star Wars - Episode V", "rating": 8.7})
+        assert result["status"] == "exists" and result["existing"] == "Star Wars: Episode V"
+        assert runner.apply({"op": "delete", "title": "tt0080684"})["status"] == "ok"
+        assert storage.count_movies() == 0
+
+
+if __name__ == "__main__":
+    test_normalize_title()
+    test_index_follows_changes()
+    test_storages_find_duplicates_and_movies_by_imdb_id()
+    test_dedupe_merges_notes_into_the_first_entry()
+    test_adds_skip_movies_stored_under_another_spelling()
+    print("All identity index tests passed.")
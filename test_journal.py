@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+
+def test_journal_replays_mutations():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.json")
+        storage = StorageJson(file_path, journal=True)
+        storage.add_movie("Inception", 2010, 8.8, "https://example.com/inception.jpg", "tt1375666")
+        storage.add_movie("The Matrix", 1999, 8.7, "https://example.com/matrix.jpg", "tt0133093")
+        storage.update_movie("Inception", "Dream within a dream")
+        storage.delete_movie("The Matrix")
+
+        # Nothing was rewritten, every change went to the journal
+        assert not os.path.exists(file_path)
+        assert os.path.exists(f"{file_path}.journal")
+
+        reopened = StorageJson(file_path, journal=True)
+        assert list(reopened.list_movies()) == ["Inception"]
+        assert reopened.list_movies()["Inception"]["notes"] == ["Dream within a dream"]
+
+
+def test_journal_compaction():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(file_path, journal=True)
+        storage._journal.max_entries = 10
+        storage._journal.max_ratio = 0.5
+        for i in range(25):
+            storage.add_movie(f"Movie {i}", 2000 + i, 5.0, "N/A", f"tt{i:07d}")
+        storage._journal.wait()
+
+        # The snapshot holds the compacted catalog, the journal only the tail
+        assert os.path.exists(file_path)
+        assert storage._journal.entry_count < 25
+
+        reopened = StorageCsv(file_path, journal=True)
+        assert len(reopened.list_movies()) == 25
+
+
+def test_journal_with_compact_catalog():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage_class, name in ((StorageJson, "movies.json"), (StorageCsv, "movies.csv")):
+            file_path = os.path.join(directory, name)
+            storage = storage_class(file_path, journal=True, compact=True)
+            storage.add_movie("Inception", 2010, 8.8, "N/A", "tt1375666")
+            storage.update_movie("Inception", "Dream within a dream")
+            storage.update_movie("Inception", "Spinning top")
+
+            reopened = storage_class(file_path, journal=True, compact=True)
+            assert reopened.list_movies()["Inception"]["notes"] == ["Dream within a dream", "Spinning top"]
+            assert reopened.list_movies()["Inception"]["rating"] == 8.8
+
+
+def test_change_after_a_torn_entry_survives():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.json")
+        storage = StorageJson(file_path, journal=True)
+        storage.add_movie("Inception", 2010, 8.8, "N/A", "tt1375666")
+        # A crash in the middle of the next append
+        with open(f"{file_path}.journal", "a") as file:
+            file.write('{"op": "put", "title": "Heat", "mov')
+
+        reopened = StorageJson(file_path, journal=True)
+        assert list(reopened.list_movies()) == ["Inception"]
+        reopened.add_movie("The Matrix", 1999, 8.7, "N/A", "tt0133093")
+
+        recovered = StorageJson(file_path, journal=True)
+        assert sorted(recovered.list_movies()) == ["Inception", "The Matrix"]
+
+
+if __name__ == "__main__":
+    test_journal_replays_mutations()
+    test_journal_compaction()
+    test_journal_with_compact_catalog()
+    test_change_after_a_torn_entry_survives()
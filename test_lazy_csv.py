@@ -0,0 +1,72 @@
+import os
+import pickle
+import sys
+import tempfile
+
+from lazy_csv import index_path, load_index, scan_offsets
+from storage_csv import StorageCsv
+
+
+def test_lazy_csv_storage():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.csv")
+        eager = StorageCsv(file_path)
+        eager.add_movie("Inception", 2010, 8.8, "https://example.com/inception.jpg", "tt1375666")
+        eager.add_movie('Quoted, "Multi\nLine" Title', 1999, 7.1, "N/A", "tt0000001")
+        eager.add_movie("Avatar", 2009, 7.9, "https://example.com/avatar.jpg", "tt0499549")
+
+        lazy = StorageCsv(file_path, lazy=True)
+        assert os.path.exists(index_path(file_path))
+        assert list(lazy.list_movies()) == list(eager.list_movies())
+        assert lazy.list_movies()['Quoted, "Multi\nLine" Title']["rating"] == 7.1
+        # Only the accessed row was decoded
+        assert list(lazy.list_movies()._loaded) == ['Quoted, "Multi\nLine" Title']
+
+        lazy.delete_movie("Inception")
+        lazy.add_movie("The Matrix", 1999, 8.7, "N/A", "tt0133093")
+        assert list(lazy.list_movies()) == ['Quoted, "Multi\nLine" Title', "Avatar", "The Matrix"]
+
+        # Warm start: the persisted index still matches, so the file isn't scanned
+        warm = StorageCsv(file_path, lazy=True)
+        assert warm.list_movies()["Avatar"]["imdb_id"] == "tt0499549"
+        assert {title: dict(info) for title, info in warm.list_movies().items()} == \
+            {title: dict(info) for title, info in StorageCsv(file_path).list_movies().items()}
+
+
+class _Planted:
+    def __reduce__(self):
+        return os.remove, (self.victim,)
+
+
+def test_offset_index_is_data_only_and_validated():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(file_path)
+        storage.add_movie("Inception", 2010, 8.8, "N/A", "tt1375666")
+        storage.add_movie("Avatar", 2009, 7.9, "N/A", "tt0499549")
+        StorageCsv(file_path, lazy=True)
+        with open(file_path, "rb") as file:
+            expected = scan_offsets(file.read())
+        assert load_index(file_path) == expected
+
+        # A pickle planted next to the catalog is never unpickled
+        planted = _Planted()
+        planted.victim = os.path.join(directory, "victim")
+        open(planted.victim, "w").close()
+        with open(index_path(file_path), "wb") as file:
+            pickle.dump(planted, file)
+        assert load_index(file_path) is None
+        assert os.path.exists(planted.victim)
+        assert StorageCsv(file_path, lazy=True).list_movies()["Avatar"]["year"] == 2009
+
+        # Ranges pointing outside the file are not trusted
+        with open(index_path(file_path), "rb") as file:
+            meta, titles, ranges = file.readline(), file.readline(), file.read()
+        with open(index_path(file_path), "wb") as file:
+            file.write(meta + titles + ranges[:-8] + (10 ** 9).to_bytes(8, sys.byteorder))
+        assert load_index(file_path) is None
+
+
+if __name__ == "__main__":
+    test_lazy_csv_storage()
+    test_offset_index_is_data_only_and_validated()
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+
+import metrics
+from fake_omdb_server import FakeOmdbServer
+from movie_app import fetch_movie_details
+from omdb_cache import OmdbCache
+from storage_json import StorageJson
+
+OMDB_MOVIES = {
+    "Inception": {"Year": "2010", "imdbRating": "8.8", "Poster": "N/A", "imdbID": "tt1375666"},
+}
+
+
+def _timer(snapshot, name, **labels):
+    return next(timer for timer in snapshot["timers"] if timer["name"] == name and timer["labels"] == labels)
+
+
+def _counter(snapshot, name, **labels):
+    return next(counter["value"] for counter in snapshot["counters"]
+                if counter["name"] == name and counter["labels"] == labels)
+
+
+def test_disabled_metrics_record_nothing():
+    metrics.METRICS.reset()
+    metrics.disable()
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        storage.add_movie("Inception", 2010, 8.8, "N/A", "tt1375666")
+    snapshot = metrics.METRICS.snapshot()
+    assert snapshot["counters"] == [] and snapshot["timers"] == []
+
+
+def test_storage_and_omdb_metrics():
+    metrics.METRICS.reset()
+    metrics.enable()
+    try:
+        with tempfile.TemporaryDirectory() as directory, FakeOmdbServer(OMDB_MOVIES) as server:
+            file_path = os.path.join(directory, "movies.json")
+            storage = StorageJson(file_path)
+            storage.add_movie("Inception", 2010, 8.8, "N/A", "tt1375666")
+            storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+            storage.search_movies("inc")
+
+            cache = OmdbCache(os.path.join(directory, "cache.db"))
+            fetch_movie_details("Inception", api_url=server.url, cache=cache)
+            fetch_movie_details("Inception", api_url=server.url, cache=cache)
+            cache.close()
+
+            snapshot = metrics.METRICS.snapshot()
+            assert _timer(snapshot, "storage_operation", storage="StorageJson", operation="add_movie")["count"] == 2
+            assert _timer(snapshot, "storage_operation", storage="StorageJson", operation="search_movies")["count"] == 1
+            # The second write rewrote the whole file
+            assert _counter(snapshot, "file_bytes_written", storage="json") > os.path.getsize(file_path)
+            assert _timer(snapshot, "omdb_request")["count"] == 1
+            assert snapshot["omdb_cache_hit_rate"] == 0.5
+
+            prometheus_path = os.path.join(directory, "metrics.prom")
+            metrics.export(prometheus_path)
+            with open(prometheus_path) as file:
+                text = file.read()
+            assert "# TYPE getflix_file_bytes_written_total counter" in text
+            assert 'getflix_storage_operation_seconds_count{operation="add_movie",storage="StorageJson"} 2' in text
+            assert "getflix_omdb_cache_hit_ratio 0.500000" in text
+
+            json_path = os.path.join(directory, "metrics.json")
+            metrics.export(json_path)
+            with open(json_path) as file:
+                assert json.load(file)["omdb_cache_hit_rate"] == 0.5
+    finally:
+        metrics.disable()
+        metrics.METRICS.reset()
+
+
+if __name__ == "__main__":
+    test_disabled_metrics_record_nothing()
+    test_storage_and_omdb_metrics()
@@ -0,0 +1,42 @@
+import random
+import statistics
+
+from movie_stats import MovieStats
+
+
+def test_stats_match_full_recomputation():
+    rng = random.Random(7)
+    movies = {}
+    stats = MovieStats(movies)
+    for i in range(500):
+        title = f"Movie {i}"
+        movies[title] = {"year": rng.randint(1990, 1995), "rating": round(rng.uniform(1, 10), 1)}
+        stats.on_change(title, None, movies[title])
+    for i in range(0, 500, 3):
+        title = f"Movie {i}"
+        stats.on_change(title, movies.pop(title), None)
+
+    summary = stats.summary()
+    ratings = [info["rating"] for info in movies.values()]
+    assert round(summary["average"], 6) == round(statistics.mean(ratings), 6)
+    assert round(summary["median"], 6) == round(statistics.median(ratings), 6)
+    assert summary["best"][1] == max(ratings)
+    assert summary["worst"][1] == min(ratings)
+    assert movies[summary["best"][0]]["rating"] == max(ratings)
+
+    year_ratings = [info["rating"] for info in movies.values() if info["year"] == 1992]
+    assert round(stats.summary(1992)["median"], 6) == round(statistics.median(year_ratings), 6)
+    assert stats.years() == [1990, 1991, 1992, 1993, 1994, 1995]
+
+
+def test_empty_stats():
+    stats = MovieStats({"Only": {"year": 2000, "rating": 5.0}})
+    assert stats.summary()["median"] == 5.0
+    stats.on_change("Only", {"year": 2000, "rating": 5.0}, None)
+    assert stats.summary() is None
+    assert stats.summary(2000) is None
+
+
+if __name__ == "__main__":
+    test_stats_match_full_recomputation()
+    test_empty_stats()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+from fake_omdb_server import FakeOmdbServer
+from movie_app import fetch_movie_details
+from omdb_cache import OmdbCache
+
+OMDB_MOVIES = {
+    "Inception": {"Year": "2010", "imdbRating": "8.8", "Poster": "N/A", "imdbID": "tt1375666"},
+}
+
+
+def test_cache_hits_by_title_and_imdb_id():
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer(OMDB_MOVIES) as server:
+        cache = OmdbCache(os.path.join(directory, "cache.db"))
+        assert fetch_movie_details("Inception", api_url=server.url, cache=cache)["imdbID"] == "tt1375666"
+        # Normalized title and the imdbID are both served from the cache
+        assert fetch_movie_details("  inception ", api_url=server.url, cache=cache) is not None
+        assert fetch_movie_details(None, imdb_id="tt1375666", api_url=server.url, cache=cache) is not None
+        # Unknown titles are cached negatively
+        assert fetch_movie_details("No Such Movie", api_url=server.url, cache=cache) is None
+        assert fetch_movie_details("No Such Movie", api_url=server.url, cache=cache) is None
+
+        assert server.requests == 2
+        assert cache.stats()["hits"] == 3
+        assert cache.stats()["misses"] == 2
+        cache.close()
+
+        # The cache survives a restart
+        reopened = OmdbCache(os.path.join(directory, "cache.db"))
+        assert reopened.get("Inception") is not None
+        reopened.close()
+
+
+def test_cache_ttl_and_eviction():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = OmdbCache(os.path.join(directory, "cache.db"), ttl=0, max_entries=2)
+        cache.put({"Response": "True", "imdbID": "tt1"}, title="First")
+        assert cache.get("First") is None
+
+        cache.ttl = 3600
+        cache.put({"Response": "True"}, title="Second")
+        cache.put({"Response": "True"}, title="Third")
+        cache.put({"Response": "False", "Error": "Request limit reached!"}, title="Fourth")
+        assert cache.stats()["entries"] == 2
+        assert cache.get("Third") is not None
+        assert cache.get("Fourth") is None
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_cache_hits_by_title_and_imdb_id()
+    test_cache_ttl_and_eviction()
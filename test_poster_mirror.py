@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from fake_omdb_server import FakeOmdbServer
+from poster_mirror import PosterMirror
+
+POSTERS = {
+    "/a.jpg": b"first poster",
+    "/b.jpg": b"second poster",
+    "/copy-of-a.jpg": b"first poster",
+}
+
+
+def test_mirror_deduplicates_and_skips_on_rerun():
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer({}, files=POSTERS) as server:
+        store_dir = os.path.join(directory, "posters")
+        urls = [server.url.rstrip("/") + path for path in POSTERS] + ["N/A"]
+
+        report = PosterMirror(store_dir, max_workers=3).mirror(urls)
+        assert report["fetched"] == 3
+        assert report["deduplicated"] == 1
+        assert report["bytes_fetched"] == sum(len(content) for content in POSTERS.values())
+        assert not report["failed"]
+        # Identical images share one file
+        assert len([name for name in os.listdir(store_dir) if name.endswith(".jpg")]) == 2
+
+        mirror = PosterMirror(store_dir)
+        report = mirror.mirror(urls)
+        assert report["fetched"] == 0
+        assert report["skipped"] == 3
+        assert server.requests == 3
+        assert mirror.local_path(urls[0]) == mirror.local_path(urls[2])
+        assert mirror.local_path("https://example.com/unknown.jpg") == "https://example.com/unknown.jpg"
+
+
+if __name__ == "__main__":
+    test_mirror_deduplicates_and_skips_on_rerun()
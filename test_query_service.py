@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from load_test_query_service import start_service
+from query_service import MAX_CACHED_RESPONSES, QueryService
+from storage_json import StorageJson
+
+
+def _catalog(directory):
+    storage = StorageJson(os.path.join(directory, "movies.json"))
+    storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+    storage.add_movie("Alien", 1979, 8.5, "N/A", "tt0078748")
+    return storage
+
+
+def test_queries_and_etags():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = _catalog(directory)
+        service = QueryService(storage)
+
+        status, headers, body = service.handle("GET", "/search?q=hea")
+        assert status == 200
+        assert [movie["title"] for movie in json.loads(body)["movies"]] == ["Heat"]
+        assert service.handle("GET", "/search?q=hea", headers["ETag"])[0] == 304
+
+        assert json.loads(service.handle("GET", "/search?q=heatt")[2])["suggestions"][0] == "Heat"
+        assert [movie["title"] for movie in json.loads(service.handle("GET", "/sorted?limit=1")[2])["movies"]] \
+            == ["Alien"]
+        assert json.loads(service.handle("GET", "/stats?year=1995")[2])["stats"]["average"] == 8.3
+        assert json.loads(service.handle("GET", "/movies?offset=1")[2])["total"] == 2
+        assert service.handle("GET", "/random")[1] == {"Cache-Control": "no-store"}
+        assert service.handle("GET", "/stats?year=abc")[0] == 400
+        assert service.handle("GET", "/nothing")[0] == 404
+        assert service.handle("POST", "/stats")[0] == 405
+
+        # A change makes the old ETag stale
+        storage.add_movie("Heathers", 1988, 7.2, "N/A", "tt0097493")
+        status, _, body = service.handle("GET", "/search?q=hea", headers["ETag"])
+        assert status == 200
+        assert len(json.loads(body)["movies"]) == 2
+
+
+def test_response_cache_is_bounded():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = _catalog(directory)
+        service = QueryService(storage)
+        service.handle("GET", "/search?q=hea")
+        for i in range(MAX_CACHED_RESPONSES + 100):
+            service.handle("GET", f"/search?q=x{i}")
+            service.handle("GET", "/search?q=hea")  # Kept while it is in use
+        assert len(service._responses) == MAX_CACHED_RESPONSES
+        assert "/search?q=hea" in service._responses
+
+        storage.add_movie("Heathers", 1988, 7.2, "N/A", "tt0097493")
+        assert not service._responses
+
+
+def test_http_server_picks_up_saved_changes():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = _catalog(directory)
+        host, port = start_service(storage)
+        url = f"http://{host}:{port}/search?q=ran"
+        with urllib.request.urlopen(url) as response:
+            assert json.loads(response.read())["movies"] == []
+            etag = response.headers["ETag"]
+
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        try:
+            urllib.request.urlopen(request)
+            assert False, "expected 304 Not Modified"
+        except urllib.error.HTTPError as e:
+            assert e.code == 304
+
+        # Another process saves the file; the service reloads it within its refresh interval
+        StorageJson(os.path.join(directory, "movies.json")).add_movie("Ran", 1985, 8.2, "N/A", "tt0089881")
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            with urllib.request.urlopen(url) as response:
+                if json.loads(response.read())["movies"]:
+                    break
+            time.sleep(0.1)
+        else:
+            assert False, "the service did not pick up the change"
+
+
+if __name__ == "__main__":
+    test_queries_and_etags()
+    test_response_cache_is_bounded()
+    test_http_server_picks_up_saved_changes()
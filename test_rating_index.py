@@ -0,0 +1,73 @@
+import io
+import os
+import random
+import tempfile
+from contextlib import redirect_stdout
+
+from benchmark import run_command
+from movie_app import MovieApp
+from rating_index import RatingIndex
+from sorted_index import SortedList
+from storage_json import StorageJson
+
+
+def test_sorted_list_matches_builtin_sort():
+    rng = random.Random(3)
+    values = [rng.randint(0, 5000) for _ in range(5000)]
+    sorted_list = SortedList(values[:1000])
+    for value in values[1000:]:
+        sorted_list.add(value)
+    for value in values[::2]:
+        sorted_list.remove(value)
+
+    expected = sorted(values[1::2])
+    assert list(sorted_list) == expected
+    assert sorted_list[1234] == expected[1234]
+    assert list(sorted_list.islice(1000, 1050)) == expected[1000:1050]
+    assert list(sorted_list.irange(100, 200)) == [v for v in expected if 100 <= v <= 200]
+    assert sorted_list.count_range(100, 200) == len([v for v in expected if 100 <= v <= 200])
+
+
+def test_rating_index_ranks():
+    movies = {f"Movie {i}": {"rating": (i * 7) % 100 / 10} for i in range(300)}
+    index = RatingIndex(movies)
+    index.on_change("New", None, {"rating": 9.95})
+    movies["New"] = {"rating": 9.95}
+    index.on_change("Movie 0", movies.pop("Movie 0"), None)
+
+    expected = [title for title, _ in sorted(movies.items(), key=lambda x: x[1]["rating"], reverse=True)]
+    assert list(index.ranked()) == expected
+    assert index.top(3) == expected[:3]
+    assert list(index.ranked(100, 150)) == expected[100:150]
+    assert index.bottom(2)[0] in [title for title in movies if movies[title]["rating"] == min(
+        info["rating"] for info in movies.values())]
+
+
+def test_sort_command_ranges():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        with storage.batch():
+            for i in range(10):
+                storage.add_movie(f"Movie {i}", 2000, i, "N/A", "N/A")
+        app = MovieApp(storage)
+
+        def ranks(answer):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                run_command(app, 8, [answer])
+            return [line for line in output.getvalue().splitlines()
+                    if ": Rating" in line or line.startswith(("Invalid", "No movies"))]
+
+        assert ranks("8-") == ["8. Movie 2: Rating 2.0", "9. Movie 1: Rating 1.0", "10. Movie 0: Rating 0.0"]
+        assert ranks("-2") == ["1. Movie 9: Rating 9.0", "2. Movie 8: Rating 8.0"]
+        assert ranks("3") == ["3. Movie 7: Rating 7.0"]
+        assert len(ranks("")) == 10
+        assert ranks("9-3")[0].startswith("Invalid range")
+        assert ranks("0-3")[0].startswith("Invalid range")
+        assert ranks("20-30") == ["No movies at those ranks, there are 10 movies."]
+
+
+if __name__ == "__main__":
+    test_sorted_list_matches_builtin_sort()
+    test_rating_index_ranks()
+    test_sort_command_ranges()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import BatchRunner
+from fake_omdb_server import FakeOmdbServer
+from query_service import QueryService
+from rating_refresh import RatingRefresher, RefreshState, TokenBucket
+from storage_json import StorageJson
+
+OMDB_MOVIES = {
+    "Heat": {"Year": "1995", "imdbRating": "8.4", "Poster": "N/A", "imdbID": "tt0113277"},
+    "Alien": {"Year": "1979", "imdbRating": "8.5", "Poster": "N/A", "imdbID": "tt0078748"},
+    "Ran": {"Year": "1985", "imdbRating": "N/A", "Poster": "N/A", "imdbID": "tt0089881"},
+}
+
+
+def test_refresh_is_incremental_and_batched():
+    with tempfile.TemporaryDirectory() as directory, FakeOmdbServer(OMDB_MOVIES) as server:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        storage.add_movie("Heat", 1995, 8.2, "N/A", "tt0113277")
+        storage.add_movie("Alien", 1979, 8.5, "N/A", "tt0078748")
+        storage.add_movie("Ran", 1985, 8.2, "N/A", "tt0089881")
+        storage.add_movie("Home Video", 2001, 5.0, "N/A", "N/A")
+        writes = []
+        original_write = storage.write_storage
+        storage.write_storage = lambda: writes.append(1) or original_write()
+
+        state_path = os.path.join(directory, "movies.json.refresh.json")
+        state = RefreshState(state_path)
+        state.record_view("Alien", 10)
+        refresher = RatingRefresher(storage, state, rate=100, api_url=server.url)
+        # Movies never refreshed come first, the most viewed of them before the others
+        assert [title for title, _ in refresher.due(0)] == ["Alien", "Heat", "Ran"]
+
+        report = refresher.run(max_age=3600)
+        assert report["checked"] == 3
+        assert report["changed"] == {"Heat": (8.2, 8.4)}
+        assert len(writes) == 1
+        # OMDb has no rating for Ran, so the stored one is kept
+        assert StorageJson(os.path.join(directory, "movies.json")).get_movie("Ran")["rating"] == 8.2
+
+        # The timestamps are saved, so a second run has nothing to do
+        rerun = RatingRefresher(storage, RefreshState(state_path), rate=100, api_url=server.url)
+        assert rerun.run(max_age=3600)["checked"] == 0
+        assert server.requests == 3
+
+
+class _SlowSession:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        self.release.wait(5)
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"Response": "True", "imdbRating": "7.7"}
+
+
+def test_duplicate_lookups_are_coalesced():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        session = _SlowSession()
+        refresher = RatingRefresher(storage, RefreshState(os.path.join(directory, "state.json")),
+                                    rate=100, session=session)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = refresher.lookup(executor, "tt0113277")
+            second = refresher.lookup(executor, "tt0113277")
+            assert first is second
+            session.release.set()
+            assert first.result() == 7.7
+        assert session.calls == 1
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+def test_views_from_the_query_service_and_scripts_set_the_order():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageJson(os.path.join(directory, "movies.json"))
+        storage.add_movie("Heat", 1995, 8.2, "N/A", "tt0113277")
+        storage.add_movie("Alien", 1979, 8.5, "N/A", "tt0078748")
+        state_path = os.path.join(directory, "movies.json.refresh.json")
+
+        # The refresh job saves its timestamps while the service counts views
+        job_state = RefreshState(state_path)
+        views = RefreshState(state_path)
+        service = QueryService(storage, views=views)
+        etag = service.handle("GET", "/movie?title=Alien")[1]["ETag"]
+        service.handle("GET", "/movie?title=Alien", etag)  # Revalidations are views too
+        service.handle("GET", "/search?q=alie")
+        BatchRunner(storage, views=views).apply({"op": "search", "term": "ali"})
+        assert views.views == {"Alien": 4}
+
+        job_state.mark_refreshed("Heat", when=100)
+        job_state.mark_refreshed("Alien", when=100)
+        job_state.save()
+        views.save()
+        saved = RefreshState(state_path)
+        assert saved.views == {"Alien": 4} and saved.refreshed == {"Heat": 100, "Alien": 100}
+        refresher = RatingRefresher(storage, saved, rate=100, session=object())
+        assert [title for title, _ in refresher.due(0, now=1000)] == ["Alien", "Heat"]
+
+        # Counts from several sessions add up
+        views.record_view("Heat")
+        views.save()
+        assert RefreshState(state_path).views == {"Alien": 4, "Heat": 1}
+
+
+if __name__ == "__main__":
+    test_refresh_is_incremental_and_batched()
+    test_duplicate_lookups_are_coalesced()
+    test_token_bucket_limits_rate()
+    test_views_from_the_query_service_and_scripts_set_the_order()
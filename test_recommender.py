@@ -0,0 +1,116 @@
+import math
+import os
+import random
+import tempfile
+from collections import Counter
+
+from recommender import RandomPicker, Recommender
+from storage_json import StorageJson
+from storage_sqlite import StorageSqlite
+
+
+def _catalog(count, seed=5):
+    rng = random.Random(seed)
+    return {f"Movie {i}": {"year": rng.randint(1920, 2024), "rating": rng.randint(10, 100) / 10}
+            for i in range(count)}
+
+
+def _apply_changes(movies, indexes, seed=8):
+    rng = random.Random(seed)
+    for i in range(500):
+        title = f"Movie {rng.randrange(1100)}"
+        old = movies.get(title)
+        if old is not None and i % 3 == 0:
+            del movies[title]
+            new = None
+        elif old is not None:
+            new = movies[title] = dict(old, rating=rng.randint(10, 100) / 10)
+        else:
+            new = movies[title] = {"year": rng.randint(1920, 2024), "rating": 5.0}
+        for index in indexes:
+            index.on_change(title, old, new)
+
+
+def test_picker_stays_in_sync_and_weights_by_rating():
+    movies = _catalog(1000)
+    picker = RandomPicker(movies)
+    _apply_changes(movies, [picker])
+    assert len(picker) == len(movies)
+    assert sorted(picker._titles) == sorted(movies)
+    assert all(picker._ratings[picker._positions[title]] == info["rating"] for title, info in movies.items())
+
+    rng = random.Random(1)
+    picks = Counter(picker.weighted(rng) for _ in range(20000))
+    best = sum(count for title, count in picks.items() if movies[title]["rating"] >= 8)
+    worst = sum(count for title, count in picks.items() if movies[title]["rating"] < 3)
+    share_best = sum(info["rating"] for info in movies.values() if info["rating"] >= 8)
+    share_worst = sum(info["rating"] for info in movies.values() if info["rating"] < 3)
+    assert math.isclose(best / worst, share_best / share_worst, rel_tol=0.15)
+
+    empty = RandomPicker({})
+    assert empty.uniform() is None and empty.weighted() is None
+    zeros = RandomPicker({"Unrated": {"year": 2000, "rating": 0}})
+    assert zeros.weighted() == "Unrated"
+
+
+def test_similar_matches_a_brute_force_ranking_through_changes():
+    movies = _catalog(1000)
+    recommender = Recommender(movies, title_features=0)
+    _apply_changes(movies, [recommender])
+    assert len(recommender) == len(movies)
+
+    for title in list(movies)[:20]:
+        info = movies[title]
+        expected = sorted(
+            (math.hypot((other["year"] - info["year"]) / 10, other["rating"] - info["rating"]), name)
+            for name, other in movies.items() if name != title
+        )
+        found = recommender.similar(title, 5)
+        assert all(math.isclose(distance, best, abs_tol=1e-4)
+                   for (_, distance), (best, _) in zip(found, expected[:5])), title
+        assert len(found) == 5
+    assert recommender.similar("Missing", 5) == []
+    assert Recommender({"Only": {"year": 2000, "rating": 5}}).similar("Only", 5) == []
+
+
+def test_title_words_bring_related_titles_closer():
+    movies = {
+        "The Godfather": {"year": 1972, "rating": 9.2},
+        "The Godfather Part II": {"year": 1974, "rating": 9.0},
+        "Cabaret": {"year": 1972, "rating": 7.8},
+        "Deliverance": {"year": 1973, "rating": 7.7},
+    }
+    assert Recommender(movies).similar("The Godfather", 1)[0][0] == "The Godfather Part II"
+
+
+def test_storages_serve_random_and_similar_movies():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in (StorageJson(os.path.join(directory, "movies.json")),
+                        StorageSqlite(os.path.join(directory, "movies.db"))):
+            assert storage.random_movie() is None
+            with storage.batch():
+                storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+                storage.add_movie("Casino", 1995, 8.2, "N/A", "tt0112641")
+                storage.add_movie("Metropolis", 1927, 8.3, "N/A", "tt0017136")
+            assert storage.similar_movies("Heat", 1)[0][0] == "Casino"
+            assert storage.similar_movies("Missing") == []
+
+            storage.delete_movie("Casino")
+            storage.add_movie("Ronin", 1998, 7.2, "N/A", "tt0122690")
+            assert storage.similar_movies("Heat", 1)[0][0] == "Ronin"
+            for weighted in (False, True):
+                title, details = storage.random_movie(weighted=weighted)
+                assert title in ("Heat", "Metropolis", "Ronin")
+                assert details == storage.get_movie(title)
+            storage.delete_movie("Heat")
+            storage.delete_movie("Metropolis")
+            storage.delete_movie("Ronin")
+            assert storage.random_movie(weighted=True) is None
+
+
+if __name__ == "__main__":
+    test_picker_stays_in_sync_and_weights_by_rating()
+    test_similar_matches_a_brute_force_ranking_through_changes()
+    test_title_words_bring_related_titles_closer()
+    test_storages_serve_random_and_similar_movies()
+    print("All recommender tests passed.")
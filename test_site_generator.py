@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+from site_generator import SiteGenerator
+
+
+def _catalog(size):
+    return {
+        f"Movie {i}": {"year": 2000, "rating": 7.5, "poster": "N/A", "imdb_id": f"tt{i:07d}"}
+        for i in range(size)
+    }
+
+
+def test_rebuild_only_touches_changed_pages():
+    with tempfile.TemporaryDirectory() as directory:
+        generator = SiteGenerator(output_dir=directory, page_size=10, movie_pages=True)
+        movies = _catalog(91)
+
+        report = generator.build(movies)
+        assert report["written"] == report["pages"] == 10 + 91
+        assert os.path.exists(os.path.join(directory, "page-10.html"))
+
+        assert generator.build(movies)["written"] == 0
+
+        movies["Movie 42"]["notes"] = ["Seen it"]
+        report = generator.build(movies)
+        # The grid page holding the movie and the movie's own page
+        assert report["written"] == 2
+        # Pages list the titles in order: Movie 0, Movie 1, Movie 10, ..., Movie 19, Movie 2, ...
+        with open(os.path.join(directory, "page-4.html")) as page:
+            assert "Seen it" in page.read()
+
+        del movies["Movie 90"]
+        report = generator.build(movies)
+        assert report["removed"] == 2
+        assert not os.path.exists(os.path.join(directory, "page-10.html"))
+
+
+def test_changes_in_the_middle_only_touch_their_page():
+    with tempfile.TemporaryDirectory() as directory:
+        generator = SiteGenerator(output_dir=directory, page_size=10)
+        movies = _catalog(91)
+        generator.build(movies)
+
+        del movies["Movie 42"]
+        report = generator.build(movies)
+        assert (report["written"], report["removed"]) == (1, 0)
+
+        movies["Movie 25b"] = {"year": 2001, "rating": 6.0, "poster": "N/A", "imdb_id": "N/A"}
+        movies["Movie 25c"] = {"year": 2001, "rating": 6.0, "poster": "N/A", "imdb_id": "N/A"}
+        assert generator.build(movies)["written"] == 1
+
+        # A page that grew past twice the page size is split, and only the pages after it move
+        for i in range(20):
+            movies[f"Movie 88-{i:02d}"] = {"year": 2002, "rating": 6.0, "poster": "N/A", "imdb_id": "N/A"}
+        report = generator.build(movies)
+        # Three pages for the split one, and the last page under its new number
+        assert (report["pages"], report["written"]) == (12, 4)
+
+        # Neighbouring pages that shrink to one page's worth are merged
+        for i in (63, 64, 65, 66, 67, 72, 73, 74, 75, 76):
+            del movies[f"Movie {i}"]
+        report = generator.build(movies)
+        assert report["pages"] == 11
+        with open(os.path.join(directory, "page-7.html")) as page:
+            content = page.read()
+            assert "Movie 68 " in content and "Movie 77 " in content
+        assert generator.build(movies)["written"] == 0
+
+
+if __name__ == "__main__":
+    test_rebuild_only_touches_changed_pages()
+    test_changes_in_the_middle_only_touch_their_page()
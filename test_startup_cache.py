@@ -0,0 +1,124 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+from startup_cache import SNAPSHOT_VERSION, StartupCache, snapshot_path
+from storage_csv import StorageCsv
+
+
+def _fill(storage):
+    with storage.batch():
+        for i in range(200):
+            storage.add_movie(f"Movie {i}", 1950 + i % 60, 1 + i % 90 / 10, "N/A", f"tt{i:07d}")
+    storage.update_movie("Movie 7", "Seen twice")
+
+
+def _queries(storage):
+    return (
+        storage.search_movies("movie 1"),
+        storage.top_rated(5),
+        list(storage.filter_movies(1960, 1970, 5, None, None)),
+        storage.movie_stats(1999),
+    )
+
+
+def test_warm_start_matches_a_cold_start():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(path, startup_cache=True)
+        _fill(storage)
+        expected = _queries(storage)
+        assert storage.save_startup_cache()
+        assert not storage.save_startup_cache()  # Nothing new to save
+
+        warm = StorageCsv(path, startup_cache=True)
+        assert warm.list_movies() == storage.list_movies()
+        assert _queries(warm) == expected
+
+        third = StorageCsv(path, startup_cache=True)
+        third.delete_movie("Movie 10")
+        assert "Movie 10" not in [title for title, _ in third.search_movies("movie 10")]
+        assert third.save_startup_cache()
+        assert "Movie 10" not in StorageCsv(path, startup_cache=True).list_movies()
+
+
+def test_snapshot_is_only_used_while_the_file_matches():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(path, startup_cache=True)
+        _fill(storage)
+        storage.search_movies("movie")
+        storage.save_startup_cache()
+
+        # Same size and mtime, different content: only the hash tells them apart
+        stat = os.stat(path)
+        with open(path, "r+", encoding="utf-8") as file:
+            content = file.read().replace("Movie 1,", "Movie X,", 1)
+            file.seek(0)
+            file.write(content)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert StartupCache(path).load() is None
+        reloaded = StorageCsv(path, startup_cache=True)
+        assert "Movie X" in reloaded.list_movies()
+
+        # A damaged snapshot is ignored rather than trusted
+        reloaded.save_startup_cache()
+        with open(snapshot_path(path), "r+b") as file:
+            file.truncate(os.path.getsize(snapshot_path(path)) // 2)
+        assert StartupCache(path).load() is None
+        assert "Movie X" in StorageCsv(path, startup_cache=True).list_movies()
+
+
+class _Planted:
+    def __reduce__(self):
+        return os.remove, (self.victim,)
+
+
+def test_snapshot_is_data_only_and_validated():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.csv")
+        storage = StorageCsv(path, startup_cache=True)
+        _fill(storage)
+        storage.save_startup_cache()
+        with open(snapshot_path(path), "rb") as file:
+            header = json.loads(file.readline())
+        assert header["version"] == SNAPSHOT_VERSION and header["count"] == 200
+
+        # A pickle planted next to the catalog is never unpickled
+        planted = _Planted()
+        planted.victim = os.path.join(directory, "victim")
+        open(planted.victim, "w").close()
+        with open(snapshot_path(path), "wb") as file:
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+            pickle.dump(planted, file)
+        assert StartupCache(path).load() is None
+        assert len(StorageCsv(path, startup_cache=True).list_movies()) == 200
+        assert os.path.exists(planted.victim)
+
+        # Valid JSON that isn't a catalog is rejected too
+        for movies, usable in (({"Heat": {"year": "1995", "rating": 8.3}}, False),
+                               ({"Heat": {"year": 1995, "rating": 8.3, "notes": [1]}}, False),
+                               ([["Heat", 1995, 8.3]], False),
+                               ({"Heat": {"year": 1995, "rating": 8.3}}, True)):
+            with open(snapshot_path(path), "wb") as file:
+                file.write(json.dumps(dict(header, count=1)).encode("utf-8") + b"\n")
+                file.write(json.dumps(movies).encode("utf-8"))
+            assert StartupCache(path).load() == (movies if usable else None)
+
+
+def test_importing_the_app_does_not_import_requests():
+    code = "import sys, main; print('requests' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    assert output.strip() == "False"
+
+
+if __name__ == "__main__":
+    test_warm_start_matches_a_cold_start()
+    test_snapshot_is_only_used_while_the_file_matches()
+    test_snapshot_is_data_only_and_validated()
+    test_importing_the_app_does_not_import_requests()
+    print("All startup cache tests passed.")
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from storage_binary import StorageBinary, write_catalog
+from storage_json import StorageJson
+
+
+def test_storage_binary():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.bin")
+        storage = StorageBinary(file_path)
+        storage.add_movie("Inception", 2010, 8.8, "https://example.com/inception.jpg", "tt1375666")
+        storage.add_movie("Avatar", 2009, 7.9, "https://example.com/avatar.jpg", "tt0499549")
+        storage.add_movie("Amélie", 2001, 8.3, "N/A", "tt0211915")
+        storage.update_movie("Inception", "Updated note")
+        storage.delete_movie("Avatar")
+
+        reopened = StorageBinary(file_path)
+        movies = reopened.list_movies()
+        assert list(movies) == ["Inception", "Amélie"]
+        assert "Avatar" not in movies
+        assert movies["Amélie"]["rating"] == 8.3
+        assert movies["Inception"]["notes"] == ["Updated note"]
+        assert reopened.movie_stats()["best"] == ("Inception", 8.8)
+
+
+def test_import_and_export():
+    with tempfile.TemporaryDirectory() as directory:
+        binary_path = os.path.join(directory, "movies.bin")
+        json_path = os.path.join(directory, "copy.json")
+        subprocess.run([sys.executable, "storage_binary.py", "import", "movies.json", binary_path],
+                       check=True, capture_output=True)
+        subprocess.run([sys.executable, "storage_binary.py", "export", binary_path, json_path],
+                       check=True, capture_output=True)
+
+        original = StorageJson("movies.json").list_movies()
+        assert StorageJson(json_path).list_movies() == original
+        assert os.path.getsize(binary_path) < os.path.getsize("movies.json")
+
+
+def test_failed_write_keeps_the_old_catalog():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "movies.bin")
+        storage = StorageBinary(file_path)
+        storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+        try:
+            write_catalog(file_path, {"Heat": {"year": 1995, "rating": 8.3}, "Ran": {"year": "unknown", "rating": 8.2}})
+            assert False, "expected the bad year to fail the write"
+        except ValueError:
+            pass
+        assert os.listdir(directory) == ["movies.bin"]
+        assert list(StorageBinary(file_path).list_movies()) == ["Heat"]
+
+
+if __name__ == "__main__":
+    test_storage_binary()
+    test_import_and_export()
+    test_failed_write_keeps_the_old_catalog()
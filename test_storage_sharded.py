@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+
+import metrics
+from storage_sharded import StorageSharded
+
+MOVIES = [("Movie %d" % i, 1990 + i % 10, 5 + (i % 50) / 10) for i in range(200)]
+
+
+def _fill(storage):
+    with storage.batch():
+        for title, year, rating in MOVIES:
+            storage.add_movie(title, year, rating, "N/A", "N/A")
+
+
+def test_hash_shards_load_and_rewrite_only_what_they_need():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageSharded(directory, shards=8)
+        _fill(storage)
+        with open(os.path.join(directory, "manifest.json")) as file:
+            manifest = json.load(file)
+        assert manifest["partition"] == "hash"
+        assert sum(manifest["counts"].values()) == 200
+        assert len(manifest["counts"]) == 8
+
+        reopened = StorageSharded(directory)
+        assert reopened.count_movies() == 200 and not reopened._loaded
+        assert reopened.get_movie("Movie 7")["year"] == 1997
+        assert len(reopened._loaded) == 1
+
+        shard = reopened._locate("Movie 7")
+        mtimes = {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+        reopened.update_movie("Movie 7", "Seen it")
+        changed = [name for name in os.listdir(directory)
+                   if os.stat(os.path.join(directory, name)).st_mtime_ns != mtimes.get(name)]
+        assert sorted(changed) == sorted([f"{shard}.json", "manifest.json"])
+
+        reopened.delete_movie("Movie 8")
+        assert StorageSharded(directory).get_movie("Movie 7")["notes"] == ["Seen it"]
+        assert StorageSharded(directory).get_movie("Movie 8") is None
+        assert reopened.top_rated(1)[0][1]["rating"] == 9.9
+
+
+def test_year_shards_and_parallel_scan():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageSharded(directory, partition="year")
+        _fill(storage)
+        assert sorted(os.listdir(directory)) == sorted(
+            ["manifest.json", "titles.json"] + [f"year-{year}.json" for year in range(1990, 2000)])
+
+        # Force the process pool even for this small catalog
+        reopened = StorageSharded(directory, max_workers=2, parallel_bytes=0)
+        assert len(reopened.read_storage()) == 200
+        assert reopened.movie_stats(1995)["best"][1] == 9.5
+
+        reopened.delete_movie("Movie 5")
+        reopened.add_movie("Movie 5", 2024, 7.0, "N/A", "N/A")
+        assert StorageSharded(directory).get_movie("Movie 5")["year"] == 2024
+
+
+def test_scans_count_bytes_once_and_year_changes_move_shards():
+    with tempfile.TemporaryDirectory() as directory:
+        _fill(StorageSharded(directory, shards=4))
+        shard_bytes = sum(os.path.getsize(os.path.join(directory, name))
+                          for name in os.listdir(directory) if name.startswith("shard-"))
+        metrics.METRICS.reset()
+        metrics.enable()
+        try:
+            StorageSharded(directory, max_workers=1).read_storage()
+            read = next(counter["value"] for counter in metrics.METRICS.snapshot()["counters"]
+                        if counter["name"] == "file_bytes_read")
+        finally:
+            metrics.disable()
+            metrics.METRICS.reset()
+        assert read == shard_bytes
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageSharded(directory, partition="year")
+        _fill(storage)
+        storage.movie_list["Movie 5"] = dict(storage.get_movie("Movie 5"), year=2024)
+        storage.write_storage()
+        assert storage._locate("Movie 5") == "year-2024"
+        reopened = StorageSharded(directory)
+        assert reopened.get_movie("Movie 5")["year"] == 2024
+        assert "Movie 5" not in reopened._shard("year-1995")
+        assert reopened.count_movies() == len(MOVIES)
+
+
+if __name__ == "__main__":
+    test_hash_shards_load_and_rewrite_only_what_they_need()
+    test_year_shards_and_parallel_scan()
+    test_scans_count_bytes_once_and_year_changes_move_shards()
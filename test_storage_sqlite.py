@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+from storage_json import StorageJson
+from storage_sqlite import StorageSqlite
+
+
+def test_storage_sqlite():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageSqlite(os.path.join(directory, "movies.db"))
+        storage.add_movie("Inception", 2010, 8.8, "https://example.com/inception.jpg", "tt1375666")
+        storage.add_movie("The Matrix", 1999, 8.7, "https://example.com/matrix.jpg", "tt0133093")
+        storage.add_movie("Avatar", 2009, 7.9, "https://example.com/avatar.jpg", "tt0499549")
+        storage.update_movie("Inception", "Updated note")
+
+        assert storage.count_movies() == 3
+        assert storage.get_movie("Inception")["notes"] == ["Updated note"]
+        assert [title for title, _ in storage.search_movies("mat")] == ["The Matrix"]
+        assert [title for title, _ in storage.movies_sorted_by_rating()] == ["Inception", "The Matrix", "Avatar"]
+
+        stats = storage.movie_stats()
+        assert stats["median"] == 8.7
+        assert stats["best"] == ("Inception", 8.8)
+        assert stats["worst"] == ("Avatar", 7.9)
+
+        storage.delete_movie("Inception")
+        assert storage.get_movie("Inception") is None
+        # Notes of a deleted movie go with it
+        assert storage.connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 0
+        storage.connection.close()
+
+
+def test_imdb_id_lookups_use_the_table_and_see_other_connections():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "movies.db")
+        storage = StorageSqlite(path)
+        storage.add_movie("Heat", 1995, 8.3, "N/A", "tt0113277")
+        storage.update_movie("Heat", "Diner scene")
+        reads = []
+        storage.read_storage = lambda: reads.append(1) or {}
+        for _ in range(5):
+            assert storage.get_movie_by_imdb_id("tt0113277") == ("Heat", storage.get_movie("Heat"))
+        assert storage.find_duplicate("Another title", "tt0113277") == "Heat"
+        assert storage.get_movie_by_imdb_id("N/A") is None
+        assert not reads
+
+        del storage.read_storage
+        assert storage.find_duplicate("HEAT!") == "Heat"
+        other = StorageSqlite(path)
+        other.add_movie("Amélie", 2001, 8.3, "N/A", "tt0211915")
+        other.connection.close()
+        # The near-identical title index was built before the other connection's add
+        assert storage.find_duplicate("amelie") == "Amélie"
+        storage.connection.close()
+
+
+def test_rankings_page_like_the_rating_index_and_similar_reads_only_results():
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageSqlite(os.path.join(directory, "movies.db"))
+        reference = StorageJson(os.path.join(directory, "movies.json"))
+        for target in (storage, reference):
+            with target.batch():
+                for i in range(40):
+                    target.add_movie(f"Movie {i:02d}", 1990 + i % 7, (7.0, 8.0, 7.5)[i % 3], "N/A", "N/A")
+        expected = [title for title, _ in reference.movies_sorted_by_rating()]
+        pages = []
+        for start in range(0, 40, 6):
+            pages += [title for title, _ in storage.movies_sorted_by_rating(start, start + 6)]
+        assert pages == expected
+        assert [title for title, _ in storage.bottom_rated(5)] == [title for title, _ in reference.bottom_rated(5)]
+        stats, expected_stats = storage.movie_stats(), reference.movie_stats()
+        assert [stats[key] for key in ("median", "best", "worst")] == \
+            [expected_stats[key] for key in ("median", "best", "worst")]
+
+        storage.similar_movies("Movie 03")
+        storage.update_movie("Movie 04", "Seen")
+        reads = []
+        storage.read_storage = lambda: reads.append(1) or {}
+        similar = storage.similar_movies("Movie 03", k=3)
+        assert similar == [(title, storage.get_movie(title)) for title, _ in reference.similar_movies("Movie 03", k=3)]
+        assert not reads
+        storage.connection.close()
+
+
+if __name__ == "__main__":
+    test_storage_sqlite()
+    test_imdb_id_lookups_use_the_table_and_see_other_connections()
+    test_rankings_page_like_the_rating_index_and_similar_reads_only_results()
@@ -0,0 +1,25 @@
+from title_index import TitleIndex
+
+
+def test_substring_search_matches_linear_scan():
+    movies = {title: {} for title in [
+        "The Godfather", "The Godfather: Part II", "Pulp Fiction", "12 Angry Men", "The Room", "Up"]}
+    index = TitleIndex(movies)
+    index.on_change("God's Own Country", None, {})
+    index.on_change("The Room", {}, None)
+    titles = [title for title in movies if title != "The Room"] + ["God's Own Country"]
+
+    for term in ["god", "GODFATHER", "the", "up", "u", "room", "part ii", "zzz"]:
+        assert index.search(term) == [title for title in titles if term.lower() in title.lower()]
+
+
+def test_fuzzy_matches_typos():
+    index = TitleIndex({title: {} for title in ["The Shawshank Redemption", "Pulp Fiction", "Forrest Gump"]})
+    assert index.fuzzy("shawshenk redemtion")[0][0] == "The Shawshank Redemption"
+    assert index.fuzzy("forest gump", limit=1)[0][0] == "Forrest Gump"
+    assert index.fuzzy("xyzzy") == []
+
+
+if __name__ == "__main__":
+    test_substring_search_matches_linear_scan()
+    test_fuzzy_matches_typos()
@@ -0,0 +1,117 @@
+import heapq
+from collections import Counter
+from itertools import count
+
+
+def trigrams(text):
+    """
+    Returns the set of three-character substrings of a lower-cased text.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TitleIndex:
+    def __init__(self, movies, max_fuzzy_postings=50000):
+        """
+        Initializes a trigram inverted index over the movie titles.
+        A substring query only looks at titles that contain every trigram of the
+        query, and typos are matched by ranking titles on shared trigrams. Register it
+        as a storage listener to keep it in sync.
+        Args:
+            movies (dict): The catalog to start from.
+            max_fuzzy_postings (int): Trigrams found in more titles than this are too
+                common to tell titles apart and are ignored by fuzzy matching.
+        """
+        self.max_fuzzy_postings = max_fuzzy_postings
+        self._sequence = count()
+        self._postings = {}  # Trigram -> set of titles containing it
+        self._titles = {}  # Title -> (lower-cased title, trigram count, insertion order)
+        for title in movies:
+            self._add(title)
+
+    def _add(self, title):
+        lowered = title.lower()
+        grams = trigrams(lowered)
+        self._titles[title] = (lowered, len(grams), next(self._sequence))
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = set()
+            postings.add(title)
+
+    def _remove(self, title):
+        lowered, _, _ = self._titles.pop(title)
+        for gram in trigrams(lowered):
+            postings = self._postings[gram]
+            postings.discard(title)
+            if not postings:
+                del self._postings[gram]
+
+    def on_change(self, title, old, new):
+        """
+        Storage listener hook, called after a movie was added, changed or deleted.
+        Args:
+            title (str): The movie's title.
+            old (dict): Details before the change, None for an added movie.
+            new (dict): Details after the change, None for a deleted movie.
+        """
+        if old is None and new is not None:
+            self._add(title)
+        elif new is None and title in self._titles:
+            self._remove(title)
+
+    def search(self, term):
+        """
+        Finds the titles containing the term, ignoring case.
+        Args:
+            term (str): The text to look for.
+        Returns:
+            list: Matching titles in the order they were added.
+        """
+        term = term.lower()
+        grams = trigrams(term)
+        if not grams:
+            # One or two characters: too short for trigrams, check every title
+            return [title for title, (lowered, _, _) in self._titles.items() if term in lowered]
+
+        postings = []
+        for gram in grams:
+            titles = self._postings.get(gram)
+            if not titles:
+                return []
+            postings.append(titles)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for titles in postings[1:]:
+            candidates &= titles
+            if not candidates:
+                return []
+        matches = [title for title in candidates if term in self._titles[title][0]]
+        return sorted(matches, key=lambda title: self._titles[title][2])
+
+    def fuzzy(self, term, limit=5, threshold=0.3):
+        """
+        Finds the titles most similar to the term, to suggest matches for typos.
+        Similarity is the Jaccard index of the trigram sets.
+        Args:
+            term (str): The text to look for.
+            limit (int): Maximum number of titles to return.
+            threshold (float): Minimum similarity between 0 and 1.
+        Returns:
+            list: (title, similarity) pairs, most similar first.
+        """
+        grams = trigrams(term.lower())
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            titles = self._postings.get(gram)
+            if titles and len(titles) <= self.max_fuzzy_postings:
+                shared.update(titles)
+
+        scored = []
+        for title, common in shared.items():
+            similarity = common / (len(grams) + self._titles[title][1] - common)
+            if similarity >= threshold:
+                scored.append((similarity, title))
+        return [(title, similarity) for similarity, title in heapq.nlargest(limit, scored)]